@@ -1,10 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.chat import ChatRequest, APIResponse, HealthResponse, StructuredMealSuggestion
+from fastapi import APIRouter, HTTPException, Depends, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from app.models.chat import BatchChatRequest, ChatMessage, ChatRequest, JobRequest, MealPlanRequest, APIResponse, HealthResponse, StructuredMealSuggestion, SuggestionResult
 from app.services.openrouter_service import OpenRouterService
 from app.services.prompt_service import PromptService
+from app.services.cache_service import SuggestionCache
+from app.services.coalescer import RequestCoalescer
+from app.services.suggestion_service import SuggestionService
+from app.services.session_store import SessionStore
+from app.services.meal_plan_service import MealPlanService
+from app.services.job_queue import Job, JobQueue
+from app.services.websocket_chat import ChatConnection
+from app.services.storage import MemoryStorage, SQLiteStorage
+from app.services.journal import Journal
+from app.services.admission import AdmissionRejected
+from app.services.health_monitor import HealthMonitor, PROCESS_STARTED_AT
 from app.services.json_parser import JSONParser
+from app.services.json_repair import JSONRepair
 from app.core.config import settings
+from app.core.logging import current_request_id, get_log_stats
+from app.core.metrics import metrics
+from app.core.tracing import tracer
 from loguru import logger
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import uuid
 import time
 import json
@@ -14,38 +32,163 @@ router = APIRouter()
 # Initialize OpenRouter service
 openrouter_service = OpenRouterService()
 
+# Initialize suggestion cache and the service that sits in front of OpenRouter
+suggestion_cache = SuggestionCache(
+    max_entries=settings.cache_max_entries,
+    ttl_seconds=settings.cache_ttl_seconds,
+    disk_path=settings.cache_disk_path,
+    disk_max_entries=settings.cache_disk_max_entries
+) if settings.cache_enabled else None
+request_coalescer = RequestCoalescer() if settings.coalescing_enabled else None
+session_store = SessionStore(
+    max_sessions=settings.session_max_sessions,
+    ttl_seconds=settings.session_ttl_seconds,
+    max_memory_bytes=int(settings.session_max_memory_mb * 1024 * 1024),
+    history_token_budget=settings.session_history_token_budget,
+    max_turns=settings.session_max_turns
+) if settings.session_enabled else None
+if settings.storage_backend == "sqlite":
+    storage = SQLiteStorage(
+        settings.storage_sqlite_path,
+        flush_interval_seconds=settings.storage_flush_interval_seconds,
+        batch_size=settings.storage_batch_size,
+        compaction_interval_seconds=settings.storage_compaction_interval_seconds,
+        max_write_attempts=settings.storage_max_write_attempts
+    )
+elif settings.storage_backend == "memory":
+    storage = MemoryStorage()
+else:
+    storage = None
+journal = Journal(
+    settings.journal_dir,
+    max_file_bytes=int(settings.journal_max_file_mb * 1024 * 1024),
+    max_files=settings.journal_max_files,
+    flush_interval_seconds=settings.journal_flush_interval_seconds
+) if settings.journal_enabled else None
+suggestion_service = SuggestionService(
+    openrouter_service,
+    suggestion_cache,
+    request_coalescer,
+    session_store,
+    storage=storage,
+    suggestion_retention_seconds=settings.suggestion_retention_seconds,
+    suggestion_read_cache_entries=settings.suggestion_read_cache_entries,
+    journal=journal
+)
+meal_plan_service = MealPlanService(
+    suggestion_service,
+    max_concurrency=settings.batch_max_concurrency,
+    max_regenerations=settings.meal_plan_max_regenerations
+)
+
+
+async def run_suggestion_job(job: Job) -> dict:
+    """Resolve a queued suggestion job into the same data /suggest returns."""
+    session_id = job.session_id or str(uuid.uuid4())
+    result = await suggestion_service.get_suggestion(
+        user_message=job.message, session_id=session_id, keep_history=job.session_id is not None
+    )
+    return build_suggestion_data(job.message, session_id, result)
+
+
+job_queue = JobQueue(
+    run_suggestion_job,
+    workers=settings.job_workers,
+    max_queue=settings.job_max_queue,
+    result_ttl_seconds=settings.job_result_ttl_seconds,
+    callback_timeout_seconds=settings.job_callback_timeout_seconds,
+    callback_allowed_hosts=settings.job_callback_allowed_host_list
+)
+
+health_monitor = HealthMonitor(
+    openrouter_service,
+    interval_seconds=settings.health_check_interval_seconds,
+    timeout_seconds=settings.health_check_timeout_seconds,
+    window=settings.health_check_window,
+    probe_url=settings.health_check_url
+) if settings.health_check_enabled else None
+
+# Suggest path metrics; stage histograms share one name with a "stage" label
+SUGGEST_REQUESTS = metrics.counter("suggest_requests_total", "Meal suggestion requests")
+SUGGEST_FAILURES = metrics.counter("suggest_requests_failed_total", "Meal suggestion requests that returned an error")
+SUGGEST_LATENCY = metrics.histogram("suggest_request_duration_ms", "End-to-end /suggest handler latency")
+VALIDATION_LATENCY = metrics.histogram("suggest_stage_duration_ms", "Per-stage /suggest latency", {"stage": "validation"})
+SERIALIZATION_LATENCY = metrics.histogram("suggest_stage_duration_ms", "Per-stage /suggest latency", {"stage": "serialization"})
+SUGGEST_STAGES = ("validation", "upstream", "parse", "serialization")
+BATCH_LATENCY = metrics.histogram("suggest_batch_duration_ms", "End-to-end /suggest/batch handler latency")
+BATCH_ITEMS = metrics.counter("suggest_batch_items_total", "Items received by /suggest/batch")
+BATCH_DEDUPLICATED = metrics.counter("suggest_batch_deduplicated_total", "Batch items served by an identical item's call")
+
+# Subsystem stats exported with the Prometheus metrics
+metrics.register_collector("upstream_pool", openrouter_service.get_pool_stats)
+metrics.register_collector("json_repair", JSONRepair.get_stats)
+metrics.register_collector("upstream_resilience", openrouter_service.get_resilience_stats)
+# Queue depth, in-flight calls, wait time and outcomes are registered metrics already
+metrics.register_collector("upstream_admission", openrouter_service.admission.get_collector_stats)
+metrics.register_collector("hedging", openrouter_service.get_hedging_stats)
+metrics.register_collector("upstreams", openrouter_service.get_upstream_stats)
+metrics.register_collector("structured_output", openrouter_service.get_structured_output_stats)
+metrics.register_collector("tokens", openrouter_service.get_token_stats)
+if suggestion_cache:
+    metrics.register_collector("cache", suggestion_cache.get_stats)
+if request_coalescer:
+    metrics.register_collector("coalescing", request_coalescer.get_stats)
+metrics.register_collector("jobs", job_queue.get_stats)
+metrics.register_collector("websocket", ChatConnection.get_stats)
+if session_store:
+    metrics.register_collector("sessions", session_store.get_stats)
+if storage:
+    metrics.register_collector("storage", storage.get_stats)
+if journal:
+    metrics.register_collector("journal", journal.get_stats)
+if health_monitor:
+    metrics.register_collector("upstream_health", health_monitor.get_snapshot)
+metrics.register_collector("tracing", tracer.get_stats)
+
+
+def build_suggestion_data(message: str, session_id: str, result: SuggestionResult) -> dict:
+    """Build the response data for a resolved meal suggestion."""
+    response_data = {
+        "message": message,
+        "suggestion": result.suggestion.dict(),
+        "session_id": session_id,
+        "timestamp": result.timestamp.isoformat(),
+        "suggestion_id": result.suggestion_id,
+        "cached": result.cached,
+        "coalesced": result.coalesced
+    }
+    if not result.structured:
+        # Include raw response for debugging when JSON parsing fails
+        response_data["raw_response"] = result.raw_content
+    return response_data
+
+
+def format_sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
 @router.get("/health", response_model=APIResponse)
 async def health_check():
     """Health check endpoint with structured response."""
     try:
-        start_time = time.time()
-        
-        # Test OpenRouter connection
-        openrouter_status = "connected"
-        try:
-            # Quick test to see if we can reach OpenRouter
-            import httpx
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get("https://openrouter.ai")
-                if response.status_code != 200:
-                    openrouter_status = "unreachable"
-        except:
-            openrouter_status = "unreachable"
-        
-        uptime = time.time() - start_time
+        # Served from the background monitor's cached state; no outbound call per probe
+        upstream = health_monitor.get_snapshot() if health_monitor else {"status": "unknown"}
+        openrouter_status = upstream["status"]
         
         health_data = {
-            "status": "healthy",
+            "status": "degraded" if openrouter_status == "unreachable" else "healthy",
             "version": settings.app_version,
-            "uptime_seconds": round(uptime, 2),
+            "uptime_seconds": round(HealthMonitor.uptime_seconds(), 2),
+            "started_at": PROCESS_STARTED_AT,
             "openrouter_status": openrouter_status,
+            "upstream": upstream,
             "model": settings.openrouter_model,
             "timestamp": time.time(),
             "features": {
                 "json_responses": True,
                 "structured_parsing": True,
-                "session_management": True
+                "session_management": session_store is not None
             }
         }
         
@@ -67,12 +210,35 @@ async def health_check():
 @router.post("/suggest", response_model=APIResponse)
 async def generate_meal_suggestion(request: ChatRequest):
     """Generate a meal suggestion based on user input."""
-    start_time = time.time()
-    request_id = str(uuid.uuid4())
+    start_time = time.perf_counter()
+    
+    try:
+        api_response = await _generate_meal_suggestion(request)
+    except AdmissionRejected:
+        # Rendered as 503 with Retry-After by the application exception handler
+        SUGGEST_REQUESTS.inc()
+        SUGGEST_FAILURES.inc()
+        raise
+    
+    # Serialize here rather than in FastAPI so the cost is measured
+    with SERIALIZATION_LATENCY.time(), tracer.span("serialize"):
+        response = Response(content=api_response.model_dump_json(), media_type="application/json")
+    
+    SUGGEST_REQUESTS.inc()
+    if not api_response.success:
+        SUGGEST_FAILURES.inc()
+    SUGGEST_LATENCY.observe((time.perf_counter() - start_time) * 1000)
+    return response
+
+
+async def _generate_meal_suggestion(request: ChatRequest) -> APIResponse:
+    """Resolve a meal suggestion request into an API response envelope."""
+    request_id = current_request_id() or str(uuid.uuid4())
     
     try:
         # Validate the user message
-        is_valid, error_message = PromptService.validate_user_message(request.message)
+        with VALIDATION_LATENCY.time():
+            is_valid, error_message = PromptService.validate_user_message(request.message)
         if not is_valid:
             return APIResponse(
                 success=False,
@@ -81,31 +247,23 @@ async def generate_meal_suggestion(request: ChatRequest):
                 request_id=request_id
             )
         
-        # Generate session ID if not provided
+        # Generate session ID if not provided; a generated one is not kept as a session
         session_id = request.session_id or str(uuid.uuid4())
         
-        logger.info(f"Processing meal suggestion request {request_id} for session: {session_id}")
+        logger.info("Processing meal suggestion request {} for session: {}", request_id, session_id, event="suggest.request")
         
-        # Generate meal suggestion
-        suggestion = await openrouter_service.generate_meal_suggestion(
+        # Generate meal suggestion (served from cache for repeated prompts)
+        result = await suggestion_service.get_suggestion(
             user_message=request.message,
-            session_id=session_id
+            session_id=session_id,
+            keep_history=request.session_id is not None
         )
         
-        # Parse the structured response
-        structured_suggestion = JSONParser.parse_meal_suggestion(suggestion.content)
+        response_data = build_suggestion_data(request.message, session_id, result)
         
-        if structured_suggestion:
-            # Return structured JSON response
-            response_data = {
-                "message": request.message,
-                "suggestion": structured_suggestion.dict(),
-                "session_id": session_id,
-                "timestamp": suggestion.timestamp.isoformat() if hasattr(suggestion.timestamp, 'isoformat') else str(suggestion.timestamp),
-                "suggestion_id": suggestion.suggestion_id
-            }
-            
-            logger.info(f"Successfully processed structured meal suggestion {suggestion.suggestion_id} for session: {session_id}")
+        if result.structured:
+            logger.info("Successfully processed structured meal suggestion {} for session: {}", result.suggestion_id, session_id,
+                        event="suggest.response")
             
             return APIResponse(
                 success=True,
@@ -114,20 +272,7 @@ async def generate_meal_suggestion(request: ChatRequest):
                 request_id=request_id
             )
         else:
-            # Fallback to raw response if JSON parsing fails
-            logger.warning(f"JSON parsing failed for suggestion {suggestion.suggestion_id}, using fallback")
-            
-            fallback_suggestion = JSONParser.create_fallback_response(request.message)
-            
-            response_data = {
-                "message": request.message,
-                "suggestion": fallback_suggestion.dict(),
-                "raw_response": suggestion.content,  # Include raw response for debugging
-                "session_id": session_id,
-                "timestamp": suggestion.timestamp.isoformat() if hasattr(suggestion.timestamp, 'isoformat') else str(suggestion.timestamp),
-                "suggestion_id": suggestion.suggestion_id
-            }
-            
+            # Fallback format, raw response is included for debugging
             return APIResponse(
                 success=True,
                 message="Meal suggestion generated (fallback format)",
@@ -138,6 +283,8 @@ async def generate_meal_suggestion(request: ChatRequest):
     except HTTPException as http_exc:
         logger.error(f"HTTP Exception in meal suggestion: {http_exc.detail}")
         raise http_exc
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error generating meal suggestion: {str(e)}")
         return APIResponse(
@@ -148,6 +295,267 @@ async def generate_meal_suggestion(request: ChatRequest):
         )
 
 
+@router.post("/suggest/batch", response_model=APIResponse)
+async def generate_meal_suggestions_batch(request: BatchChatRequest):
+    """Generate several meal suggestions concurrently, returning per-item results in request order."""
+    request_id = current_request_id() or str(uuid.uuid4())
+    start_time = time.perf_counter()
+    
+    if len(request.items) > settings.batch_max_items:
+        return APIResponse(
+            success=False,
+            message="Validation failed",
+            error={"type": "validation_error", "details": f"Too many items (max {settings.batch_max_items})"},
+            request_id=request_id
+        )
+    BATCH_ITEMS.inc(len(request.items))
+    
+    # Validate every item before making any upstream call
+    results: List[Optional[dict]] = [None] * len(request.items)
+    groups: Dict[Tuple[str, Optional[str]], List[int]] = {}
+    for index, item in enumerate(request.items):
+        is_valid, error_message = PromptService.validate_user_message(item.message)
+        if not is_valid:
+            results[index] = {"index": index, "success": False, "error": {"type": "validation_error", "details": error_message}}
+            continue
+        # Identical prompts in the same session share one suggestion
+        groups.setdefault((SuggestionCache.normalize_message(item.message), item.session_id), []).append(index)
+    BATCH_DEDUPLICATED.inc(sum(len(indexes) - 1 for indexes in groups.values()))
+    
+    semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+    
+    async def resolve(indexes: List[int]) -> None:
+        first = request.items[indexes[0]]
+        session_id = first.session_id or str(uuid.uuid4())
+        async with semaphore:
+            try:
+                result = await suggestion_service.get_suggestion(
+                    user_message=first.message, session_id=session_id, keep_history=first.session_id is not None
+                )
+            except AdmissionRejected as e:
+                error = {"type": "overloaded", "details": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                logger.error(f"Error generating batch meal suggestion: {str(e)}")
+                error = {"type": "generation_error", "details": str(e)}
+            else:
+                for index in indexes:
+                    data = build_suggestion_data(request.items[index].message, session_id, result)
+                    results[index] = {"index": index, "success": True, "data": data}
+                return
+        for index in indexes:
+            results[index] = {"index": index, "success": False, "error": error}
+    
+    await asyncio.gather(*(resolve(indexes) for indexes in groups.values()))
+    
+    succeeded = sum(1 for result in results if result["success"])
+    logger.info(
+        f"Processed batch {request_id}: {len(results)} items, {len(groups)} upstream lookups, "
+        f"{succeeded} succeeded in {(time.perf_counter() - start_time) * 1000:.0f} ms"
+    )
+    BATCH_LATENCY.observe((time.perf_counter() - start_time) * 1000)
+    return APIResponse(
+        success=succeeded > 0,
+        message=f"Batch processed: {succeeded} succeeded, {len(results) - succeeded} failed",
+        data={"results": results, "succeeded": succeeded, "failed": len(results) - succeeded},
+        request_id=request_id
+    )
+
+
+@router.post("/meal-plan", response_model=APIResponse)
+async def generate_meal_plan(request: MealPlanRequest):
+    """Generate a multi-day meal plan with daily and plan-wide nutrition totals."""
+    request_id = current_request_id() or str(uuid.uuid4())
+    
+    is_valid, error_message = PromptService.validate_user_message(request.preferences)
+    if not is_valid:
+        return APIResponse(
+            success=False,
+            message="Validation failed",
+            error={"type": "validation_error", "details": error_message},
+            request_id=request_id
+        )
+    
+    try:
+        plan = await meal_plan_service.generate(request)
+    except Exception as e:
+        logger.error(f"Error generating meal plan: {str(e)}")
+        return APIResponse(
+            success=False,
+            message="Failed to generate meal plan",
+            error={"type": "generation_error", "details": str(e)},
+            request_id=request_id
+        )
+    
+    return APIResponse(
+        success=True,
+        message="Meal plan generated successfully",
+        data=plan,
+        request_id=request_id
+    )
+
+
+@router.post("/jobs", response_model=APIResponse, status_code=202)
+async def submit_suggestion_job(request: JobRequest, response: Response):
+    """Queue a meal suggestion and return a job ID to poll instead of holding the connection open."""
+    request_id = current_request_id() or str(uuid.uuid4())
+    
+    is_valid, error_message = PromptService.validate_user_message(request.message)
+    if is_valid and request.callback_url and not job_queue.callback_allowed(request.callback_url):
+        is_valid, error_message = False, "Callback URL must be http(s) and on the allowed hosts list"
+    if not is_valid:
+        response.status_code = 400
+        return APIResponse(
+            success=False,
+            message="Validation failed",
+            error={"type": "validation_error", "details": error_message},
+            request_id=request_id
+        )
+    
+    # A full queue raises AdmissionRejected, rendered as 503 with Retry-After
+    job = job_queue.submit(request.message, request.session_id, request.callback_url)
+    logger.info(f"Queued suggestion job {job.job_id} for session: {job.session_id}")
+    return APIResponse(
+        success=True,
+        message="Suggestion job queued",
+        data={"job_id": job.job_id, "status": job.status, "status_url": f"/api/chat/jobs/{job.job_id}"},
+        request_id=request_id
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=APIResponse)
+async def get_suggestion_job(job_id: str):
+    """Poll a suggestion job for its status and, once finished, its result."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return APIResponse(
+        success=job.status != Job.FAILED,
+        message=f"Job {job.status}",
+        data=job.to_dict()
+    )
+
+
+@router.post("/suggest/stream")
+async def stream_meal_suggestion(request: ChatRequest):
+    """Stream a meal suggestion as Server-Sent Events, one field at a time."""
+    request_id = current_request_id() or str(uuid.uuid4())
+    
+    # Validate the user message before opening the stream
+    is_valid, error_message = PromptService.validate_user_message(request.message)
+    if not is_valid:
+        return APIResponse(
+            success=False,
+            message="Validation failed",
+            error={"type": "validation_error", "details": error_message},
+            request_id=request_id
+        )
+    
+    session_id = request.session_id or str(uuid.uuid4())
+    logger.info("Processing streamed meal suggestion request {} for session: {}", request_id, session_id, event="suggest.request")
+    
+    async def event_stream():
+        yield format_sse_event("start", {"request_id": request_id, "session_id": session_id})
+        try:
+            async for event, payload in suggestion_service.stream_suggestion(
+                request.message, session_id, keep_history=request.session_id is not None
+            ):
+                if event == "complete":
+                    response_data = build_suggestion_data(request.message, session_id, payload)
+                    yield format_sse_event("complete", {
+                        "success": True,
+                        "message": (
+                            "Structured meal suggestion generated successfully" if payload.structured
+                            else "Meal suggestion generated (fallback format)"
+                        ),
+                        "data": response_data,
+                        "request_id": request_id
+                    })
+                else:
+                    yield format_sse_event(event, payload)
+        except AdmissionRejected as e:
+            # The 200 response has already started, so shedding is reported in-band
+            yield format_sse_event("error", {
+                "success": False,
+                "message": "Service overloaded, please retry",
+                "error": {"type": "overloaded", "details": str(e), "retry_after": e.retry_after},
+                "request_id": request_id
+            })
+        except Exception as e:
+            logger.error(f"Error streaming meal suggestion: {str(e)}")
+            yield format_sse_event("error", {
+                "success": False,
+                "message": "Failed to generate meal suggestion",
+                "error": {"type": "generation_error", "details": str(e)},
+                "request_id": request_id
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, session_id: Optional[str] = None):
+    """Multi-turn chat over one WebSocket, with several streamed suggestions in flight at once."""
+    await websocket.accept()
+    connection = ChatConnection(
+        websocket,
+        suggestion_service,
+        build_suggestion_data,
+        session_id or str(uuid.uuid4()),
+        max_in_flight=settings.ws_max_in_flight,
+        send_queue_size=settings.ws_send_queue_size,
+        idle_timeout_seconds=settings.ws_idle_timeout_seconds
+    )
+    await connection.run()
+
+
+@router.get("/sessions/{session_id}", response_model=APIResponse)
+async def get_session(session_id: str):
+    """Retrieve the conversation history kept for a session."""
+    history = await suggestion_service.get_history(session_id)
+    if not history:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # A summary of truncated turns is stored as a system note, not a chat message
+    messages = [ChatMessage(**message).dict() for message in history if message["role"] != "system"]
+    summary = next((message["content"] for message in history if message["role"] == "system"), None)
+    return APIResponse(
+        success=True,
+        message="Session retrieved successfully",
+        data={
+            "session_id": session_id,
+            "messages": messages,
+            "summary": summary,
+            "usage": openrouter_service.token_accountant.get_session_usage(session_id)
+        }
+    )
+
+
+@router.delete("/sessions/{session_id}", response_model=APIResponse)
+async def delete_session(session_id: str):
+    """Forget a session's conversation history."""
+    if session_store is None or not (await suggestion_service.get_history(session_id)):
+        raise HTTPException(status_code=404, detail="Session not found")
+    suggestion_service.forget_session(session_id)
+    return APIResponse(success=True, message="Session deleted successfully")
+
+
+@router.get("/suggestions/{suggestion_id}", response_model=APIResponse)
+async def get_suggestion(suggestion_id: str):
+    """Re-fetch a previously generated suggestion without calling the LLM."""
+    record = await suggestion_service.get_stored_suggestion(suggestion_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Suggestion not found")
+    return APIResponse(
+        success=True,
+        message="Suggestion retrieved successfully",
+        data=record
+    )
+
+
 @router.get("/config", response_model=APIResponse)
 async def get_config():
     """Retrieve current application configuration."""
@@ -158,6 +566,7 @@ async def get_config():
             "debug_mode": settings.debug,
             "openrouter_model": settings.openrouter_model,
             "openrouter_base_url": settings.openrouter_base_url,
+            "openrouter_structured_output": openrouter_service.get_structured_mode(),
             "allowed_origins": settings.allowed_origins,
             "log_level": settings.log_level
         }
@@ -179,11 +588,51 @@ async def get_config():
 async def get_stats():
     """Retrieve application statistics."""
     try:
+        total_requests = SUGGEST_REQUESTS.value
+        fallbacks = metrics.counter("suggest_fallback_total").value
+        latency = SUGGEST_LATENCY.summary()
+        
         stats_data = {
-            "total_requests": 0,  # Placeholder
-            "successful_requests": 0,  # Placeholder
-            "failed_requests": 0,  # Placeholder
-            "average_response_time_ms": 0,  # Placeholder
+            "total_requests": total_requests,
+            "successful_requests": total_requests - SUGGEST_FAILURES.value,
+            "failed_requests": SUGGEST_FAILURES.value,
+            "fallback_responses": fallbacks,
+            "fallback_rate": round(fallbacks / total_requests, 4) if total_requests else 0.0,
+            "average_response_time_ms": latency["avg"] or 0,
+            "latency_ms": {
+                "total": latency,
+                **{
+                    stage: metrics.histogram("suggest_stage_duration_ms", labels={"stage": stage}).summary()
+                    for stage in SUGGEST_STAGES
+                }
+            },
+            "upstream_pool": openrouter_service.get_pool_stats(),
+            "upstream_resilience": openrouter_service.get_resilience_stats(),
+            "upstream_admission": openrouter_service.get_admission_stats(),
+            "hedging": openrouter_service.get_hedging_stats(),
+            "upstreams": openrouter_service.get_upstream_stats(),
+            "tokens": openrouter_service.get_token_stats(),
+            "prompt_templates": PromptService.get_token_report(),
+            "cache": suggestion_cache.get_stats() if suggestion_cache else {"enabled": False},
+            "coalescing": request_coalescer.get_stats() if request_coalescer else {"enabled": False},
+            "sessions": session_store.get_stats() if session_store else {"enabled": False},
+            "storage": storage.get_stats() if storage else {"enabled": False},
+            "journal": journal.get_stats() if journal else {"enabled": False},
+            "jobs": job_queue.get_stats(),
+            "logging": get_log_stats(),
+            "websocket": ChatConnection.get_stats(),
+            "batch": {
+                "items": BATCH_ITEMS.value,
+                "deduplicated": BATCH_DEDUPLICATED.value,
+                "latency_ms": BATCH_LATENCY.summary()
+            },
+            "suggestion_reads": suggestion_service.suggestion_reads.get_stats(),
+            "json_repair": JSONRepair.get_stats(),
+            "structured_output": {
+                **openrouter_service.get_structured_output_stats(),
+                **JSONParser.get_parse_stats()
+            },
+            "tracing": tracer.get_stats(),
             "last_updated": time.time()
         }
         return APIResponse(
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import os
 
 
@@ -18,9 +18,144 @@ class Settings(BaseSettings):
     openrouter_model: str = "meta-llama/llama-4-scout:free"
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
     openrouter_timeout: int = 30
+    # Structured output: "off" (schema in prompt), "json_schema" (response_format) or "tool"
+    openrouter_structured_output: str = "off"
     
-    # Logging
+    # Upstream key/endpoint pool: comma-separated "api_key[@base_url]" entries. Empty means the
+    # single openrouter_api_key / openrouter_base_url pair
+    openrouter_upstreams: str = ""
+    upstream_ewma_alpha: float = 0.3
+    upstream_cooldown_seconds: float = 5.0
+    
+    # Upstream connection pool
+    openrouter_max_connections: int = 100
+    openrouter_max_keepalive_connections: int = 20
+    openrouter_keepalive_expiry: float = 30.0
+    openrouter_http2: bool = False
+    
+    # Upstream retries (full-jitter backoff, bounded by a retry budget) and circuit breaker
+    openrouter_max_retries: int = 2
+    openrouter_retry_base_delay: float = 0.5
+    openrouter_retry_max_delay: float = 8.0
+    openrouter_retry_statuses: str = "408,429,500,502,503,504"
+    openrouter_retry_budget_ratio: float = 0.2
+    openrouter_retry_budget_min_per_second: float = 1.0
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_recovery_seconds: float = 30.0
+    circuit_breaker_half_open_max_calls: int = 1
+    
+    # Upstream admission control (0 disables a limit; free-tier OpenRouter models allow 20 RPM).
+    # RPM/TPM limits are per API key and scale with the number of distinct keys in the pool
+    upstream_max_concurrency: int = 8
+    upstream_rpm_limit: int = 20
+    upstream_tpm_limit: int = 0
+    upstream_max_queue: int = 100
+    upstream_max_queue_wait_seconds: float = 10.0
+    
+    # Token accounting: usage per model, session and minute, priced from token_prices
+    # ("model=prompt:completion" in USD per million tokens, "*" for unlisted models). Budgets
+    # (0 disables) are checked before each upstream call and rejected with 429 once used up.
+    token_prices: str = ""
+    token_session_budget: int = 0
+    token_global_budget: int = 0
+    token_budget_window_seconds: int = 3600
+    token_max_tracked_sessions: int = 100000
+    
+    # Hedged requests: after the hedge percentile of recent latency, race a second request
+    # (to the first fallback model, if any). Fallback models are also tried in order on errors.
+    hedging_enabled: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_delay_ms: float = 500.0
+    hedge_min_samples: int = 20
+    hedge_budget_ratio: float = 0.1
+    # Fraction of hedge wins whose primary is left running to measure the latency saved
+    hedge_measure_ratio: float = 0.1
+    openrouter_fallback_models: str = ""
+    
+    # Suggestion cache
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 3600
+    cache_disk_path: Optional[str] = None
+    cache_disk_max_entries: int = 10000
+    
+    # Single-flight coalescing of identical in-flight requests
+    coalescing_enabled: bool = True
+    
+    # Batch suggestions: items per request and concurrent upstream calls per batch
+    batch_max_items: int = 50
+    batch_max_concurrency: int = 8
+    # Single-meal regenerations a meal plan may spend to meet its daily targets
+    meal_plan_max_regenerations: int = 10
+    
+    # Asynchronous suggestion jobs: worker pool, bounded queue and result TTL.
+    # Callbacks are only sent to the http(s) hosts in job_callback_allowed_hosts; none when it is empty.
+    job_workers: int = 4
+    job_max_queue: int = 1000
+    job_result_ttl_seconds: int = 600
+    job_callback_timeout_seconds: float = 5.0
+    job_callback_allowed_hosts: str = ""
+    
+    # WebSocket chat: in-flight requests and queued outbound frames per connection, idle timeout
+    ws_max_in_flight: int = 4
+    ws_send_queue_size: int = 64
+    ws_idle_timeout_seconds: float = 300.0
+    
+    # Multi-turn sessions: history per session_id, evicted by LRU, TTL and a global memory cap.
+    # Turns beyond the token budget are dropped from the prompt and kept only as a short summary.
+    session_enabled: bool = True
+    session_max_sessions: int = 200000
+    session_ttl_seconds: int = 1800
+    session_max_turns: int = 20
+    session_max_memory_mb: float = 256.0
+    session_history_token_budget: int = 1024
+    
+    # Persistent storage for sessions and generated suggestions: "sqlite", "memory" or "none".
+    # SQLite runs in WAL mode; writes are batched by a background thread.
+    storage_backend: str = "sqlite"
+    storage_sqlite_path: str = "data/cogfree.db"
+    storage_flush_interval_seconds: float = 0.5
+    storage_batch_size: int = 500
+    storage_compaction_interval_seconds: float = 300.0
+    storage_max_write_attempts: int = 3
+    suggestion_retention_seconds: int = 604800
+    suggestion_read_cache_entries: int = 1024
+    
+    # Journal of suggestion requests, with prompt, usage, latency and raw completion for upstream
+    # calls, for offline replay. Appended by a background writer; gzipped past journal_max_file_mb.
+    journal_enabled: bool = True
+    journal_dir: str = "data/journal"
+    journal_max_file_mb: float = 64.0
+    journal_max_files: int = 20
+    journal_flush_interval_seconds: float = 1.0
+    
+    # Background upstream health monitor (probe URL defaults to {openrouter_base_url}/models)
+    health_check_enabled: bool = True
+    health_check_interval_seconds: float = 15.0
+    health_check_timeout_seconds: float = 5.0
+    health_check_window: int = 20
+    health_check_url: Optional[str] = None
+    
+    # Request tracing: sampled requests get a Server-Timing header; a fraction of those are exported
+    tracing_enabled: bool = True
+    tracing_sample_rate: float = 1.0
+    tracing_export_sample_rate: float = 0.01
+    tracing_export_path: Optional[str] = None
+    
+    # Logging: records go through a background writer thread. The console gets text at log_level;
+    # log_file gets JSON lines with request ids and rolls over by size. Hot-path INFO events are
+    # sampled per event ("event=rate,..."), every message type is rate limited, and messages are
+    # capped at log_max_message_chars.
     log_level: str = "INFO"
+    log_json_stdout: bool = False
+    log_file: Optional[str] = "logs/app.log"
+    log_file_level: str = "INFO"
+    log_file_max_mb: float = 50.0
+    log_file_backups: int = 10
+    log_sample_rates: str = "upstream.request=0.1,upstream.response=0.1,parse.success=0.1,cache.hit=0.1,coalesce.hit=0.1"
+    log_rate_limit_per_second: float = 50.0
+    log_max_message_chars: int = 2000
+    log_max_queue: int = 10000
     
     @property
     def allowed_origins(self) -> List[str]:
@@ -28,6 +163,42 @@ class Settings(BaseSettings):
         origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:3001")
         return [origin.strip() for origin in origins.split(",")]
     
+    @property
+    def openrouter_retry_status_codes(self) -> List[int]:
+        """Parse the comma-separated retryable status codes."""
+        return [int(code) for code in self.openrouter_retry_statuses.split(",") if code.strip()]
+    
+    @property
+    def job_callback_allowed_host_list(self) -> List[str]:
+        """Parse the comma-separated job callback host allowlist."""
+        return [host.strip() for host in self.job_callback_allowed_hosts.split(",") if host.strip()]
+    
+    @property
+    def log_sample_rate_map(self) -> Dict[str, float]:
+        """Parse the comma-separated event=rate log sampling rates."""
+        rates = {}
+        for item in self.log_sample_rates.split(","):
+            if "=" in item:
+                event, rate = item.split("=", 1)
+                rates[event.strip()] = float(rate)
+        return rates
+    
+    @property
+    def token_price_table(self) -> Dict[str, Tuple[float, float]]:
+        """Parse the comma-separated model=prompt:completion token prices."""
+        prices = {}
+        for item in self.token_prices.split(","):
+            if "=" in item:
+                model, price = item.rsplit("=", 1)
+                prompt_price, completion_price = price.split(":")
+                prices[model.strip()] = (float(prompt_price), float(completion_price))
+        return prices
+    
+    @property
+    def openrouter_fallback_model_list(self) -> List[str]:
+        """Parse the comma-separated, ordered fallback models."""
+        return [model.strip() for model in self.openrouter_fallback_models.split(",") if model.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -0,0 +1,345 @@
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+import zlib
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+from app.core.metrics import metrics
+from loguru import logger
+
+
+_STOP = object()
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+_current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    """The id RequestIdMiddleware assigned to the request being handled, if any."""
+    return _current_request_id.get()
+
+
+def format_json(record: Dict[str, Any]) -> str:
+    """One JSON object per line; extra fields such as request_id and event sit at the top level."""
+    entry = {
+        "time": record["time"].isoformat(timespec="milliseconds"),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **record["extra"]
+    }
+    if record["exception"] is not None:
+        entry["exception"] = _format_exception(record)
+    return json.dumps(entry, default=str, ensure_ascii=False) + "\n"
+
+
+def format_text(record: Dict[str, Any]) -> str:
+    """Human-readable line for the console."""
+    line = (
+        f"{record['time']:%Y-%m-%d %H:%M:%S} | {record['level'].name: <8} | {record['extra'].get('request_id', '-')} | "
+        f"{record['name']}:{record['function']}:{record['line']} - {record['message']}"
+    )
+    if record["extra"].get("suppressed"):
+        line += f" ({record['extra']['suppressed']} similar messages suppressed)"
+    if record["exception"] is not None:
+        line += "\n" + _format_exception(record).rstrip("\n")
+    return line + "\n"
+
+
+def _format_exception(record: Dict[str, Any]) -> str:
+    error_type, value, tb = record["exception"]
+    return "".join(traceback.format_exception(error_type, value, tb))
+
+
+class RotatingFile:
+    """Append-only file that rolls over to path.1 ... path.N once it passes max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def write(self, data: str) -> None:
+        self._file.write(data)
+        self._size += len(data)
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+
+class LogOutput:
+    """A destination for log records: a stream or file (None for the current sys.stdout), a minimum level and a formatter."""
+
+    def __init__(self, target, level: str, formatter: Callable[[Dict[str, Any]], str]):
+        self.target = target
+        self.level_no = logger.level(level).no
+        self.formatter = formatter
+
+
+class BackgroundSink:
+    """
+    Loguru sink that hands records to a writer thread.
+
+    The calling thread only puts the record on a bounded queue; formatting, JSON encoding
+    and disk I/O happen in the writer. Loguru's own enqueue=True pickles every record
+    through a multiprocessing pipe, which costs more than the synchronous write it replaces.
+    """
+
+    def __init__(self, outputs: List[LogOutput], max_queue: int = 10000, batch_size: int = 256):
+        self.outputs = outputs
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        try:
+            self._queue.put_nowait(message.record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Write out queued records and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(record is _STOP for record in batch)
+            self._write([record for record in batch if record is not _STOP])
+            if stopping:
+                for output in self.outputs:
+                    if isinstance(output.target, RotatingFile):
+                        output.target.close()
+                return
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        for output in self.outputs:
+            try:
+                data = "".join(output.formatter(record) for record in records if record["level"].no >= output.level_no)
+                if data:
+                    target = output.target or sys.stdout
+                    target.write(data)
+                    target.flush()
+            except Exception as e:
+                self.write_errors += len(records)
+                print(f"Log write failed: {e!r}", file=sys.stderr)
+        self.written += len(records)
+
+
+class LogFilter:
+    """
+    Decides on the calling thread which records reach the sink.
+
+    Records logged with an event= field are sampled at that event's rate. The draw is a hash
+    of the request id, so a sampled request keeps all of its events at the same rate. Every
+    message type (the event, or else the call site) is rate limited with a token bucket;
+    the next record let through reports how many were suppressed. Messages longer than
+    max_message_chars are cut, so a raw upstream error body cannot flood the disk.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None, rate_limit_per_second: float = 50.0,
+                 max_message_chars: int = 2000):
+        self.sample_rates = sample_rates or {}
+        self.rate_limit_per_second = rate_limit_per_second
+        self.burst = max(1.0, rate_limit_per_second)
+        self.max_message_chars = max_message_chars
+        # message type -> [tokens, last refill, suppressed since last emitted]
+        self._buckets: Dict[Any, List[float]] = {}
+
+        self.sampled_out = 0
+        self.rate_limited = 0
+        self.truncated = 0
+
+    def __call__(self, record: Dict[str, Any]) -> bool:
+        extra = record["extra"]
+        event = extra.get("event")
+        if event is not None:
+            rate = self.sample_rates.get(event, 1.0)
+            if rate < 1.0:
+                request_id = extra.get("request_id")
+                draw = zlib.crc32(request_id.encode("utf-8")) % 10000 / 10000 if request_id else random.random()
+                if draw >= rate:
+                    self.sampled_out += 1
+                    return False
+
+        if self.rate_limit_per_second > 0:
+            key: Tuple[Any, ...] = (event,) if event is not None else (record["name"], record["line"])
+            now = time.monotonic()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_limit_per_second)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                bucket[2] += 1
+                self.rate_limited += 1
+                return False
+            bucket[0] = tokens - 1.0
+            if bucket[2]:
+                extra["suppressed"] = int(bucket[2])
+                bucket[2] = 0
+
+        message = record["message"]
+        if self.max_message_chars and len(message) > self.max_message_chars:
+            record["message"] = f"{message[:self.max_message_chars]}... [{len(message) - self.max_message_chars} chars truncated]"
+            self.truncated += 1
+        return True
+
+
+class RequestIdMiddleware:
+    """ASGI middleware that tags every log record of a request with its id and returns it as X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                # Only trust ids that are safe to echo back and write into logs
+                if _REQUEST_ID_RE.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or str(uuid.uuid4())
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        token = _current_request_id.set(request_id)
+        try:
+            with logger.contextualize(request_id=request_id):
+                await self.app(scope, receive, send_with_request_id)
+        finally:
+            _current_request_id.reset(token)
+
+
+class LogPipeline:
+    """The installed filter and sink, kept for statistics and shutdown."""
+
+    def __init__(self, log_filter: LogFilter, sink: BackgroundSink, handler_id: int):
+        self.filter = log_filter
+        self.sink = sink
+        self.handler_id = handler_id
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Detach from loguru and write out queued records."""
+        try:
+            logger.remove(self.handler_id)
+        except ValueError:
+            # Already removed, e.g. by a bare logger.remove()
+            pass
+        self.sink.stop(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.sink._queue.qsize(),
+            "written": self.sink.written,
+            "dropped": self.sink.dropped,
+            "write_errors": self.sink.write_errors,
+            "sampled_out": self.filter.sampled_out,
+            "rate_limited": self.filter.rate_limited,
+            "truncated": self.filter.truncated
+        }
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def setup_logging(settings, stream: Optional[TextIO] = None) -> LogPipeline:
+    """
+    Replace loguru's default handler with the background pipeline.
+
+    The console gets text at settings.log_level (JSON with log_json_stdout); log_file, if
+    set, gets JSON lines at log_file_level and rolls over by size.
+    """
+    global _pipeline
+    logger.remove()
+    if _pipeline is not None:
+        _pipeline.stop()
+
+    outputs = [LogOutput(stream, settings.log_level, format_json if settings.log_json_stdout else format_text)]
+    if settings.log_file:
+        target = RotatingFile(settings.log_file, int(settings.log_file_max_mb * 1024 * 1024), settings.log_file_backups)
+        outputs.append(LogOutput(target, settings.log_file_level, format_json))
+
+    log_filter = LogFilter(
+        sample_rates=settings.log_sample_rate_map,
+        rate_limit_per_second=settings.log_rate_limit_per_second,
+        max_message_chars=settings.log_max_message_chars
+    )
+    sink = BackgroundSink(outputs, max_queue=settings.log_max_queue)
+    handler_id = logger.add(
+        sink,
+        level=min(output.level_no for output in outputs),
+        filter=log_filter,
+        # The sink formats records itself; a callable format keeps loguru from appending tracebacks
+        format=lambda record: "{message}",
+        backtrace=False,
+        diagnose=False,
+        catch=True
+    )
+    _pipeline = LogPipeline(log_filter, sink, handler_id)
+    atexit.register(_pipeline.sink.stop)
+    metrics.register_collector("logging", get_log_stats)
+    return _pipeline
+
+
+def get_log_stats() -> Dict[str, Any]:
+    """Get queue, sampling and rate limiting counts for the installed pipeline."""
+    if _pipeline is None:
+        return {"enabled": False}
+    return _pipeline.get_stats()
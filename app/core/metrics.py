@@ -0,0 +1,226 @@
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _latency_buckets_ms() -> Tuple[float, ...]:
+    """Geometric bucket bounds from 10 microseconds to two minutes (x1.5 per bucket)."""
+    bounds = []
+    bound = 0.01
+    while bound < 120000:
+        bounds.append(round(bound, 4))
+        bound *= 1.5
+    return tuple(bounds)
+
+
+DEFAULT_LATENCY_BUCKETS_MS = _latency_buckets_ms()
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter.
+
+    No lock is taken on the hot path, so each metric must have a single writer thread.
+    Most are updated on the event loop thread. A few, such as the storage and journal
+    flush histograms, are updated only by their background writer thread. Those metrics
+    are created up front on the loop thread, because the registry is not locked either.
+    Readers on other threads (collection, rendering) may see a torn snapshot. For
+    example, a histogram's count may include an observation its buckets do not yet.
+    """
+
+    __slots__ = ("name", "help", "labels", "value")
+
+    def __init__(self, name: str, help: str, labels: LabelKey = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three additions (single writer, see Counter)."""
+
+    __slots__ = ("name", "help", "labels", "buckets", "counts", "sum", "count")
+
+    def __init__(self, name: str, help: str, labels: LabelKey = (), buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # One extra slot for observations above the largest bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        """Context manager that observes the elapsed time in milliseconds."""
+        return _Timer(self)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate the q-th percentile (0-100) by interpolating within its bucket."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return round(lower + (upper - lower) * (rank - cumulative) / bucket_count, 3)
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+class MetricsRegistry:
+    """In-process registry of counters, gauges, histograms and stats collectors."""
+
+    def __init__(self, namespace: str = "meal_suggestor"):
+        self.namespace = namespace
+        self._metrics: Dict[Tuple[str, LabelKey], Any] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def _get_or_create(self, cls, name: str, help: str, labels: Optional[Dict[str, str]], **kwargs):
+        key = (name, _label_key(labels))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = cls(name, help, key[1], **kwargs)
+            self._metrics[key] = metric
+        return metric
+
+    def counter(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None,
+                  buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Register a callable whose numeric stats are exported as gauges at scrape time."""
+        self._collectors[name] = collector
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Run all registered collectors."""
+        return {name: collector() for name, collector in self._collectors.items()}
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        # family name -> (type, help, samples); a family's samples must be written together
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        # Sample names already taken, including the _bucket/_sum/_count series of histograms
+        series_names = set()
+
+        for metric in self._metrics.values():
+            full_name = f"{self.namespace}_{metric.name}"
+            if full_name not in families:
+                kind = "histogram" if isinstance(metric, Histogram) else (
+                    "gauge" if isinstance(metric, Gauge) else "counter"
+                )
+                families[full_name] = (kind, metric.help, [])
+            samples = families[full_name][2]
+
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, metric.counts):
+                    cumulative += bucket_count
+                    samples.append(f"{full_name}_bucket{_format_labels(metric.labels, ('le', str(bound)))} {cumulative}")
+                samples.append(f"{full_name}_bucket{_format_labels(metric.labels, ('le', '+Inf'))} {metric.count}")
+                samples.append(f"{full_name}_sum{_format_labels(metric.labels)} {metric.sum}")
+                samples.append(f"{full_name}_count{_format_labels(metric.labels)} {metric.count}")
+                series_names.update((full_name, f"{full_name}_bucket", f"{full_name}_sum", f"{full_name}_count"))
+            else:
+                samples.append(f"{full_name}{_format_labels(metric.labels)} {metric.value}")
+                series_names.add(full_name)
+
+        for collector_name, stats in self.collect().items():
+            for key, value in _flatten(stats):
+                full_name = f"{self.namespace}_{collector_name}_{key}"
+                # A registered metric already exports this series; a second copy would break the scrape
+                if full_name in series_names:
+                    continue
+                series_names.add(full_name)
+                families[full_name] = ("gauge", "", [f"{full_name} {value}"])
+
+        lines: List[str] = []
+        for full_name, (kind, help, samples) in families.items():
+            if help:
+                lines.append(f"# HELP {full_name} {help}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(stats: Dict[str, Any], prefix: str = ""):
+    """Yield (name, value) for numeric leaves of a nested stats dict."""
+    for key, value in stats.items():
+        name = f"{prefix}{key}".replace("-", "_").replace(".", "_").replace("/", "_").replace(":", "_")
+        if isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+        elif isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
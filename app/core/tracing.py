@@ -0,0 +1,226 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from loguru import logger
+
+
+class Span:
+    """A timed operation within a traced request."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attributes", "start", "start_wall", "duration_ms", "_token")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.duration_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_wall = time.time()
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP-style span record, one per line in the exporter file."""
+        start_ns = int(self.start_wall * 1e9)
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": start_ns,
+            "endTimeUnixNano": start_ns + int((self.duration_ms or 0) * 1e6),
+            "durationMs": round(self.duration_ms or 0, 3),
+            "attributes": self.attributes
+        }
+
+
+class Trace:
+    """All spans recorded for one sampled request."""
+
+    __slots__ = ("trace_id", "spans", "export")
+
+    def __init__(self, export: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List[Span] = []
+        self.export = export
+
+    def server_timing(self) -> str:
+        """Render finished spans as a Server-Timing header value."""
+        return ", ".join(
+            f"{span.name};dur={span.duration_ms:.2f}" for span in self.spans if span.duration_ms is not None
+        )
+
+
+class _NoopSpan:
+    """Returned when the current request is not sampled; costs one contextvar lookup."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+class SpanExporter:
+    """Append finished traces to a JSONL file from a background thread."""
+
+    def __init__(self, path: str, max_queue: int = 10000):
+        self.path = path
+        self._queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, trace: Trace) -> None:
+        """Queue a trace for writing; never blocks the event loop."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait([span.to_dict() for span in trace.spans])
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty() and len(batch) < 100:
+                batch.append(self._queue.get_nowait())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for spans in batch:
+                        f.writelines(json.dumps(span, default=str) + "\n" for span in spans)
+                self.exported += len(batch)
+            except OSError as e:
+                self.dropped += len(batch)
+                logger.warning(f"Span export to {self.path} failed: {str(e)}")
+
+
+class Tracer:
+    """Entry point for request tracing; spans are no-ops outside a sampled request."""
+
+    def __init__(self, enabled: bool, sample_rate: float, export_sample_rate: float,
+                 export_path: Optional[str] = None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.export_sample_rate = export_sample_rate
+        self.exporter = SpanExporter(export_path) if export_path else None
+
+        self.sampled = 0
+        self.skipped = 0
+
+    def start_trace(self) -> Optional[Trace]:
+        """Make the sampling decision for a new request."""
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            self.skipped += 1
+            return None
+        self.sampled += 1
+        export = self.exporter is not None and random.random() < self.export_sample_rate
+        return Trace(export=export)
+
+    def span(self, name: str, **attributes):
+        """Open a child span of the current span, if the request is sampled."""
+        trace = _current_trace.get()
+        if trace is None:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        return Span(trace, name, parent.span_id if parent else None, attributes)
+
+    def finish_trace(self, trace: Trace) -> None:
+        if trace.export:
+            self.exporter.export(trace)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "export_sample_rate": self.export_sample_rate if self.exporter else 0.0,
+            "sampled_requests": self.sampled,
+            "unsampled_requests": self.skipped,
+            "exported_traces": self.exporter.exported if self.exporter else 0,
+            "dropped_traces": self.exporter.dropped if self.exporter else 0
+        }
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a root span per HTTP request and sets Server-Timing."""
+
+    def __init__(self, app, tracer: "Tracer"):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = self.tracer.start_trace()
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace_token = _current_trace.set(trace)
+        root = Span(trace, "total", None, {"http.method": scope["method"], "http.route": scope["path"]})
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                # Child spans finished so far; the root span is still open
+                elapsed_ms = (time.perf_counter() - root.start) * 1000
+                timing = trace.server_timing()
+                timing = f"{timing}, total;dur={elapsed_ms:.2f}" if timing else f"total;dur={elapsed_ms:.2f}"
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", timing.encode("latin-1")),
+                    (b"x-trace-id", trace.trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(trace_token)
+            self.tracer.finish_trace(trace)
+
+
+# Global tracer
+tracer = Tracer(
+    enabled=settings.tracing_enabled,
+    sample_rate=settings.tracing_sample_rate,
+    export_sample_rate=settings.tracing_export_sample_rate,
+    export_path=settings.tracing_export_path
+)
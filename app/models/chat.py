@@ -16,6 +16,16 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
 
 
+class JobRequest(ChatRequest):
+    """Request model for queueing a meal suggestion as an asynchronous job."""
+    callback_url: Optional[str] = Field(None, max_length=2048)
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for generating several meal suggestions at once."""
+    items: List[ChatRequest] = Field(..., min_length=1)
+
+
 class MealSuggestion(BaseModel):
     """Meal suggestion model."""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -33,12 +43,18 @@ class OpenRouterCompletionResponse(BaseModel):
     model: str
     usage: dict
     choices: List[dict]
+    # Structured output mode the completion was requested with, None for prompt-only
+    structured_output: Optional[str] = None
     
     @property
     def content(self) -> str:
-        """Extracts the content from the first choice."""
+        """Extracts the content from the first choice, or its tool call arguments."""
         if self.choices and len(self.choices) > 0:
-            return self.choices[0].get("message", {}).get("content", "")
+            message = self.choices[0].get("message", {})
+            content = message.get("content") or ""
+            if not content and message.get("tool_calls"):
+                return message["tool_calls"][0].get("function", {}).get("arguments", "")
+            return content
         return ""
     
     @property
@@ -71,6 +87,43 @@ class StructuredMealSuggestion(BaseModel):
     fat_per_serving: str
 
 
+class NutritionTargets(BaseModel):
+    """Daily nutrition targets for a meal plan; unset values are not optimized."""
+    calories: Optional[float] = Field(None, gt=0)
+    protein_g: Optional[float] = Field(None, gt=0)
+    carbs_g: Optional[float] = Field(None, gt=0)
+    fat_g: Optional[float] = Field(None, gt=0)
+
+
+class MealPlanRequest(BaseModel):
+    """Request model for generating a multi-day meal plan."""
+    preferences: str = Field(..., min_length=1, max_length=500)
+    days: int = Field(7, ge=1, le=14)
+    meals: List[str] = Field(default_factory=lambda: ["breakfast", "lunch", "dinner"], min_length=1, max_length=6)
+    targets: Optional[NutritionTargets] = None
+    # Relative deviation from each daily target that counts as on target
+    tolerance: float = Field(0.1, gt=0, le=1)
+
+
+class CachedSuggestion(BaseModel):
+    """Parsed meal suggestion stored in the suggestion cache."""
+    suggestion: StructuredMealSuggestion
+    suggestion_id: str
+    timestamp: datetime
+    model: str
+
+
+class SuggestionResult(BaseModel):
+    """Outcome of resolving a meal suggestion through cache and upstream."""
+    suggestion: StructuredMealSuggestion
+    suggestion_id: str
+    timestamp: datetime
+    structured: bool = True
+    cached: bool = False
+    coalesced: bool = False
+    raw_content: Optional[str] = None
+
+
 class APIResponse(BaseModel):
     """Standard API response format."""
     success: bool
@@ -0,0 +1,199 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from app.core.metrics import metrics
+from loguru import logger
+
+
+class AdmissionRejected(Exception):
+    """Raised when an upstream call cannot be admitted before its deadline."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Upstream capacity exhausted ({reason}), retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at limit_per_minute / 60 per second."""
+
+    def __init__(self, limit_per_minute: int):
+        self.capacity = float(limit_per_minute)
+        self.rate = limit_per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available."""
+        self._refill()
+        deficit = amount - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def consume(self, amount: float) -> None:
+        """Take tokens; the balance may go negative to reserve capacity that is still refilling."""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdmissionTicket:
+    """Handle for an admitted call, used to settle the token estimate against actual usage."""
+
+    __slots__ = ("controller", "estimated_tokens")
+
+    def __init__(self, controller: "AdmissionController", estimated_tokens: int):
+        self.controller = controller
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        bucket = self.controller.tpm_bucket
+        if bucket is None or not actual_tokens:
+            return
+        difference = self.estimated_tokens - actual_tokens
+        if difference > 0:
+            bucket.refund(difference)
+        elif difference < 0:
+            bucket.consume(-difference)
+        self.estimated_tokens = actual_tokens
+
+
+class AdmissionController:
+    """Concurrency cap, RPM/TPM token buckets and a bounded, deadline-aware wait queue."""
+
+    def __init__(self, max_concurrency: int, rpm_limit: int, tpm_limit: int,
+                 max_queue: int, max_wait_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.rpm_bucket = TokenBucket(rpm_limit) if rpm_limit > 0 else None
+        self.tpm_bucket = TokenBucket(tpm_limit) if tpm_limit > 0 else None
+
+        self._waiting = 0
+        self._in_flight = 0
+        # Moving average of how long admitted calls hold a slot, for Retry-After estimates
+        self._avg_hold_seconds = 1.0
+
+        self._queue_depth = metrics.gauge("upstream_admission_queue_depth", "Calls waiting for upstream admission")
+        self._in_flight_gauge = metrics.gauge("upstream_admission_in_flight", "Admitted upstream calls in flight")
+        self._wait_ms = metrics.histogram("upstream_admission_wait_ms", "Time spent waiting for upstream admission")
+        self._admitted = metrics.counter("upstream_admission_admitted_total", "Upstream calls admitted")
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        metrics.counter("upstream_admission_rejected_total", "Upstream calls shed by admission control", {"reason": reason}).inc()
+        logger.warning(f"Shedding upstream call ({reason}); queue={self._waiting}, in_flight={self._in_flight}")
+        return AdmissionRejected(reason, max(1.0, math.ceil(retry_after)))
+
+    def _estimated_drain_seconds(self) -> float:
+        slots = self.max_concurrency if self.max_concurrency > 0 else 1
+        return self._avg_hold_seconds * (self._waiting + 1) / slots
+
+    def _rate_wait(self, tokens: int) -> float:
+        wait = 0.0
+        if self.rpm_bucket:
+            wait = self.rpm_bucket.wait_time(1)
+        if self.tpm_bucket and tokens:
+            wait = max(wait, self.tpm_bucket.wait_time(tokens))
+        return wait
+
+    async def _acquire(self, tokens: int) -> None:
+        slot_free = self._semaphore is None or not self._semaphore.locked()
+        if not slot_free and self._waiting >= self.max_queue:
+            raise self._reject("queue_full", self._estimated_drain_seconds())
+
+        start = time.monotonic()
+        deadline = start + self.max_wait_seconds
+        self._waiting += 1
+        self._queue_depth.set(self._waiting)
+        try:
+            if self._semaphore is not None:
+                if slot_free:
+                    # Does not suspend while a slot is free
+                    await self._semaphore.acquire()
+                else:
+                    try:
+                        await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_seconds)
+                    except asyncio.TimeoutError:
+                        raise self._reject("queue_timeout", self._estimated_drain_seconds())
+
+            try:
+                wait = self._rate_wait(tokens)
+                if time.monotonic() + wait > deadline:
+                    raise self._reject("rate_limited", wait)
+                # Reserve now so later callers queue behind this one
+                if self.rpm_bucket:
+                    self.rpm_bucket.consume(1)
+                if self.tpm_bucket and tokens:
+                    self.tpm_bucket.consume(tokens)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        finally:
+            self._waiting -= 1
+            self._queue_depth.set(self._waiting)
+
+        self._wait_ms.observe((time.monotonic() - start) * 1000)
+
+    @asynccontextmanager
+    async def admit(self, tokens: int = 0) -> AsyncIterator[AdmissionTicket]:
+        """
+        Wait for upstream capacity, or raise AdmissionRejected if it will not arrive in time.
+
+        Args:
+            tokens (int): Estimated tokens (prompt plus max completion) for the TPM limit
+
+        Yields:
+            AdmissionTicket: Ticket to settle with the actual token usage
+        """
+        await self._acquire(tokens)
+        self._admitted.inc()
+        self._in_flight += 1
+        self._in_flight_gauge.set(self._in_flight)
+        started = time.monotonic()
+        try:
+            yield AdmissionTicket(self, tokens)
+        finally:
+            self._in_flight -= 1
+            self._in_flight_gauge.set(self._in_flight)
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * (time.monotonic() - started)
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and rejection statistics."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait_seconds,
+            "admitted": self._admitted.value,
+            "rejected": {
+                reason: metrics.counter("upstream_admission_rejected_total", labels={"reason": reason}).value
+                for reason in ("queue_full", "queue_timeout", "rate_limited")
+            },
+            "wait_ms": self._wait_ms.summary(),
+            "rpm_tokens_available": round(self.rpm_bucket.tokens, 2) if self.rpm_bucket else None,
+            "tpm_tokens_available": round(self.tpm_bucket.tokens, 2) if self.tpm_bucket else None
+        }
+
+    def get_collector_stats(self) -> Dict[str, Any]:
+        """Get the stats that the registered admission metrics do not already export."""
+        stats = self.get_stats()
+        return {
+            key: stats[key]
+            for key in ("max_concurrency", "max_queue", "max_wait_seconds", "rpm_tokens_available", "tpm_tokens_available")
+        }
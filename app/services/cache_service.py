@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.models.chat import CachedSuggestion
+from loguru import logger
+
+
+class TTLLRUCache:
+    """In-memory LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries when full."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class SuggestionCache:
+    """
+    Two-tier cache of parsed meal suggestions: in-memory LRU plus optional disk tier.
+
+    The disk tier holds at most disk_max_entries files. Every file is written with the same
+    TTL, so its mtime tells when it expires. A sweep removes expired files and then the
+    oldest by mtime. It runs on write once the tier is over its cap, and at most every
+    disk_sweep_seconds otherwise.
+    """
+
+    _WHITESPACE_RE = re.compile(r"\s+")
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, disk_path: Optional[str] = None,
+                 disk_max_entries: int = 10000, disk_sweep_seconds: float = 300):
+        self.memory = TTLLRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self.disk_sweep_seconds = disk_sweep_seconds
+
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_errors = 0
+        self.disk_evictions = 0
+        self.disk_expirations = 0
+
+        # Writes run in worker threads; the lock keeps the entry count and sweeps consistent
+        self._disk_lock = threading.Lock()
+        self._disk_entries = 0
+        self._last_sweep = 0.0
+
+        if self.disk_path:
+            os.makedirs(self.disk_path, exist_ok=True)
+            self._sweep_disk()
+
+    @classmethod
+    def normalize_message(cls, message: str) -> str:
+        """Normalize a user message so trivially different prompts share a key."""
+        normalized = cls._WHITESPACE_RE.sub(" ", message.strip().lower())
+        return normalized.rstrip(".!?").strip()
+
+    @classmethod
+    def make_key(cls, message: str, model: str, prompt_version: str) -> str:
+        """Build a cache key from normalized message, model and prompt version."""
+        raw = f"{model}\x00{prompt_version}\x00{cls.normalize_message(message)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedSuggestion]:
+        """Look up a suggestion in memory first, then on disk."""
+        entry = self.memory.get(key)
+        if entry is not None or not self.disk_path:
+            return entry
+
+        record = await asyncio.to_thread(self._read_disk, key)
+        if record is None:
+            self.disk_misses += 1
+            return None
+
+        expires_at, entry = record
+        self.disk_hits += 1
+        # Promote into memory for the remaining lifetime of the disk entry
+        self.memory.set(key, entry, ttl_seconds=max(expires_at - time.time(), 0))
+        return entry
+
+    async def set(self, key: str, entry: CachedSuggestion) -> None:
+        """Store a suggestion in memory and, when configured, on disk."""
+        self.memory.set(key, entry)
+        if self.disk_path:
+            await asyncio.to_thread(self._write_disk, key, entry)
+
+    def clear(self) -> None:
+        """Clear the in-memory tier."""
+        self.memory.clear()
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, CachedSuggestion]]:
+        path = self._disk_file(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.disk_errors += 1
+            logger.warning(f"Failed to read cache entry {key}: {str(e)}")
+            return None
+
+        expires_at = record.get("expires_at", 0)
+        if expires_at <= time.time():
+            if self._remove_disk_file(path):
+                with self._disk_lock:
+                    self._disk_entries -= 1
+                    self.disk_expirations += 1
+            return None
+
+        try:
+            return expires_at, CachedSuggestion(**record["entry"])
+        except Exception as e:
+            self.disk_errors += 1
+            logger.warning(f"Discarding invalid cache entry {key}: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, entry: CachedSuggestion) -> None:
+        path = self._disk_file(key)
+        tmp_path = f"{path}.tmp"
+        record = {
+            "expires_at": time.time() + self.ttl_seconds,
+            "entry": entry.model_dump(mode="json")
+        }
+        try:
+            is_new = not os.path.exists(path)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.disk_errors += 1
+            logger.warning(f"Failed to write cache entry {key}: {str(e)}")
+            return
+
+        with self._disk_lock:
+            if is_new:
+                self._disk_entries += 1
+            due = (self._disk_entries > self.disk_max_entries
+                   or time.monotonic() - self._last_sweep >= self.disk_sweep_seconds)
+        if due:
+            self._sweep_disk()
+
+    def _sweep_disk(self) -> None:
+        """Remove expired disk entries, then the oldest ones until the tier is within its cap."""
+        with self._disk_lock:
+            self._last_sweep = time.monotonic()
+            files = []
+            try:
+                with os.scandir(self.disk_path) as it:
+                    for item in it:
+                        if item.name.endswith(".json") and item.is_file():
+                            files.append((item.stat().st_mtime, item.path))
+            except OSError as e:
+                self.disk_errors += 1
+                logger.warning(f"Failed to scan cache directory {self.disk_path}: {str(e)}")
+                return
+
+            files.sort()
+            expired_before = time.time() - self.ttl_seconds
+            remaining = len(files)
+            for mtime, path in files:
+                if mtime > expired_before and remaining <= self.disk_max_entries:
+                    break
+                if self._remove_disk_file(path):
+                    if mtime <= expired_before:
+                        self.disk_expirations += 1
+                    else:
+                        self.disk_evictions += 1
+                remaining -= 1
+            self._disk_entries = remaining
+
+    def _remove_disk_file(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self.disk_errors += 1
+            logger.warning(f"Failed to remove cache file {path}: {str(e)}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for both tiers; hits and hit_ratio count either tier."""
+        stats = self.memory.get_stats()
+        # A disk hit was first counted as a memory miss
+        hits = self.memory.hits + self.disk_hits
+        misses = self.memory.misses - self.disk_hits
+        stats.update({
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "memory_hits": self.memory.hits,
+            "disk_enabled": bool(self.disk_path),
+            "disk_entries": self._disk_entries,
+            "disk_max_entries": self.disk_max_entries,
+            "disk_hits": self.disk_hits,
+            "disk_misses": self.disk_misses,
+            "disk_evictions": self.disk_evictions,
+            "disk_expirations": self.disk_expirations,
+            "disk_errors": self.disk_errors
+        })
+        return stats
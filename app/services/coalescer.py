@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from loguru import logger
+
+
+class RequestCoalescer:
+    """Single-flight coalescing of identical in-flight requests."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run factory() once per key, sharing its result with concurrent callers.
+
+        Args:
+            key (str): Identity of the request, e.g. a hash of the normalized upstream payload
+            factory (Callable[[], Awaitable[Any]]): Coroutine factory that performs the work
+
+        Returns:
+            Tuple[Any, bool]: The shared result and whether this caller joined an existing flight
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            logger.debug(f"Coalescing request onto in-flight upstream call {key[:12]}")
+            # Shield so one caller disconnecting does not cancel the shared call
+            return await asyncio.shield(future), True
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        self.leaders += 1
+        task.add_done_callback(lambda done: self._on_done(key, done))
+        return await asyncio.shield(task), False
+
+    def _on_done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an abandoned flight does not log "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters."""
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.leaders,
+            "coalesced_requests": self.coalesced,
+            "failed_flights": self.failures,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0
+        }
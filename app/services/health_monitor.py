@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from app.core.config import settings
+from loguru import logger
+
+# Captured at import, i.e. when the application process starts
+PROCESS_STARTED_AT = time.time()
+_PROCESS_STARTED_MONOTONIC = time.monotonic()
+
+
+class HealthMonitor:
+    """Probe the upstream API in the background and keep a rolling view of its health."""
+
+    def __init__(self, openrouter_service, interval_seconds: float, timeout_seconds: float,
+                 window: int, probe_url: Optional[str] = None):
+        self.openrouter_service = openrouter_service
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.probe_url = probe_url or f"{settings.openrouter_base_url.rstrip('/')}/models"
+
+        # (succeeded, latency_ms) for the most recent probes
+        self._probes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+        self.total_probes = 0
+        self.consecutive_failures = 0
+        self.last_checked: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        """Start the probe loop; the first probe runs immediately."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Health monitor started (url={self.probe_url}, interval={self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Cancel the probe loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Health monitor stopped")
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval_seconds)
+
+    async def probe(self) -> bool:
+        """Run one upstream probe and record the outcome."""
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await self.openrouter_service.client.get(self.probe_url, timeout=self.timeout_seconds)
+            if response.status_code != 200:
+                error = f"HTTP {response.status_code}"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        succeeded = error is None
+        self._probes.append((succeeded, latency_ms))
+        self.total_probes += 1
+        self.last_checked = time.time()
+        if succeeded:
+            self.consecutive_failures = 0
+            self.last_success = self.last_checked
+            self.last_error = None
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+            logger.warning(f"Upstream health probe failed ({self.consecutive_failures} in a row): {error}")
+        return succeeded
+
+    @property
+    def upstream_status(self) -> str:
+        """"unknown" before the first probe, else whether the latest probe succeeded."""
+        if not self._probes:
+            return "unknown"
+        return "connected" if self._probes[-1][0] else "unreachable"
+
+    @staticmethod
+    def uptime_seconds() -> float:
+        return time.monotonic() - _PROCESS_STARTED_MONOTONIC
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Get the cached upstream health; never performs I/O."""
+        probes = list(self._probes)
+        latencies = sorted(latency for _, latency in probes)
+        successes = sum(1 for succeeded, _ in probes if succeeded)
+        return {
+            "status": self.upstream_status,
+            "success_rate": round(successes / len(probes), 4) if probes else None,
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "max_latency_ms": round(latencies[-1], 2) if latencies else None,
+            "window": len(probes),
+            "total_probes": self.total_probes,
+            "consecutive_failures": self.consecutive_failures,
+            "last_checked": self.last_checked,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+            "probe_interval_seconds": self.interval_seconds,
+            "running": self._task is not None and not self._task.done()
+        }
@@ -0,0 +1,104 @@
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from app.core.metrics import metrics
+from app.services.resilience import RetryBudget
+
+
+class HedgePolicy:
+    """Decide when to send a hedged upstream request and track whether it pays off."""
+
+    def __init__(self, enabled: bool, percentile: float, min_delay_ms: float, min_samples: int,
+                 budget_ratio: float, fallback_models: List[str], measure_ratio: float = 0.1,
+                 window: int = 200):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.min_samples = min_samples
+        self.fallback_models = fallback_models
+        self.measure_ratio = measure_ratio
+        # Same rolling-ratio accounting as the retry budget, without a per-second floor
+        self.budget = RetryBudget(ratio=budget_ratio, min_retries_per_second=0)
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+        self._requests = metrics.counter("hedge_requests_total", "Suggestion calls eligible for hedging")
+        self._hedges = metrics.counter("hedge_sent_total", "Hedged upstream requests sent")
+        self._budget_exhausted = metrics.counter("hedge_budget_exhausted_total", "Hedges skipped by the hedge budget")
+        self._model_fallbacks = metrics.counter("hedge_model_fallbacks_total", "Calls retried on a fallback model after an error")
+        self._effective = metrics.histogram("hedge_effective_latency_ms", "Latency seen by callers with hedging")
+        # Counterfactual latency without hedging; for hedge wins only the sampled primaries that were
+        # left to finish are observed, each weighted by 1 / measure_ratio
+        self._unhedged = metrics.histogram("hedge_unhedged_latency_ms", "Estimated primary-only latency")
+
+    def record_request(self) -> None:
+        self._requests.inc()
+        self.budget.record_request()
+
+    def record_latency(self, latency_ms: float) -> None:
+        """Feed a completed primary call into the rolling latency window."""
+        self._latencies.append(latency_ms)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait for the primary before hedging, or None while there is too little data."""
+        if not self.enabled or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(ordered[index], self.min_delay_ms) / 1000
+
+    def try_hedge(self) -> bool:
+        if not self.budget.try_acquire():
+            self._budget_exhausted.inc()
+            return False
+        self._hedges.inc()
+        return True
+
+    def hedge_model(self, primary_model: str) -> str:
+        """The hedge goes to the first fallback model, or repeats the primary model."""
+        return self.fallback_models[0] if self.fallback_models else primary_model
+
+    def models_after(self, model: str) -> List[str]:
+        """Fallback models to try, in order, after model failed."""
+        return [candidate for candidate in self.fallback_models if candidate != model]
+
+    def record_model_fallback(self) -> None:
+        self._model_fallbacks.inc()
+
+    def record_outcome(self, effective_ms: float, unhedged_ms: Optional[float], hedge_won: bool) -> None:
+        self._effective.observe(effective_ms)
+        if unhedged_ms is not None:
+            self._unhedged.observe(unhedged_ms)
+        if hedge_won:
+            metrics.counter("hedge_wins_total", "Calls answered by the hedged request").inc()
+
+    def should_measure_loser(self) -> bool:
+        """Whether to let a beaten primary finish in the background to measure its latency."""
+        return self.measure_ratio > 0 and random.random() < self.measure_ratio
+
+    def record_loser_latency(self, latency_ms: float) -> None:
+        self.record_latency(latency_ms)
+        for _ in range(max(1, round(1 / self.measure_ratio))):
+            self._unhedged.observe(latency_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedge counts and the tail latency with and without hedging."""
+        requests = self._requests.value
+        effective = self._effective.summary()
+        unhedged = self._unhedged.summary()
+        improvement = (
+            round(unhedged["p99"] - effective["p99"], 3)
+            if effective["p99"] is not None and unhedged["p99"] is not None else None
+        )
+        return {
+            "enabled": self.enabled,
+            "fallback_models": self.fallback_models,
+            "current_hedge_delay_ms": round(self.hedge_delay() * 1000, 1) if self.hedge_delay() else None,
+            "requests": requests,
+            "hedges_sent": self._hedges.value,
+            "hedge_wins": metrics.counter("hedge_wins_total").value,
+            "budget_exhausted": self._budget_exhausted.value,
+            "model_fallbacks": self._model_fallbacks.value,
+            "extra_upstream_call_ratio": round(self._hedges.value / requests, 4) if requests else 0.0,
+            "latency_ms": {"effective": effective, "unhedged_estimate": unhedged},
+            "p99_improvement_ms": improvement
+        }
@@ -0,0 +1,241 @@
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+import httpx
+from app.core.metrics import metrics
+from app.services.admission import AdmissionRejected
+from loguru import logger
+
+
+# Longest wait between expiry sweeps while the queue is idle
+EXPIRY_INTERVAL_SECONDS = 60
+
+
+class Job:
+    """A queued suggestion request and, once finished, its result."""
+
+    __slots__ = (
+        "job_id", "message", "session_id", "callback_url", "status", "result", "error",
+        "created_at", "started_at", "finished_at", "callback_status", "_enqueued"
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, message: str, session_id: Optional[str], callback_url: Optional[str]):
+        self.job_id = str(uuid.uuid4())
+        self.message = message
+        self.session_id = session_id
+        self.callback_url = callback_url
+        self.status = self.QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.callback_status: Optional[str] = None
+        self._enqueued = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "session_id": self.session_id,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "callback_status": self.callback_status
+        }
+
+
+class JobQueue:
+    """
+    Bounded queue of suggestion jobs served by a pool of asyncio workers.
+
+    Submitting to a full queue raises AdmissionRejected (503 with Retry-After). Finished
+    jobs are kept for result_ttl_seconds in completion order, so expiry only ever looks at
+    the oldest entries. Expiry runs on every submit and lookup, after every job, and from a
+    periodic task, so results are released even when the queue goes idle.
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[Dict[str, Any]]], workers: int = 4,
+                 max_queue: int = 1000, result_ttl_seconds: float = 600,
+                 callback_timeout_seconds: float = 5.0, callback_allowed_hosts: Optional[List[str]] = None):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl_seconds = result_ttl_seconds
+        self.callback_timeout_seconds = callback_timeout_seconds
+        self.callback_allowed_hosts = callback_allowed_hosts or []
+
+        self._jobs: Dict[str, Job] = {}
+        # job_id -> expiry time, in completion order
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._expiry_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._running = 0
+
+        self._submitted = metrics.counter("jobs_submitted_total", "Suggestion jobs accepted")
+        self._rejected = metrics.counter("jobs_rejected_total", "Suggestion jobs rejected by a full queue")
+        self._expired = metrics.counter("jobs_expired_total", "Finished jobs dropped after their TTL")
+        self._wait_ms = metrics.histogram("job_queue_wait_ms", "Time jobs spend queued before a worker picks them up")
+        self._run_ms = metrics.histogram("job_run_duration_ms", "Time workers spend on a job")
+
+    async def start(self) -> None:
+        """Start the worker pool."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._client = httpx.AsyncClient(timeout=self.callback_timeout_seconds)
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        self._expiry_task = asyncio.create_task(self._expire_periodically())
+        logger.info(f"Job queue started ({self.workers} workers, max_queue={self.max_queue})")
+
+    async def stop(self) -> None:
+        """Stop the workers; queued jobs are abandoned."""
+        tasks = self._tasks + ([self._expiry_task] if self._expiry_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._expiry_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        logger.info("Job queue stopped")
+
+    def callback_allowed(self, url: str) -> bool:
+        """Whether url may receive callbacks: http(s) and on the allowlist. With no allowlist, none may."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            return False
+        # Open callbacks would let clients make the server call internal or metadata addresses
+        return parsed.hostname in self.callback_allowed_hosts
+
+    def submit(self, message: str, session_id: Optional[str] = None, callback_url: Optional[str] = None) -> Job:
+        """
+        Enqueue a suggestion job without waiting for it.
+
+        Args:
+            message (str): Validated user message
+            session_id (Optional[str]): Session the suggestion belongs to
+            callback_url (Optional[str]): URL to POST the finished job to
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            AdmissionRejected: If the queue is full or the pool is not running
+        """
+        self._expire()
+        if self._queue is None:
+            raise AdmissionRejected("job_queue_stopped", 1.0)
+        job = Job(message, session_id, callback_url)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._rejected.inc()
+            # Rough time for the pool to drain the queue at the recent per-job run time
+            drain = (self._run_ms.summary()["avg"] or 1000) / 1000 * self.max_queue / max(1, self.workers)
+            raise AdmissionRejected("job_queue_full", max(1.0, math.ceil(drain)))
+        self._jobs[job.job_id] = job
+        self._submitted.inc()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._finished:
+            job_id, expires_at = next(iter(self._finished.items()))
+            if expires_at > now:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+            self._expired.inc()
+
+    async def _expire_periodically(self) -> None:
+        interval = min(max(self.result_ttl_seconds, 0.01), EXPIRY_INTERVAL_SECONDS)
+        while True:
+            await asyncio.sleep(interval)
+            self._expire()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on {job.job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+                self._expire()
+
+    async def _run(self, job: Job) -> None:
+        self._wait_ms.observe((time.monotonic() - job._enqueued) * 1000)
+        job.status = Job.RUNNING
+        job.started_at = datetime.now()
+        self._running += 1
+        started = time.perf_counter()
+        try:
+            job.result = await self.handler(job)
+            job.status = Job.SUCCEEDED
+        except AdmissionRejected as e:
+            job.status = Job.FAILED
+            job.error = {"type": "overloaded", "details": str(e), "retry_after": e.retry_after}
+        except Exception as e:
+            job.status = Job.FAILED
+            job.error = {"type": "generation_error", "details": str(e)}
+        finally:
+            self._running -= 1
+            self._run_ms.observe((time.perf_counter() - started) * 1000)
+            job.finished_at = datetime.now()
+            self._finished[job.job_id] = time.monotonic() + self.result_ttl_seconds
+            metrics.counter("jobs_finished_total", "Suggestion jobs finished", {"status": job.status}).inc()
+
+        if job.callback_url:
+            await self._send_callback(job)
+
+    async def _send_callback(self, job: Job) -> None:
+        """POST the finished job to its callback URL, retrying once on failure."""
+        for attempt in range(2):
+            try:
+                response = await self._client.post(job.callback_url, json=job.to_dict())
+                response.raise_for_status()
+                job.callback_status = "delivered"
+                return
+            except httpx.HTTPError as e:
+                logger.warning(f"Callback for job {job.job_id} failed (attempt {attempt + 1}): {str(e)}")
+        job.callback_status = "failed"
+        metrics.counter("job_callbacks_failed_total", "Job callbacks that could not be delivered").inc()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, worker utilisation and job outcome counts."""
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "jobs_held": len(self._jobs),
+            "submitted": self._submitted.value,
+            "rejected": self._rejected.value,
+            "succeeded": metrics.counter("jobs_finished_total", labels={"status": Job.SUCCEEDED}).value,
+            "failed": metrics.counter("jobs_finished_total", labels={"status": Job.FAILED}).value,
+            "expired": self._expired.value,
+            "callbacks_failed": metrics.counter("job_callbacks_failed_total").value,
+            "wait_ms": self._wait_ms.summary(),
+            "run_ms": self._run_ms.summary()
+        }
@@ -0,0 +1,198 @@
+import asyncio
+import glob
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from app.core.metrics import metrics
+from loguru import logger
+
+
+ACTIVE_FILE = "journal.jsonl"
+ROTATED_PATTERN = "journal-*.jsonl.gz"
+# Also matches a segment left uncompressed by a failed rotation
+SEGMENT_PATTERN = "journal-*.jsonl*"
+
+_STOP = object()
+
+
+def prompt_hash(turns: List[Dict[str, Any]]) -> str:
+    """
+    Hash the conversation sent upstream after the system prompt (history, then the user turn).
+
+    The system prompt is left out because its version is already part of the cache key;
+    a mock upstream hashes messages[1:] of a request to find the recorded completion.
+    """
+    raw = json.dumps(turns, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def journal_files(path: str) -> List[str]:
+    """Journal files under path in write order: rotated segments, then the active file."""
+    if not os.path.isdir(path):
+        return [path]
+    files = sorted(glob.glob(os.path.join(path, SEGMENT_PATTERN)))
+    active = os.path.join(path, ACTIVE_FILE)
+    if os.path.exists(active):
+        files.append(active)
+    return files
+
+
+def iter_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read journal entries from a journal directory or a single (optionally gzipped) file.
+
+    A line cut short by a crash mid-write is skipped rather than failing the whole replay.
+    """
+    for file_path in journal_files(path):
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class Journal:
+    """
+    Append-only JSONL journal of suggestion requests and the upstream calls behind them.
+
+    record() only puts the entry on a bounded queue, so the request path never touches the
+    disk; a writer thread serializes and appends entries in batches. When the active file
+    passes max_file_bytes it is gzip-compressed into a timestamped segment, and only the
+    newest max_files segments are kept. Entries are dropped, not waited for, when the
+    queue is full.
+    """
+
+    def __init__(self, directory: str, max_file_bytes: int = 64 * 1024 * 1024, max_files: int = 20,
+                 batch_size: int = 256, flush_interval_seconds: float = 1.0, max_queue: int = 10000):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.rotations = 0
+        self.write_errors = 0
+        self._flush_ms = metrics.histogram("journal_flush_duration_ms", "Journal batch write time")
+
+    @property
+    def active_path(self) -> str:
+        return os.path.join(self.directory, ACTIVE_FILE)
+
+    async def start(self) -> None:
+        """Start the writer thread."""
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"Journal started (directory={self.directory}, max_file_bytes={self.max_file_bytes})")
+
+    async def stop(self) -> None:
+        """Write out queued entries and stop the writer thread."""
+        if self._thread is None:
+            return
+        await asyncio.to_thread(self._queue.put, _STOP)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+        logger.info("Journal stopped")
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Queue an entry for writing; never blocks."""
+        try:
+            self._queue.put_nowait(entry)
+            self.recorded += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        f = open(self.active_path, "a", encoding="utf-8")
+        size = f.tell()
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval_seconds)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = any(entry is _STOP for entry in batch)
+                size += self._write(f, [entry for entry in batch if entry is not _STOP])
+                if size >= self.max_file_bytes:
+                    f.close()
+                    self._rotate()
+                    f = open(self.active_path, "a", encoding="utf-8")
+                    size = 0
+                if stopping:
+                    return
+        finally:
+            f.close()
+
+    def _write(self, f, batch: List[Dict[str, Any]]) -> int:
+        if not batch:
+            return 0
+        start = time.perf_counter()
+        data = "".join(json.dumps(entry, default=str, separators=(",", ":")) + "\n" for entry in batch)
+        try:
+            f.write(data)
+            f.flush()
+        except OSError as e:
+            self.write_errors += len(batch)
+            logger.warning(f"Journal write of {len(batch)} entries failed: {str(e)}")
+            return 0
+        self._flush_ms.observe((time.perf_counter() - start) * 1000)
+        self.written += len(batch)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def _rotate(self) -> None:
+        """Compress the active file into a timestamped segment and prune old segments."""
+        segment = os.path.join(self.directory, f"journal-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.jsonl")
+        try:
+            os.replace(self.active_path, segment)
+            with open(segment, "rb") as source, gzip.open(f"{segment}.gz", "wb", compresslevel=6) as target:
+                shutil.copyfileobj(source, target)
+            os.remove(segment)
+        except OSError as e:
+            logger.warning(f"Journal rotation failed: {str(e)}")
+            return
+        self.rotations += 1
+
+        segments = sorted(glob.glob(os.path.join(self.directory, ROTATED_PATTERN)))
+        for old in segments[:max(0, len(segments) - self.max_files)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue, write and rotation statistics."""
+        return {
+            "directory": self.directory,
+            "queue_depth": self._queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "written": self.written,
+            "bytes_written": self.bytes_written,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+            "flush_ms": self._flush_ms.summary()
+        }
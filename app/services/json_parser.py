@@ -1,13 +1,100 @@
 import json
 import re
-from typing import Dict, Any, Optional
-from app.models.chat import StructuredMealSuggestion
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import ValidationError
+from app.core.tracing import tracer
+from app.models.chat import OpenRouterCompletionResponse, StructuredMealSuggestion
+from app.services.json_repair import JSONRepair
 from loguru import logger
 
 
+# (start, end, in_fence, decoded value or None) for a top-level object found in text
+JSONSpan = Tuple[int, int, bool, Optional[Any]]
+
+
 class JSONParser:
     """Service for parsing JSON responses from LLM."""
     
+    # Used to find the end of objects the C decoder rejects; whole strings are one
+    # token so braces inside string values never affect nesting
+    _OBJECT_TOKEN_RE = re.compile(r'[{}]|"[^"\\]*(?:\\.[^"\\]*)*"|"', re.DOTALL)
+    _DECODER = json.JSONDecoder()
+    
+    # Parse count and total seconds per path, to compare structured output with heuristics
+    _parse_stats = {"structured": [0, 0.0], "heuristic": [0, 0.0]}
+    
+    @staticmethod
+    def scan_json_objects(text: str) -> Tuple[List[JSONSpan], Optional[int]]:
+        """
+        Find and decode top-level JSON objects in a single pass over the text.
+        
+        Prose between objects is skipped with str.find, each object is consumed by the
+        C decoder, and only objects it rejects are walked by the string-aware brace
+        scanner to find where they end. ``` code fences between objects are tracked.
+        
+        Args:
+            text (str): The text to scan
+            
+        Returns:
+            Tuple[List[JSONSpan], Optional[int]]: (start, end, in_fence, value) for each complete
+            object, with value None when it is not valid JSON, and the start of a trailing
+            object that was never closed
+        """
+        objects: List[JSONSpan] = []
+        raw_decode = JSONParser._DECODER.raw_decode
+        in_fence = False
+        fence = text.find("```")
+        pos = 0
+        
+        while True:
+            start = text.find("{", pos)
+            if start == -1:
+                return objects, None
+            
+            while fence != -1 and fence < start:
+                in_fence = not in_fence
+                fence = text.find("```", fence + 3)
+            
+            try:
+                value, end = raw_decode(text, start)
+            except json.JSONDecodeError:
+                value = None
+                end = JSONParser._find_object_end(text, start)
+                if end is None:
+                    return objects, start
+            
+            objects.append((start, end, in_fence, value))
+            pos = end
+            # Fences inside the object do not open or close a code block
+            while fence != -1 and fence < end:
+                fence = text.find("```", fence + 3)
+    
+    @staticmethod
+    def _find_object_end(text: str, start: int) -> Optional[int]:
+        """Return the index after the brace closing the object at start, or None if truncated."""
+        search = JSONParser._OBJECT_TOKEN_RE.search
+        depth = 0
+        pos = start
+        while True:
+            match = search(text, pos)
+            if match is None or match.group() == '"':
+                # Ran out of text, or a string that never closes
+                return None
+            pos = match.end()
+            token = match.group()
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+                if depth == 0:
+                    return pos
+    
+    @staticmethod
+    def rank_json_candidates(objects: List[JSONSpan]) -> List[JSONSpan]:
+        """Order candidate spans best first: fenced objects, then the largest."""
+        return sorted(objects, key=lambda span: (span[2], span[1] - span[0]), reverse=True)
+    
     @staticmethod
     def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
         """
@@ -19,53 +106,35 @@ class JSONParser:
         Returns:
             Optional[Dict[str, Any]]: Parsed JSON object or None if extraction fails
         """
-        try:
-            # First, try to parse the entire text as JSON
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            pass
-        
-        # If that fails, try to extract JSON from the text
-        # Look for JSON object patterns
-        json_patterns = [
-            r'\{.*\}',  # Basic object pattern
-            r'```json\s*(\{.*?\})\s*```',  # JSON in code blocks
-            r'```\s*(\{.*?\})\s*```',  # JSON in generic code blocks
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, text, re.DOTALL)
-            for match in matches:
-                try:
-                    return json.loads(match.strip())
-                except json.JSONDecodeError:
-                    continue
+        objects, _ = JSONParser.scan_json_objects(text)
         
-        # If no JSON found, try to find the first complete JSON object
-        start_idx = text.find('{')
-        if start_idx != -1:
-            brace_count = 0
-            end_idx = start_idx
-            
-            for i, char in enumerate(text[start_idx:], start_idx):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i
-                        break
-            
-            if brace_count == 0:  # Found complete JSON object
-                try:
-                    json_str = text[start_idx:end_idx + 1]
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    pass
+        for _, _, _, value in JSONParser.rank_json_candidates(objects):
+            if isinstance(value, dict):
+                return value
         
         logger.warning("Could not extract valid JSON from LLM response")
         return None
     
+    @staticmethod
+    def find_repair_candidate(text: str) -> Optional[str]:
+        """
+        Find the text most worth repairing when no candidate decoded as a JSON object.
+        
+        Args:
+            text (str): The text containing malformed JSON
+            
+        Returns:
+            Optional[str]: The largest invalid object, or the unterminated trailing object
+        """
+        objects, tail = JSONParser.scan_json_objects(text)
+        spans = [(start, end) for start, end, _, value in objects if value is None]
+        if tail is not None:
+            spans.append((tail, len(text)))
+        if not spans:
+            return None
+        start, end = max(spans, key=lambda span: span[1] - span[0])
+        return text[start:end]
+    
     @staticmethod
     def parse_meal_suggestion(llm_response: str) -> Optional[StructuredMealSuggestion]:
         """
@@ -80,19 +149,79 @@ class JSONParser:
         try:
             # Extract JSON from the response
             json_data = JSONParser.extract_json_from_text(llm_response)
+            
+            # Repair malformed or truncated output locally instead of serving the fallback
+            if not json_data:
+                candidate = JSONParser.find_repair_candidate(llm_response)
+                if candidate:
+                    json_data = JSONRepair.repair(candidate)
+            
             if not json_data:
                 logger.error("No valid JSON found in LLM response")
                 return None
             
-            # Validate and create structured meal suggestion
-            meal_suggestion = StructuredMealSuggestion(**json_data)
-            logger.info(f"Successfully parsed structured meal suggestion: {meal_suggestion.meal_name}")
+            # Validate and create structured meal suggestion, coercing loosely typed fields if needed
+            try:
+                meal_suggestion = StructuredMealSuggestion(**json_data)
+            except ValidationError:
+                meal_suggestion = StructuredMealSuggestion(**JSONRepair.coerce_meal_fields(json_data))
+            logger.info("Successfully parsed structured meal suggestion: {}", meal_suggestion.meal_name, event="parse.success")
             return meal_suggestion
             
         except Exception as e:
             logger.error(f"Error parsing meal suggestion: {str(e)}")
             return None
     
+    @staticmethod
+    def parse_completion(completion: OpenRouterCompletionResponse) -> Optional[StructuredMealSuggestion]:
+        """
+        Parse a completion, validating structured output directly when it was requested.
+        
+        Args:
+            completion (OpenRouterCompletionResponse): Completion returned by OpenRouter
+            
+        Returns:
+            Optional[StructuredMealSuggestion]: Parsed structured data or None if parsing fails
+        """
+        start = time.perf_counter()
+        with tracer.span("json.parse") as span:
+            if completion.structured_output:
+                try:
+                    meal_suggestion = StructuredMealSuggestion.model_validate_json(completion.content)
+                    JSONParser._record_parse("structured", start)
+                    span.set_attribute("parse.path", "structured")
+                    return meal_suggestion
+                except ValidationError as e:
+                    logger.warning(f"Structured output failed validation, using heuristic parsing: {str(e)}")
+            
+            meal_suggestion = JSONParser.parse_meal_suggestion(completion.content)
+            JSONParser._record_parse("heuristic", start)
+            span.set_attribute("parse.path", "heuristic")
+            span.set_attribute("parse.succeeded", meal_suggestion is not None)
+            return meal_suggestion
+    
+    @staticmethod
+    def _record_parse(path: str, start: float) -> None:
+        stats = JSONParser._parse_stats[path]
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+    
+    @staticmethod
+    def get_parse_stats() -> Dict[str, Any]:
+        """Get average parse time per path and the time saved by structured output."""
+        averages = {
+            path: round(total / count * 1000, 4) if count else None
+            for path, (count, total) in JSONParser._parse_stats.items()
+        }
+        saved = None
+        if averages["structured"] is not None and averages["heuristic"] is not None:
+            saved = round(averages["heuristic"] - averages["structured"], 4)
+        return {
+            "parses": {path: count for path, (count, _) in JSONParser._parse_stats.items()},
+            "average_parse_ms": averages,
+            "parse_ms_saved_per_request": saved
+        }
+    
     @staticmethod
     def create_fallback_response(user_message: str) -> StructuredMealSuggestion:
         """
@@ -0,0 +1,282 @@
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, get_origin
+from app.models.chat import StructuredMealSuggestion
+from loguru import logger
+
+
+class JSONRepair:
+    """Service for repairing malformed or truncated JSON emitted by the LLM."""
+
+    # How often each repair rule fired since startup
+    rule_counts: Counter = Counter()
+    attempts = 0
+    successes = 0
+
+    _LITERALS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+    _VALUE_END = set('"}]0123456789el')
+    _NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+    _JSON_NUMBER_RE = re.compile(r"-?\d*(?:\.\d+)?(?:[eE][+-]?\d+)?")
+    _LIST_SPLIT_RE = re.compile(r"\s*(?:\n|;|(?<=\.)\s+(?=[A-Z0-9]))\s*")
+
+    LIST_FIELDS = [
+        name for name, field in StructuredMealSuggestion.model_fields.items()
+        if get_origin(field.annotation) in (list, List)
+    ]
+    INT_FIELDS = [
+        name for name, field in StructuredMealSuggestion.model_fields.items() if field.annotation is int
+    ]
+    MACRO_FIELDS = ["protein_per_serving", "carbs_per_serving", "fat_per_serving"]
+    # Without these the suggestion is not worth keeping over the fallback
+    CORE_FIELDS = ["meal_name", "ingredients", "instructions"]
+
+    @classmethod
+    def _fire(cls, rule: str) -> None:
+        cls.rule_counts[rule] += 1
+
+    @classmethod
+    def repair(cls, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Repair common JSON syntax errors and close truncated containers.
+
+        Args:
+            text (str): Candidate JSON text, typically starting at the first "{"
+
+        Returns:
+            Optional[Dict[str, Any]]: Parsed object, or None if the text cannot be repaired
+        """
+        cls.attempts += 1
+        repaired = cls.repair_text(text)
+        try:
+            data = json.loads(repaired)
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON repair failed: {str(e)}")
+            return None
+
+        if not isinstance(data, dict):
+            return None
+        cls.successes += 1
+        return data
+
+    @classmethod
+    def repair_text(cls, text: str) -> str:
+        """Rewrite text into syntactically valid JSON where possible, in one pass."""
+        out: List[str] = []
+        stack: List[str] = []
+        prev = ""  # last significant character written
+        i = 0
+        n = len(text)
+
+        while i < n:
+            char = text[i]
+
+            if char in "\"'":
+                if stack and prev in cls._VALUE_END:
+                    out.append(",")
+                    cls._fire("missing_commas")
+                string, i, closed = cls._read_string(text, i)
+                if char == "'":
+                    cls._fire("single_quotes")
+                if not closed:
+                    cls._fire("unterminated_string")
+                out.append(string)
+                prev = '"'
+                continue
+
+            if char in "{[":
+                if stack and prev in cls._VALUE_END:
+                    out.append(",")
+                    cls._fire("missing_commas")
+                stack.append("}" if char == "{" else "]")
+                out.append(char)
+                prev = char
+            elif char in "}]":
+                if prev == ",":
+                    cls._drop_trailing_comma(out)
+                    cls._fire("trailing_commas")
+                if not stack:
+                    break  # stray closer after the object: stop here
+                closer = stack.pop()
+                if closer != char:
+                    cls._fire("mismatched_brackets")
+                out.append(closer)
+                prev = closer
+                if not stack:
+                    break
+            elif char == "/" and text.startswith(("//", "/*"), i):
+                end = text.find("\n" if text[i + 1] == "/" else "*/", i + 2)
+                i = n if end == -1 else end + (1 if text[i + 1] == "/" else 2)
+                cls._fire("comments")
+                continue
+            elif char.isalpha() or char == "_":
+                end = i
+                while end < n and (text[end].isalnum() or text[end] == "_"):
+                    end += 1
+                word = text[i:end]
+                rest = text[end:end + 20].lstrip()
+                if stack and prev in cls._VALUE_END:
+                    out.append(",")
+                    cls._fire("missing_commas")
+                if rest.startswith(":"):
+                    out.append(json.dumps(word))
+                    cls._fire("unquoted_keys")
+                    prev = '"'
+                elif word in cls._LITERALS:
+                    if word != cls._LITERALS[word]:
+                        cls._fire("python_literals")
+                    out.append(cls._LITERALS[word])
+                    prev = out[-1][-1]
+                else:
+                    out.append(json.dumps(word))
+                    cls._fire("bare_words")
+                    prev = '"'
+                i = end
+                continue
+            elif char.isdigit() or char == "-":
+                token = cls._JSON_NUMBER_RE.match(text, i).group() or char
+                if stack and prev in cls._VALUE_END:
+                    out.append(",")
+                    cls._fire("missing_commas")
+                out.append(token)
+                prev = token[-1]
+                i += len(token)
+                continue
+            elif not char.isspace():
+                out.append(char)
+                prev = char
+            else:
+                out.append(char)
+            i += 1
+
+        if stack:
+            cls._fire("truncated_containers")
+            cls._trim_dangling(out, in_object=stack[-1] == "}")
+            out.extend(reversed(stack))
+        return "".join(out)
+
+    @staticmethod
+    def _read_string(text: str, start: int):
+        """Read a single- or double-quoted string, returning it as a JSON string literal."""
+        quote = text[start]
+        chars: List[str] = []
+        i = start + 1
+        n = len(text)
+        while i < n:
+            char = text[i]
+            if char == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                if quote == "'" and nxt == "'":
+                    chars.append("'")
+                else:
+                    chars.append(char + nxt)
+                i += 2
+                continue
+            if char == quote:
+                return '"' + "".join(chars) + '"', i + 1, True
+            if char == '"':
+                chars.append('\\"')
+            elif char == "\n":
+                chars.append("\\n")
+            else:
+                chars.append(char)
+            i += 1
+        # Truncated inside a string; drop a dangling escape before closing it
+        if chars and chars[-1] == "\\":
+            chars.pop()
+        return '"' + "".join(chars) + '"', n, False
+
+    @staticmethod
+    def _drop_trailing_comma(out: List[str]) -> None:
+        for index in range(len(out) - 1, -1, -1):
+            if out[index] == ",":
+                del out[index]
+                return
+            if not out[index].isspace():
+                return
+
+    @staticmethod
+    def _trim_dangling(out: List[str], in_object: bool) -> None:
+        """Remove a trailing comma, a lone minus sign, or a key that never got its value."""
+        text = "".join(out).rstrip()
+        previous = None
+        while previous != text:
+            previous = text
+            text = re.sub(r'(?:,\s*|(?<=[:\[,])\s*-)$', "", text).rstrip()
+            if in_object:
+                text = re.sub(r'(?:,|(?<=\{))\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', "", text)
+        out[:] = [text]
+
+    @classmethod
+    def coerce_meal_fields(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Coerce loosely typed fields into the StructuredMealSuggestion schema.
+
+        Args:
+            data (Dict[str, Any]): Parsed JSON object
+
+        Returns:
+            Dict[str, Any]: A copy of the data with coerced field values
+        """
+        data = dict(data)
+
+        # {"meal": {...}} or {"meal_suggestion": {...}}
+        if "meal_name" not in data and len(data) == 1:
+            inner = next(iter(data.values()))
+            if isinstance(inner, dict) and "meal_name" in inner:
+                data = dict(inner)
+                cls._fire("unwrap_nested")
+
+        for name, field in StructuredMealSuggestion.model_fields.items():
+            value = data.get(name)
+
+            if name in cls.INT_FIELDS:
+                if isinstance(value, float):
+                    data[name] = int(round(value))
+                    cls._fire("coerce_numbers")
+                elif isinstance(value, str):
+                    match = cls._NUMBER_RE.search(value.replace(",", ""))
+                    if match:
+                        data[name] = int(round(float(match.group())))
+                        cls._fire("coerce_numbers")
+
+            elif name in cls.LIST_FIELDS:
+                if isinstance(value, str):
+                    data[name] = [item for item in cls._LIST_SPLIT_RE.split(value.strip()) if item]
+                    cls._fire("coerce_string_to_list")
+                elif isinstance(value, list) and not all(isinstance(item, str) for item in value):
+                    data[name] = [cls._item_to_string(item) for item in value if item is not None]
+                    cls._fire("coerce_list_items")
+
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                data[name] = f"{value}g" if name in cls.MACRO_FIELDS else str(value)
+                cls._fire("coerce_numbers_to_strings")
+
+        missing = [name for name in StructuredMealSuggestion.model_fields if data.get(name) is None]
+        if missing and all(data.get(name) for name in cls.CORE_FIELDS):
+            # Typically the tail fields of a truncated completion
+            for name in missing:
+                if name in cls.LIST_FIELDS:
+                    data[name] = []
+                elif name in cls.INT_FIELDS:
+                    data[name] = 0
+                else:
+                    data[name] = "Unknown"
+            cls._fire("fill_missing_fields")
+
+        return data
+
+    @staticmethod
+    def _item_to_string(item: Any) -> str:
+        if isinstance(item, dict):
+            return " ".join(str(value) for value in item.values() if value is not None)
+        return str(item)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Get repair attempt counters and per-rule firing counts."""
+        return {
+            "attempts": cls.attempts,
+            "successes": cls.successes,
+            "rules": dict(cls.rule_counts)
+        }
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from app.core.metrics import metrics
+from app.models.chat import MealPlanRequest, SuggestionResult
+from app.services.admission import AdmissionRejected
+from app.services.nutrition import MACROS, NutritionTable, parse_macros
+from app.services.suggestion_service import SuggestionService
+from loguru import logger
+
+
+class MealSlot:
+    """One meal of the plan and the suggestion currently filling it."""
+
+    __slots__ = ("name", "result", "error", "regenerated")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.result: Optional[SuggestionResult] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.regenerated = False
+
+
+class MealPlanService:
+    """Generate days x meals plans concurrently and swap single meals to meet daily targets."""
+
+    def __init__(self, suggestion_service: SuggestionService, max_concurrency: int = 8, max_regenerations: int = 10):
+        self.suggestion_service = suggestion_service
+        self.max_concurrency = max_concurrency
+        self.max_regenerations = max_regenerations
+
+        self._plans = metrics.counter("meal_plans_total", "Meal plans generated")
+        self._plan_latency = metrics.histogram("meal_plan_duration_ms", "Meal plan generation latency")
+
+    @staticmethod
+    def _prompt(request: MealPlanRequest, day: int, meal: str, aim: Optional[str] = None) -> str:
+        prompt = f"{meal.capitalize()} for day {day + 1} of a {request.days}-day meal plan. {request.preferences}"
+        return f"{prompt}. Aim for about {aim} per serving." if aim else prompt
+
+    @staticmethod
+    def _deviation(totals: List[float], targets: List[Optional[float]]) -> float:
+        """Largest relative miss across the targeted macros."""
+        return max(
+            (abs(total - target) / target for total, target in zip(totals, targets) if target),
+            default=0.0
+        )
+
+    async def _suggest(self, semaphore: asyncio.Semaphore, prompt: str) -> SuggestionResult:
+        async with semaphore:
+            return await self.suggestion_service.get_suggestion(user_message=prompt)
+
+    async def _fill(self, request: MealPlanRequest, table: NutritionTable, slot: MealSlot,
+                    day: int, meal: int, semaphore: asyncio.Semaphore) -> None:
+        try:
+            slot.result = await self._suggest(semaphore, self._prompt(request, day, slot.name))
+        except AdmissionRejected as e:
+            slot.error = {"type": "overloaded", "details": str(e), "retry_after": e.retry_after}
+            return
+        except Exception as e:
+            logger.error(f"Error generating meal plan slot (day {day + 1}, {slot.name}): {str(e)}")
+            slot.error = {"type": "generation_error", "details": str(e)}
+            return
+        # A fallback suggestion's macros are placeholders; its row stays empty so totals skip it
+        if slot.result.structured:
+            table.set_meal(day, meal, parse_macros(slot.result.suggestion)[0])
+
+    async def _swap_meal(self, request: MealPlanRequest, table: NutritionTable, slots: List[MealSlot],
+                         targets: List[Optional[float]], day: int, totals: List[float],
+                         semaphore: asyncio.Semaphore) -> bool:
+        """Regenerate the meal of day that best corrects its worst macro; keep it only if the day improves."""
+        worst = max(
+            (column for column, target in enumerate(targets) if target),
+            key=lambda column: abs(totals[column] - targets[column]) / targets[column]
+        )
+        rows = [table.get_meal(day, meal) for meal in range(len(slots))]
+        # Over target: replace the heaviest meal for that macro; under: the lightest
+        pick = max if totals[worst] > targets[worst] else min
+        meal = pick(range(len(slots)), key=lambda index: rows[index][worst])
+
+        floor = 1.0 / (2 * len(slots))
+        aims = []
+        for column, target in enumerate(targets):
+            if target:
+                amount = max(target * floor, rows[meal][column] + target - totals[column])
+                aims.append(f"{amount:.0f} kcal" if column == 0 else f"{amount:.0f}g {MACROS[column][:-2]}")
+
+        try:
+            result = await self._suggest(semaphore, self._prompt(request, day, slots[meal].name, ", ".join(aims)))
+        except Exception as e:
+            logger.warning(f"Meal plan regeneration failed (day {day + 1}, {slots[meal].name}): {str(e)}")
+            return False
+        if not result.structured:
+            return False
+
+        values = parse_macros(result.suggestion)[0]
+        candidate = [total - old + new for total, old, new in zip(totals, rows[meal], values)]
+        if self._deviation(candidate, targets) >= self._deviation(totals, targets):
+            return False
+        table.set_meal(day, meal, values)
+        slots[meal].result = result
+        slots[meal].error = None
+        slots[meal].regenerated = True
+        return True
+
+    async def generate(self, request: MealPlanRequest) -> Dict[str, Any]:
+        """
+        Generate a meal plan, then regenerate individual meals until days meet the targets.
+
+        Args:
+            request (MealPlanRequest): Days, meal names, preferences and optional daily targets
+
+        Returns:
+            Dict[str, Any]: Per-day meals and totals, plan totals and regeneration counts
+        """
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        table = NutritionTable(request.days, len(request.meals))
+        plan = [[MealSlot(name) for name in request.meals] for _ in range(request.days)]
+
+        await asyncio.gather(*(
+            self._fill(request, table, slot, day, meal, semaphore)
+            for day, slots in enumerate(plan) for meal, slot in enumerate(slots)
+        ))
+
+        targets = [getattr(request.targets, macro) if request.targets else None for macro in MACROS]
+        attempted = accepted = 0
+        while any(targets) and attempted < self.max_regenerations:
+            daily = table.daily_totals()
+            off_target = [day for day in range(request.days) if self._deviation(daily[day], targets) > request.tolerance]
+            if not off_target:
+                break
+            # One meal per off-target day per round; days are independent so they run concurrently
+            off_target = off_target[:self.max_regenerations - attempted]
+            outcomes = await asyncio.gather(*(
+                self._swap_meal(request, table, plan[day], targets, day, daily[day], semaphore) for day in off_target
+            ))
+            attempted += len(outcomes)
+            accepted += sum(outcomes)
+            if not any(outcomes):
+                break
+
+        daily = table.daily_totals()
+        days = []
+        for day, slots in enumerate(plan):
+            meals = []
+            for meal, slot in enumerate(slots):
+                if slot.result is None:
+                    meals.append({"meal": slot.name, "success": False, "error": slot.error})
+                    continue
+                meals.append({
+                    "meal": slot.name,
+                    "success": True,
+                    "suggestion_id": slot.result.suggestion_id,
+                    "suggestion": slot.result.suggestion.model_dump(),
+                    "macros": NutritionTable.as_dict(table.get_meal(day, meal)) if slot.result.structured else None,
+                    "regenerated": slot.regenerated
+                })
+            days.append({
+                "day": day + 1,
+                "meals": meals,
+                "totals": NutritionTable.as_dict(daily[day]),
+                "on_target": self._deviation(daily[day], targets) <= request.tolerance if any(targets) else None
+            })
+
+        totals = table.totals()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._plans.inc()
+        self._plan_latency.observe(elapsed_ms)
+        logger.info(
+            f"Generated {request.days}x{len(request.meals)} meal plan in {elapsed_ms:.0f} ms "
+            f"({accepted}/{attempted} regenerations kept)"
+        )
+        return {
+            "days": days,
+            "totals": NutritionTable.as_dict(totals),
+            "daily_average": NutritionTable.as_dict([value / request.days for value in totals]),
+            "targets": request.targets.model_dump() if request.targets else None,
+            "regenerations": {"attempted": attempted, "accepted": accepted},
+            "aggregation_backend": table.backend
+        }
@@ -0,0 +1,94 @@
+import re
+from array import array
+from typing import Dict, List, Tuple
+from app.models.chat import StructuredMealSuggestion
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MACROS = ("calories", "protein_g", "carbs_g", "fat_g")
+_WIDTH = len(MACROS)
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_grams(value: str) -> Tuple[float, bool]:
+    """
+    Parse a free-form macro amount such as "25g", "25.5 g" or "20-25g".
+
+    Args:
+        value (str): Amount as returned by the model
+
+    Returns:
+        Tuple[float, bool]: Grams (the midpoint for ranges) and whether a number was found
+    """
+    numbers = _NUMBER_RE.findall(value or "")
+    if not numbers:
+        return 0.0, False
+    if len(numbers) >= 2 and "-" in value:
+        return (float(numbers[0]) + float(numbers[1])) / 2, True
+    return float(numbers[0]), True
+
+
+def parse_macros(suggestion: StructuredMealSuggestion) -> Tuple[List[float], int]:
+    """Macros of a suggestion in MACROS order, plus how many amounts could not be parsed."""
+    values = [float(suggestion.calories_per_serving)]
+    unparsed = 0
+    for text in (suggestion.protein_per_serving, suggestion.carbs_per_serving, suggestion.fat_per_serving):
+        grams, found = parse_grams(text)
+        unparsed += not found
+        values.append(grams)
+    return values, unparsed
+
+
+class NutritionTable:
+    """
+    Macros for a days x meals plan in one flat, row-major array of doubles.
+
+    Each meal is a row of (calories, protein, carbs, fat). With NumPy installed the buffer
+    is viewed as a (days, meals, 4) array without copying; otherwise the same totals come
+    from strided slices summed in C.
+    """
+
+    def __init__(self, days: int, meals: int):
+        self.days = days
+        self.meals = meals
+        self.values = array("d", bytes(8 * days * meals * _WIDTH))
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if np is not None else "array"
+
+    def _offset(self, day: int, meal: int) -> int:
+        return (day * self.meals + meal) * _WIDTH
+
+    def set_meal(self, day: int, meal: int, values: List[float]) -> None:
+        offset = self._offset(day, meal)
+        self.values[offset:offset + _WIDTH] = array("d", values)
+
+    def get_meal(self, day: int, meal: int) -> List[float]:
+        offset = self._offset(day, meal)
+        return self.values[offset:offset + _WIDTH].tolist()
+
+    def daily_totals(self) -> List[List[float]]:
+        """Per-day sums of each macro, as a days x 4 list."""
+        if np is not None:
+            view = np.frombuffer(self.values, dtype=np.float64).reshape(self.days, self.meals, _WIDTH)
+            return view.sum(axis=1).tolist()
+        stride = self.meals * _WIDTH
+        return [
+            [sum(self.values[day * stride + column:(day + 1) * stride:_WIDTH]) for column in range(_WIDTH)]
+            for day in range(self.days)
+        ]
+
+    def totals(self) -> List[float]:
+        """Whole-plan sums of each macro."""
+        if np is not None:
+            return np.frombuffer(self.values, dtype=np.float64).reshape(-1, _WIDTH).sum(axis=0).tolist()
+        return [sum(self.values[column::_WIDTH]) for column in range(_WIDTH)]
+
+    @staticmethod
+    def as_dict(row: List[float]) -> Dict[str, float]:
+        return {macro: round(value, 1) for macro, value in zip(MACROS, row)}
@@ -1,11 +1,37 @@
+import asyncio
+import json
+import time
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Set, Tuple
 from app.core.config import settings
-from app.models.chat import OpenRouterCompletionResponse
+from app.core.tracing import tracer
+from app.models.chat import OpenRouterCompletionResponse, StructuredMealSuggestion
 from app.services.prompt_service import PromptService
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.hedging import HedgePolicy
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy
+from app.services.token_accounting import TokenAccountant
+from app.services.upstream_pool import Upstream, UpstreamPool
 from loguru import logger
 
 
+STRUCTURED_OUTPUT_MODES = ("off", "json_schema", "tool")
+MEAL_SUGGESTION_TOOL = "submit_meal_suggestion"
+
+
+def build_meal_suggestion_schema() -> Dict[str, Any]:
+    """Derive a strict JSON Schema for StructuredMealSuggestion."""
+    schema = StructuredMealSuggestion.model_json_schema()
+    schema.pop("title", None)
+    schema.pop("description", None)
+    for field_schema in schema["properties"].values():
+        # Titles are derived from field names and only cost input tokens
+        field_schema.pop("title", None)
+    schema["required"] = list(schema["properties"])
+    schema["additionalProperties"] = False
+    return schema
+
+
 class OpenRouterService:
     """Service for interacting with OpenRouter API."""
     
@@ -14,47 +40,403 @@ class OpenRouterService:
         self.model = settings.openrouter_model
         self.base_url = settings.openrouter_base_url
         self.timeout = settings.openrouter_timeout
+        self.structured_output = settings.openrouter_structured_output
+        if self.structured_output not in STRUCTURED_OUTPUT_MODES:
+            logger.warning(f"Unknown structured output mode '{self.structured_output}', using 'off'")
+            self.structured_output = "off"
+        self.meal_schema = build_meal_suggestion_schema()
+        
+        # Models that rejected structured output requests; they use the prompt-only mode
+        self._structured_unsupported: Set[str] = set()
+        self._prompt_tokens = {mode: {"requests": 0, "prompt_tokens": 0} for mode in STRUCTURED_OUTPUT_MODES}
+        
+        # Shared upstream client, created by start() from the app lifespan
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Close tasks for lazily created clients replaced after an event loop change
+        self._retiring: Set[asyncio.Future] = set()
+        self._clients_rebound = 0
+        self._client_close_errors = 0
+        self._http2_enabled = False
+        
+        self.retry_policy = RetryPolicy(
+            max_retries=settings.openrouter_max_retries,
+            base_delay=settings.openrouter_retry_base_delay,
+            max_delay=settings.openrouter_retry_max_delay,
+            retryable_statuses=settings.openrouter_retry_status_codes,
+            budget=RetryBudget(settings.openrouter_retry_budget_ratio, settings.openrouter_retry_budget_min_per_second)
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            recovery_seconds=settings.circuit_breaker_recovery_seconds,
+            half_open_max_calls=settings.circuit_breaker_half_open_max_calls
+        )
+        
+        self.upstream_pool = UpstreamPool.from_settings(
+            settings.openrouter_upstreams,
+            default_api_key=self.api_key,
+            default_base_url=self.base_url,
+            ewma_alpha=settings.upstream_ewma_alpha,
+            cooldown_seconds=settings.upstream_cooldown_seconds
+        )
+        # Provider rate limits apply per key
+        keys = self.upstream_pool.distinct_keys
+        self.admission = AdmissionController(
+            max_concurrency=settings.upstream_max_concurrency,
+            rpm_limit=settings.upstream_rpm_limit * keys,
+            tpm_limit=settings.upstream_tpm_limit * keys,
+            max_queue=settings.upstream_max_queue,
+            max_wait_seconds=settings.upstream_max_queue_wait_seconds
+        )
+        
+        self.hedge_policy = HedgePolicy(
+            enabled=settings.hedging_enabled,
+            percentile=settings.hedge_percentile,
+            min_delay_ms=settings.hedge_min_delay_ms,
+            min_samples=settings.hedge_min_samples,
+            budget_ratio=settings.hedge_budget_ratio,
+            fallback_models=settings.openrouter_fallback_model_list,
+            measure_ratio=settings.hedge_measure_ratio
+        )
+        
+        self.token_accountant = TokenAccountant(
+            prices=settings.token_price_table,
+            session_budget=settings.token_session_budget,
+            global_budget=settings.token_global_budget,
+            window_seconds=settings.token_budget_window_seconds,
+            max_sessions=settings.token_max_tracked_sessions
+        )
+        
+        # Connection reuse counters fed by the httpcore trace hook
+        self._request_count = 0
+        self._connections_opened = 0
+        self._tls_handshakes = 0
     
-    async def generate_meal_suggestion(self, user_message: str, session_id: str = None) -> OpenRouterCompletionResponse:
-        """Generate a meal suggestion using OpenRouter API with single prompt approach."""
+    async def start(self) -> None:
+        """Create the shared, pooled upstream HTTP client."""
+        if self._client is None:
+            self._client = self._create_client()
+            logger.info(
+                f"OpenRouter client started (max_connections={settings.openrouter_max_connections}, "
+                f"keepalive={settings.openrouter_max_keepalive_connections}, http2={self._http2_enabled})"
+            )
+    
+    async def close(self) -> None:
+        """Close the shared upstream HTTP client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+            logger.info("OpenRouter client closed")
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it lazily when the lifespan did not run."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or (self._client_loop is not None and self._client_loop is not loop):
+            if self._client is not None:
+                # A lazily created client is bound to the loop that created it
+                self._retire_client(self._client, self._client_loop)
+            self._client = self._create_client()
+            self._client_loop = loop
+        return self._client
+    
+    def _retire_client(self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop) -> None:
+        """Close a client left behind by an event loop change so its pooled connections do not leak."""
+        self._clients_rebound += 1
+        logger.warning("OpenRouter client was created on another event loop; closing it and creating a new one")
+        if loop.is_running() and not loop.is_closed():
+            future = asyncio.run_coroutine_threadsafe(self._close_client(client), loop)
+        else:
+            # The old loop is gone; close what can still be closed from this one
+            future = asyncio.get_running_loop().create_task(self._close_client(client))
+        self._retiring.add(future)
+        future.add_done_callback(self._retiring.discard)
+    
+    async def _close_client(self, client: httpx.AsyncClient) -> None:
         try:
-            logger.info(f"Generating meal suggestion for user message: {user_message[:100]}...")
-            
-            # Prepare the request payload using single prompt approach
-            payload = {
-                "model": self.model,
-                "messages": PromptService.format_openrouter_messages(user_message),
-                "max_tokens": 1000,
-                "temperature": 0.7
-            }
-            
-            # Prepare headers
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:8000",
-                "X-Title": "Meal Suggestor Backend"
+            await client.aclose()
+        except Exception as e:
+            self._client_close_errors += 1
+            logger.warning(f"Failed to close replaced OpenRouter client: {str(e)}")
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Build an AsyncClient with the configured pool limits."""
+        http2 = settings.openrouter_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("openrouter_http2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
+        self._http2_enabled = http2
+        
+        limits = httpx.Limits(
+            max_connections=settings.openrouter_max_connections,
+            max_keepalive_connections=settings.openrouter_max_keepalive_connections,
+            keepalive_expiry=settings.openrouter_keepalive_expiry
+        )
+        return httpx.AsyncClient(timeout=self.timeout, limits=limits, http2=http2)
+    
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """Count new TCP connections and TLS handshakes made by the pool."""
+        if event_name == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self._tls_handshakes += 1
+    
+    def get_structured_mode(self, model: Optional[str] = None) -> str:
+        """Return the structured output mode to use for the given (default: current) model."""
+        if (model or self.model) in self._structured_unsupported:
+            return "off"
+        return self.structured_output
+    
+    def _build_payload(self, user_message: str, structured_mode: str = "off",
+                       history: Optional[List[Dict[str, str]]] = None, **overrides: Any) -> Dict[str, Any]:
+        """Build the chat completion payload using the single prompt approach."""
+        payload = {
+            "model": self.model,
+            "messages": PromptService.format_openrouter_messages(
+                user_message, structured=structured_mode != "off", history=history
+            ),
+            "max_tokens": 1000,
+            "temperature": 0.7
+        }
+        
+        if structured_mode == "json_schema":
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "meal_suggestion", "strict": True, "schema": self.meal_schema}
             }
-            
-            # Make the API request
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+        elif structured_mode == "tool":
+            payload["tools"] = [{
+                "type": "function",
+                "function": {
+                    "name": MEAL_SUGGESTION_TOOL,
+                    "description": "Return the meal suggestion",
+                    "parameters": self.meal_schema
+                }
+            }]
+            payload["tool_choice"] = {"type": "function", "function": {"name": MEAL_SUGGESTION_TOOL}}
+        
+        if structured_mode != "off":
+            # Make OpenRouter reject the request instead of silently dropping the schema
+            payload["provider"] = {"require_parameters": True}
+        
+        payload.update(overrides)
+        return payload
+    
+    def _structured_output_rejected(self, error: httpx.HTTPStatusError, structured_mode: str,
+                                    model: Optional[str] = None) -> bool:
+        """Check whether a structured output request failed because the model lacks support."""
+        if structured_mode == "off" or error.response.status_code not in (400, 404, 422):
+            return False
+        model = model or self.model
+        logger.warning(
+            f"Model {model} rejected structured output ({error.response.status_code}), "
+            f"falling back to prompt-only mode"
+        )
+        self._structured_unsupported.add(model)
+        return True
+    
+    async def _post_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a chat completion, retrying transient failures behind the circuit breaker."""
+        self.retry_policy.budget.record_request()
+        estimated_tokens = self._estimate_tokens(payload)
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            outcome = None
+            try:
+                # Every attempt, retries included, counts against the provider's limits
+                async with self.admission.admit(estimated_tokens) as ticket:
+                    data = await self._send_completion(payload)
+                    ticket.settle((data.get("usage") or {}).get("total_tokens"))
+                outcome = "success"
+                return data
+            except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                outcome = "failure" if self.retry_policy.is_upstream_failure(e) else "success"
+                delay = self.retry_policy.retry_delay(e, attempt, self.upstream_pool.has_available())
+                if delay is None:
+                    raise
+                error_name = type(e).__name__
+            finally:
+                # Any other exit (admission rejection, cancellation, an unreadable body) gives
+                # back the call, so a half-open probe slot cannot leak
+                if outcome == "failure":
+                    self.circuit_breaker.record_failure()
+                elif outcome == "success":
+                    self.circuit_breaker.record_success()
+                else:
+                    self.circuit_breaker.release()
+            attempt += 1
+            logger.warning(f"Retrying OpenRouter request in {delay:.2f}s (attempt {attempt}): {error_name}")
+            await asyncio.sleep(delay)
+    
+    async def _send_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single chat completion request to the best upstream over the shared connection pool."""
+        upstream = self.upstream_pool.select()
+        self.upstream_pool.acquire(upstream)
+        self._request_count += 1
+        start = time.perf_counter()
+        latency_ms = status_code = retry_after = None
+        try:
+            with tracer.span("openrouter.request", model=payload.get("model"), upstream=upstream.name) as span:
+                response = await self.client.post(
+                    f"{upstream.base_url}/chat/completions",
                     json=payload,
-                    headers=headers
+                    headers=self._build_headers(upstream),
+                    timeout=self.timeout,
+                    extensions={"trace": self._trace}
                 )
-                
+                status_code = response.status_code
+                span.set_attribute("http.status_code", status_code)
+                if status_code == 429:
+                    retry_after = RetryPolicy.parse_retry_after(response)
+                response.raise_for_status()
+                # Only successful responses feed the latency average; fast errors would attract traffic
+                latency_ms = (time.perf_counter() - start) * 1000
+                return response.json()
+        finally:
+            self.upstream_pool.release(upstream, latency_ms, status_code, retry_after)
+    
+    async def _stream_completion(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Send a streaming chat completion request and yield parsed SSE chunks."""
+        # Streams are not retried once started, but still fail fast while upstream is down
+        self.circuit_breaker.before_call()
+        outcome = "success"
+        try:
+            async with self.admission.admit(self._estimate_tokens(payload)):
+                async for chunk in self._stream_chunks(payload):
+                    yield chunk
+        except AdmissionRejected:
+            outcome = None
+            raise
+        except (httpx.HTTPStatusError, httpx.RequestError) as e:
+            if self.retry_policy.is_upstream_failure(e):
+                outcome = "failure"
+            raise
+        finally:
+            # Also runs when the consumer stops early, releasing a half-open probe slot
+            if outcome == "failure":
+                self.circuit_breaker.record_failure()
+            elif outcome == "success":
+                self.circuit_breaker.record_success()
+            else:
+                self.circuit_breaker.release()
+    
+    async def _stream_chunks(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        upstream = self.upstream_pool.select()
+        self.upstream_pool.acquire(upstream)
+        self._request_count += 1
+        start = time.perf_counter()
+        latency_ms = status_code = retry_after = None
+        try:
+            async for chunk in self._stream_from(upstream, payload):
+                if latency_ms is None:
+                    # Time to first chunk is what a streaming client waits on
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    status_code = 200
+                yield chunk
+            if status_code is None:
+                status_code = 200
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            if status_code == 429:
+                retry_after = RetryPolicy.parse_retry_after(e.response)
+            raise
+        finally:
+            self.upstream_pool.release(upstream, latency_ms, status_code, retry_after)
+    
+    async def _stream_from(self, upstream: Upstream, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        async with self.client.stream(
+            "POST",
+            f"{upstream.base_url}/chat/completions",
+            json=payload,
+            headers=self._build_headers(upstream),
+            timeout=self.timeout,
+            extensions={"trace": self._trace}
+        ) as response:
+            if response.is_error:
+                await response.aread()
                 response.raise_for_status()
-                data = response.json()
+            
+            async for line in response.aiter_lines():
+                # Skip keep-alive comments such as ": OPENROUTER PROCESSING"
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    yield json.loads(data)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed stream chunk: {data[:100]}")
+    
+    def _prompt_parts(self, payload: Dict[str, Any], user_message: str,
+                      history: Optional[List[Dict[str, str]]] = None) -> Dict[str, int]:
+        """Estimated prompt tokens per part of the prompt (about 4 characters per token)."""
+        system_chars = len(payload["messages"][0]["content"])
+        parts = {
+            "persona": len(PromptService.DIETICIAN_PERSONA),
+            "output_format": system_chars - len(PromptService.DIETICIAN_PERSONA),
+            "history": sum(len(message.get("content") or "") for message in history or ()),
+            "user_message": len(user_message)
+        }
+        if "response_format" in payload or "tools" in payload:
+            parts["schema_parameters"] = len(json.dumps(self.meal_schema, separators=(",", ":")))
+        return {part: chars // 4 for part, chars in parts.items() if chars > 0}
+    
+    @staticmethod
+    def _estimate_tokens(payload: Dict[str, Any]) -> int:
+        """Prompt estimate plus the completion budget, as counted against a TPM limit."""
+        return PromptService.estimate_tokens(payload.get("messages", [])) + payload.get("max_tokens", 0)
+    
+    def _build_headers(self, upstream: Optional[Upstream] = None) -> Dict[str, str]:
+        """Build the request headers for OpenRouter."""
+        api_key = upstream.api_key if upstream is not None else self.api_key
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost:8000",
+            "X-Title": "Meal Suggestor Backend"
+        }
+    
+    async def generate_meal_suggestion(self, user_message: str, session_id: str = None, model: Optional[str] = None,
+                                       history: Optional[List[Dict[str, str]]] = None) -> OpenRouterCompletionResponse:
+        """Generate a meal suggestion using OpenRouter API with single prompt approach."""
+        model = model or self.model
+        try:
+            logger.info("Generating meal suggestion for user message: {}...", user_message[:100], event="upstream.request")
+            
+            # Make the API request, retrying once without a schema if the model rejects it
+            structured_mode = self.get_structured_mode(model)
+            payload = self._build_payload(user_message, structured_mode, history, model=model)
+            self.token_accountant.check_budget(session_id, PromptService.estimate_tokens(payload["messages"]))
+            try:
+                data = await self._post_completion(payload)
+            except httpx.HTTPStatusError as e:
+                if not self._structured_output_rejected(e, structured_mode, model):
+                    raise
+                structured_mode = "off"
+                payload = self._build_payload(user_message, structured_mode, history, model=model)
+                data = await self._post_completion(payload)
             
             # Create and return the OpenRouter completion response
             completion_response = OpenRouterCompletionResponse(**data)
+            completion_response.structured_output = None if structured_mode == "off" else structured_mode
+            self._record_prompt_tokens(structured_mode, completion_response.usage)
+            self.token_accountant.record(
+                completion_response.model or model, session_id, completion_response.usage,
+                self._prompt_parts(payload, user_message, history)
+            )
             
-            logger.info(f"Successfully generated meal suggestion: {completion_response.suggestion_id}")
+            logger.info("Successfully generated meal suggestion: {}", completion_response.suggestion_id, event="upstream.response")
             return completion_response
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error from OpenRouter API: {e.response.status_code} - {e.response.text}")
+            # Upstream error bodies can be large; the log filter caps the message length
+            logger.error("HTTP error from OpenRouter API: {} - {}", e.response.status_code, e.response.text)
             raise Exception(f"OpenRouter API error: {e.response.status_code}")
             
         except httpx.TimeoutException:
@@ -65,10 +447,193 @@ class OpenRouterService:
             logger.error(f"Request error to OpenRouter API: {str(e)}")
             raise Exception("Unable to connect to OpenRouter API")
             
+        except AdmissionRejected:
+            # Surfaced to the client as 503 with Retry-After
+            raise
+            
+        except CircuitOpenError as e:
+            logger.warning(f"OpenRouter circuit open, failing fast: {str(e)}")
+            raise Exception("OpenRouter API is temporarily unavailable. Please try again shortly.")
+            
         except Exception as e:
             logger.error(f"Unexpected error generating meal suggestion: {str(e)}")
             raise Exception("Failed to generate meal suggestion. Please try again.")
     
+    async def generate_parsed_suggestion(
+        self,
+        user_message: str,
+        session_id: str = None,
+        parse: Callable[[OpenRouterCompletionResponse], Any] = None,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[OpenRouterCompletionResponse, Any]:
+        """
+        Generate and parse a meal suggestion, hedging slow calls and falling back across models.
+        
+        Args:
+            user_message (str): The user's request
+            session_id (str): Session identifier for logging
+            parse (Callable): Returns the parsed suggestion for a completion, or None if it is unusable
+            history (Optional[List[Dict[str, str]]]): Earlier session turns to send before the request
+            
+        Returns:
+            Tuple[OpenRouterCompletionResponse, Any]: The winning completion and its parsed result
+        """
+        try:
+            return await self._hedged_attempt(user_message, session_id, parse, self.model, history)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            error = e
+        
+        for model in self.hedge_policy.models_after(self.model):
+            self.hedge_policy.record_model_fallback()
+            logger.warning(f"Falling back to model {model} after error: {str(error)}")
+            try:
+                return await self._attempt_model(user_message, session_id, parse, model, history)
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                error = e
+        raise error
+    
+    async def _attempt_model(self, user_message: str, session_id: Optional[str],
+                             parse: Callable[[OpenRouterCompletionResponse], Any], model: str,
+                             history: Optional[List[Dict[str, str]]] = None) -> Tuple[OpenRouterCompletionResponse, Any]:
+        completion = await self.generate_meal_suggestion(user_message, session_id, model=model, history=history)
+        return completion, parse(completion)
+    
+    async def _hedged_attempt(self, user_message: str, session_id: Optional[str],
+                              parse: Callable[[OpenRouterCompletionResponse], Any], model: str,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[OpenRouterCompletionResponse, Any]:
+        """Race the primary call against a hedge sent once it is slower than recent calls."""
+        policy = self.hedge_policy
+        start = time.perf_counter()
+        delay = policy.hedge_delay()
+        if delay is None:
+            result = await self._attempt_model(user_message, session_id, parse, model, history)
+            if policy.enabled:
+                policy.record_latency((time.perf_counter() - start) * 1000)
+            return result
+        
+        policy.record_request()
+        primary = asyncio.ensure_future(self._attempt_model(user_message, session_id, parse, model, history))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not policy.try_hedge():
+                result = await primary
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                policy.record_latency(elapsed_ms)
+                policy.record_outcome(elapsed_ms, elapsed_ms, hedge_won=False)
+                return result
+            
+            hedge_model = policy.hedge_model(model)
+            logger.info(f"Hedging request after {delay * 1000:.0f} ms with model {hedge_model}")
+            hedge = asyncio.ensure_future(self._attempt_model(user_message, session_id, parse, hedge_model, history))
+            tasks.append(hedge)
+            
+            pending = set(tasks)
+            unparsed = None
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is primary:
+                        policy.record_latency(elapsed_ms)
+                    completion, parsed = task.result()
+                    if parsed is not None:
+                        if task is primary:
+                            policy.record_outcome(elapsed_ms, elapsed_ms, hedge_won=False)
+                        else:
+                            policy.record_outcome(elapsed_ms, None, hedge_won=True)
+                            if not primary.done() and policy.should_measure_loser():
+                                # Keep the beaten primary running to learn what hedging saved
+                                tasks.remove(primary)
+                                primary.add_done_callback(lambda done: self._record_loser(done, start))
+                        return completion, parsed
+                    unparsed = unparsed or task.result()
+            
+            policy.record_outcome(elapsed_ms, elapsed_ms, hedge_won=False)
+            if unparsed is not None:
+                return unparsed
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _record_loser(self, task: asyncio.Future, start: float) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.hedge_policy.record_loser_latency((time.perf_counter() - start) * 1000)
+    
+    async def stream_meal_suggestion(self, user_message: str, session_id: str = None,
+                                     history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream completion chunks for a meal suggestion using OpenRouter's SSE mode."""
+        try:
+            logger.info("Streaming meal suggestion for user message: {}...", user_message[:100], event="upstream.request")
+            
+            structured_mode = self.get_structured_mode()
+            payload = self._build_payload(user_message, structured_mode, history, stream=True)
+            self.token_accountant.check_budget(session_id, PromptService.estimate_tokens(payload["messages"]))
+            while True:
+                usage = None
+                completion_chars = 0
+                started = False
+                try:
+                    async for chunk in self._stream_completion(payload):
+                        started = True
+                        usage = chunk.get("usage") or usage
+                        for choice in chunk.get("choices") or ():
+                            delta = choice.get("delta") or {}
+                            completion_chars += len(delta.get("content") or "")
+                            for tool_call in delta.get("tool_calls") or ():
+                                completion_chars += len(tool_call.get("function", {}).get("arguments") or "")
+                        yield chunk
+                    return
+                except httpx.HTTPStatusError as e:
+                    # Status errors surface before the first chunk, so retrying is safe
+                    if not self._structured_output_rejected(e, structured_mode):
+                        raise
+                    structured_mode = "off"
+                    payload = self._build_payload(user_message, structured_mode, history, stream=True)
+                finally:
+                    # Also runs when the consumer stops early: the tokens were spent all the same
+                    if started:
+                        estimated = usage is None
+                        if estimated:
+                            usage = {
+                                "prompt_tokens": PromptService.estimate_tokens(payload["messages"]),
+                                "completion_tokens": completion_chars // 4
+                            }
+                        self.token_accountant.record(
+                            self.model, session_id, usage, self._prompt_parts(payload, user_message, history), estimated
+                        )
+            
+        except httpx.HTTPStatusError as e:
+            logger.error("HTTP error from OpenRouter API: {} - {}", e.response.status_code, e.response.text)
+            raise Exception(f"OpenRouter API error: {e.response.status_code}")
+            
+        except httpx.TimeoutException:
+            logger.error("Timeout error from OpenRouter API")
+            raise Exception("Request timeout - OpenRouter API took too long to respond")
+            
+        except httpx.RequestError as e:
+            logger.error(f"Request error to OpenRouter API: {str(e)}")
+            raise Exception("Unable to connect to OpenRouter API")
+            
+        except AdmissionRejected:
+            # Surfaced to the client as 503 with Retry-After
+            raise
+            
+        except CircuitOpenError as e:
+            logger.warning(f"OpenRouter circuit open, failing fast: {str(e)}")
+            raise Exception("OpenRouter API is temporarily unavailable. Please try again shortly.")
+    
     def update_config(self, **kwargs) -> None:
         """Update service configuration."""
         for key, value in kwargs.items():
@@ -81,5 +646,90 @@ class OpenRouterService:
         return {
             "model": self.model,
             "base_url": self.base_url,
-            "timeout": self.timeout
+            "timeout": self.timeout,
+            "structured_output": self.get_structured_mode()
+        }
+    
+    def _record_prompt_tokens(self, structured_mode: str, usage: Dict[str, Any]) -> None:
+        stats = self._prompt_tokens[structured_mode]
+        stats["requests"] += 1
+        stats["prompt_tokens"] += usage.get("prompt_tokens", 0) or 0
+    
+    def get_structured_output_stats(self) -> Dict[str, Any]:
+        """Get prompt token usage per structured output mode and the resulting savings."""
+        averages = {
+            mode: round(stats["prompt_tokens"] / stats["requests"], 1) if stats["requests"] else None
+            for mode, stats in self._prompt_tokens.items()
+        }
+        observed_savings = {
+            mode: round(averages["off"] - average, 1)
+            for mode, average in averages.items()
+            if mode != "off" and average is not None and averages["off"] is not None
+        }
+        
+        # Rough static estimate (4 characters per token): schema text dropped from the
+        # prompt minus the schema sent as response_format/tool parameters
+        schema_chars = len(json.dumps(self.meal_schema, separators=(",", ":")))
+        prompt_chars_saved = len(PromptService.DIETICIAN_SYSTEM_PROMPT) - len(PromptService.STRUCTURED_SYSTEM_PROMPT)
+        
+        return {
+            "mode": self.get_structured_mode(),
+            "configured_mode": self.structured_output,
+            "unsupported_models": sorted(self._structured_unsupported),
+            "requests": {mode: stats["requests"] for mode, stats in self._prompt_tokens.items()},
+            "average_prompt_tokens": averages,
+            "observed_prompt_tokens_saved": observed_savings,
+            "estimated_prompt_tokens_saved": round((prompt_chars_saved - schema_chars) / 4, 1)
+        }
+    
+    def get_upstream_stats(self) -> Dict[str, Any]:
+        """Get per-upstream (API key / base URL) load balancing statistics."""
+        return self.upstream_pool.get_stats()
+    
+    def get_hedging_stats(self) -> Dict[str, Any]:
+        """Get hedged request and model fallback statistics."""
+        return self.hedge_policy.get_stats()
+    
+    def get_token_stats(self) -> Dict[str, Any]:
+        """Get token usage, cost and budget statistics."""
+        return self.token_accountant.get_stats()
+    
+    def get_admission_stats(self) -> Dict[str, Any]:
+        """Get upstream admission control statistics."""
+        return self.admission.get_stats()
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Get retry and circuit breaker statistics."""
+        return {
+            "circuit_breaker": self.circuit_breaker.get_stats(),
+            "retries": self.retry_policy.get_stats()
+        }
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics for the shared upstream client."""
+        active_connections = 0
+        idle_connections = 0
+        
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        for connection in getattr(pool, "connections", []):
+            if connection.is_idle():
+                idle_connections += 1
+            elif not connection.is_closed():
+                active_connections += 1
+        
+        reused = max(self._request_count - self._connections_opened, 0)
+        return {
+            "client_started": self._client is not None,
+            "clients_rebound": self._clients_rebound,
+            "client_close_errors": self._client_close_errors,
+            "http2": self._http2_enabled,
+            "max_connections": settings.openrouter_max_connections,
+            "max_keepalive_connections": settings.openrouter_max_keepalive_connections,
+            "keepalive_expiry": settings.openrouter_keepalive_expiry,
+            "active_connections": active_connections,
+            "idle_connections": idle_connections,
+            "requests": self._request_count,
+            "connections_opened": self._connections_opened,
+            "tls_handshakes": self._tls_handshakes,
+            "connection_reuse_ratio": round(reused / self._request_count, 4) if self._request_count else 0.0
         }
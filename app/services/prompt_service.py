@@ -1,19 +1,92 @@
-from typing import Tuple
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.tracing import tracer
 from loguru import logger
 
 
+# GPT-style pre-tokenizer: contractions, words with their leading space, up to 3 digits,
+# punctuation runs and whitespace
+_TOKEN_PIECE_RE = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[A-Za-z]+| ?[0-9]{1,3}| ?[^\sA-Za-z0-9]+|\s+")
+
+SAMPLE_USER_MESSAGE = "I want a healthy vegetarian meal for dinner"
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Approximate a BPE tokenizer's count without its vocabulary.
+
+    Text is split the way GPT tokenizers pre-tokenize it; a word costs one token per six
+    letters, a punctuation run one per two characters, and whitespace one per run.
+    """
+    count = 0
+    for piece in _TOKEN_PIECE_RE.findall(text):
+        body = piece.lstrip(" ")
+        if not body or body.isspace():
+            count += 1
+        elif body[0].isalpha() or body[0].isdigit() or body[0] == "'":
+            count += (len(body) + 5) // 6
+        else:
+            count += (len(body) + 1) // 2
+    return count
+
+
+class PromptTemplate:
+    """
+    A system prompt compiled once at startup.
+
+    The system message is the same string on every request, so it is a byte-identical
+    prefix that providers can cache. User content only goes in the user turn. version
+    hashes the text and the message layout, so changing either invalidates cache keys.
+    """
+    
+    LAYOUT = "system,history,user"
+    
+    def __init__(self, name: str, system_prompt: str):
+        self.name = name
+        self.system_prompt = system_prompt
+        digest = hashlib.sha256(f"{self.LAYOUT}\n{system_prompt}".encode("utf-8")).hexdigest()
+        self.version = digest[:16]
+        self.system_tokens = approximate_tokens(system_prompt)
+    
+    def messages(self, user_message: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """Lay out the static system prompt, any earlier session turns and the new request."""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            *(history or ()),
+            {"role": "user", "content": user_message}
+        ]
+    
+    def token_report(self, sample_message: str = SAMPLE_USER_MESSAGE) -> Dict[str, Any]:
+        """Approximate token counts of the static prefix and of a request using it."""
+        messages = self.messages(sample_message)
+        # Chat formats add a few tokens of framing per message
+        request_tokens = sum(approximate_tokens(message["content"]) + 4 for message in messages)
+        return {
+            "version": self.version,
+            "system_chars": len(self.system_prompt),
+            "system_tokens": self.system_tokens,
+            "sample_request_tokens": request_tokens,
+            "static_prefix_share": round((self.system_tokens + 4) / request_tokens, 4)
+        }
+
+
 class PromptService:
     """Service for managing prompt templates."""
     
-    # Dietician prompt template with JSON output request
-    DIETICIAN_SYSTEM_PROMPT = (
+    DIETICIAN_PERSONA = (
         "You are an expert dietician with extensive knowledge of nutrition, "
         "meal planning, and dietary requirements. Provide helpful, accurate, "
         "and personalized meal suggestions based on user preferences, dietary "
         "restrictions, and nutritional needs. Be specific about ingredients, "
-        "cooking methods, and nutritional benefits.\n\n"
+        "cooking methods, and nutritional benefits."
+    )
+    
+    # Dietician prompt template with JSON output request
+    DIETICIAN_SYSTEM_PROMPT = (
+        DIETICIAN_PERSONA + "\n\n"
         "IMPORTANT: You must respond with a valid JSON object in the following format:\n"
-        '{{\n'
+        '{\n'
         '  "meal_name": "string",\n'
         '  "description": "string",\n'
         '  "ingredients": ["list of ingredients"],\n'
@@ -29,36 +102,71 @@ class PromptService:
         '  "protein_per_serving": "string (e.g., 25g)",\n'
         '  "carbs_per_serving": "string (e.g., 45g)",\n'
         '  "fat_per_serving": "string (e.g., 12g)"\n'
-        '}}\n\n'
-        "User's request: {user_message}"
+        '}'
     )
     
+    # Structured output mode: the schema is sent as response_format or a tool definition
+    STRUCTURED_SYSTEM_PROMPT = (
+        DIETICIAN_PERSONA + " Respond only with the meal suggestion object."
+    )
+    
+    _templates: Dict[bool, PromptTemplate] = {}
+    
+    @classmethod
+    def compile_templates(cls) -> Dict[bool, PromptTemplate]:
+        """Compile the prompt-only and structured output templates, keyed by structured."""
+        if not cls._templates:
+            cls._templates = {
+                False: PromptTemplate("dietician", cls.DIETICIAN_SYSTEM_PROMPT),
+                True: PromptTemplate("dietician_structured", cls.STRUCTURED_SYSTEM_PROMPT)
+            }
+            for template in cls._templates.values():
+                logger.info(
+                    f"Compiled prompt template {template.name} (version {template.version}, "
+                    f"~{template.system_tokens} system tokens)"
+                )
+        return cls._templates
+    
+    @classmethod
+    def get_template(cls, structured: bool = False) -> PromptTemplate:
+        """Get the compiled template for prompt-only or structured output mode."""
+        return (cls._templates or cls.compile_templates())[structured]
+    
+    @classmethod
+    def get_prompt_version(cls, structured: bool = False) -> str:
+        """Get a short hash identifying the prompt template and layout in use."""
+        return cls.get_template(structured).version
+    
     @classmethod
-    def get_dietician_prompt(cls, user_message: str) -> str:
-        """Get the formatted dietician prompt with user message."""
-        return cls.DIETICIAN_SYSTEM_PROMPT.format(user_message=user_message)
+    def get_dietician_prompt(cls) -> str:
+        """Get the static dietician system prompt; the user's request is sent as its own turn."""
+        return cls.get_template(False).system_prompt
+    
+    @classmethod
+    def get_token_report(cls) -> Dict[str, Any]:
+        """Get approximate token counts per compiled template, to track input-token reduction."""
+        return {template.name: template.token_report() for template in cls.compile_templates().values()}
+    
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+        """Rough prompt token count (about 4 characters per token plus per-message overhead)."""
+        return sum(len(message.get("content") or "") // 4 + 4 for message in messages)
     
     @classmethod
     def validate_user_message(cls, message: str) -> Tuple[bool, str]:
         """Validate user message input."""
-        if not message or not message.strip():
-            return False, "Message cannot be empty"
-        
-        if len(message) > 1000:
-            return False, "Message too long (max 1000 characters)"
-        
-        return True, ""
+        with tracer.span("prompt.validate"):
+            if not message or not message.strip():
+                return False, "Message cannot be empty"
+            
+            if len(message) > 1000:
+                return False, "Message too long (max 1000 characters)"
+            
+            return True, ""
     
     @classmethod
-    def format_openrouter_messages(cls, user_message: str) -> list[dict]:
-        """Format messages for OpenRouter API using single system prompt approach."""
-        return [
-            {
-                "role": "system",
-                "content": cls.get_dietician_prompt(user_message)
-            },
-            {
-                "role": "user", 
-                "content": user_message
-            }
-        ]
+    def format_openrouter_messages(cls, user_message: str, structured: bool = False,
+                                   history: Optional[List[Dict[str, str]]] = None) -> list[dict]:
+        """Format messages for OpenRouter API, with any earlier session turns before the new request."""
+        with tracer.span("prompt.format"):
+            return cls.get_template(structured).messages(user_message, history)
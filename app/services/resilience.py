@@ -0,0 +1,218 @@
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Iterable, Optional
+import httpx
+from app.core.metrics import metrics
+from loguru import logger
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open recovery probes."""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float, half_open_max_calls: int = 1,
+                 name: str = "openrouter"):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+
+        self._state_gauge = metrics.gauge("upstream_circuit_state", "Circuit state (0 closed, 1 half open, 2 open)", {"upstream": name})
+        self._rejections = metrics.counter("upstream_circuit_rejections_total", "Calls rejected by an open circuit", {"upstream": name})
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        logger.warning(f"Circuit breaker '{self.name}' {self._state} -> {state}")
+        self._state = state
+        self._state_gauge.set(self._STATE_VALUES[state])
+        metrics.counter(
+            "upstream_circuit_transitions_total", "Circuit breaker state transitions", {"upstream": self.name, "to": state}
+        ).inc()
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == self.HALF_OPEN:
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+        else:
+            self._consecutive_failures = 0
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError."""
+        state = self.state
+        if state == self.OPEN:
+            self._rejections.inc()
+            raise CircuitOpenError(self.recovery_seconds - (time.monotonic() - self._opened_at))
+        if state == self.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                self._rejections.inc()
+                raise CircuitOpenError(0.0)
+            self._half_open_in_flight += 1
+
+    def release(self) -> None:
+        """Give back an admitted call that never reached upstream."""
+        if self._state == self.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def record_success(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.half_open_max_calls:
+                self._transition(self.CLOSED)
+        else:
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._transition(self.OPEN)
+            return
+        self._consecutive_failures += 1
+        if self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_seconds": self.recovery_seconds,
+            "rejected_calls": self._rejections.value
+        }
+
+
+class RetryBudget:
+    """Cap retries to a fraction of recent requests so retries cannot amplify an outage."""
+
+    def __init__(self, ratio: float, min_retries_per_second: float, window_seconds: float = 10.0):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window_seconds = window_seconds
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget if any is left."""
+        now = time.monotonic()
+        self._trim(now)
+        allowed = max(self.min_retries_per_second * self.window_seconds, self.ratio * len(self._requests))
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+class RetryPolicy:
+    """Decide whether and when to retry a failed upstream call."""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float,
+                 retryable_statuses: Iterable[int], budget: RetryBudget):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable_statuses = frozenset(retryable_statuses)
+        self.budget = budget
+
+        self._retries = metrics.counter("upstream_retries_total", "Upstream calls retried")
+        self._budget_exhausted = metrics.counter("upstream_retry_budget_exhausted_total", "Retries skipped by the retry budget")
+
+    def is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.retryable_statuses
+        return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+    @staticmethod
+    def is_upstream_failure(error: Exception) -> bool:
+        """Whether the error says upstream is unhealthy (counts against the circuit breaker)."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+    @staticmethod
+    def parse_retry_after(response: httpx.Response) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date."""
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def retry_delay(self, error: Exception, attempt: int, alternate_upstream: bool = False) -> Optional[float]:
+        """
+        Seconds to wait before retrying, or None if the error must be raised.
+
+        Args:
+            error (Exception): Error raised by the failed attempt
+            attempt (int): Number of retries already made for this call
+            alternate_upstream (bool): Whether another, unthrottled upstream can take the retry
+
+        Returns:
+            Optional[float]: Delay with full jitter, or the server's Retry-After if given
+        """
+        if attempt >= self.max_retries or not self.is_retryable(error):
+            return None
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = self.parse_retry_after(error.response)
+            if error.response.status_code == 429 and alternate_upstream:
+                # Retry-After applies to the throttled key; another key can go right away
+                retry_after = None
+            if retry_after is not None:
+                if retry_after > self.max_delay:
+                    # Waiting that long would outlast the caller; fail now instead
+                    return None
+                delay = retry_after
+
+        if not self.budget.try_acquire():
+            self._budget_exhausted.inc()
+            return None
+        self._retries.inc()
+        return delay
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_retries": self.max_retries,
+            "retryable_statuses": sorted(self.retryable_statuses),
+            "retries": self._retries.value,
+            "retry_budget_exhausted": self._budget_exhausted.value
+        }
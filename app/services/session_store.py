@@ -0,0 +1,201 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class Turn:
+    """One message in a session's history."""
+
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role: str, content: str, tokens: int):
+        self.role = role
+        self.content = content
+        self.tokens = tokens
+
+
+class Session:
+    """A conversation: recent turns plus a summary of the turns truncated away."""
+
+    __slots__ = ("session_id", "turns", "summary", "tokens", "size", "last_access")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # A short list beats a deque here: it is far smaller per session and turns are capped
+        self.turns: List[Turn] = []
+        self.summary = ""
+        self.tokens = 0
+        self.size = 0
+        self.last_access = time.monotonic()
+
+
+# Approximate fixed costs, measured once so memory accounting is O(1) per append
+_TURN_OVERHEAD = sys.getsizeof(Turn("user", "", 0)) + sys.getsizeof("") + 8
+_SESSION_OVERHEAD = sys.getsizeof(Session("")) + sys.getsizeof([]) + 100
+
+
+def estimate_tokens(text: str) -> int:
+    """About 4 characters per token, plus per-message framing."""
+    return len(text) // 4 + 4
+
+
+class SessionStore:
+    """
+    Multi-turn session history with LRU/TTL eviction, a global memory cap and a token budget.
+
+    Lookup and append are O(1): sessions live in an OrderedDict kept in least-recently-used
+    order, so both expiry and eviction only ever look at its head.
+    """
+
+    def __init__(self, max_sessions: int = 200000, ttl_seconds: float = 1800, max_memory_bytes: int = 256 * 1024 * 1024,
+                 history_token_budget: int = 1024, max_turns: int = 20, summary_max_chars: int = 400):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.history_token_budget = history_token_budget
+        self.max_turns = max_turns
+        self.summary_max_chars = summary_max_chars
+
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._memory = 0
+
+        self.evictions = 0
+        self.expirations = 0
+        self.truncated_turns = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: Session, now: float) -> bool:
+        return now - session.last_access > self.ttl_seconds
+
+    def _remove(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._memory -= session.size
+
+    def _touch(self, session_id: str, create: bool) -> Optional[Session]:
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        if session is not None and self._expired(session, now):
+            self._remove(session_id)
+            self.expirations += 1
+            session = None
+        if session is None:
+            if not create:
+                return None
+            session = Session(session_id)
+            session.size = _SESSION_OVERHEAD + len(session_id)
+            self._sessions[session_id] = session
+            self._memory += session.size
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_access = now
+        return session
+
+    def _sweep(self) -> None:
+        """Drop expired sessions from the LRU head, then evict until within the caps."""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if not self._expired(session, now):
+                break
+            self._remove(session_id)
+            self.expirations += 1
+        while len(self._sessions) > self.max_sessions or (self._memory > self.max_memory_bytes and len(self._sessions) > 1):
+            session_id = next(iter(self._sessions))
+            self._remove(session_id)
+            self.evictions += 1
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        """Append a turn, truncating the oldest turns into the summary when over budget."""
+        session = self._touch(session_id, create=True)
+        turn = Turn(role, content, estimate_tokens(content))
+        session.turns.append(turn)
+        session.tokens += turn.tokens
+        added = _TURN_OVERHEAD + len(content)
+        session.size += added
+        self._memory += added
+
+        while len(session.turns) > 1 and (session.tokens > self.history_token_budget or len(session.turns) > self.max_turns):
+            self._truncate_oldest(session)
+        self._sweep()
+
+    def _truncate_oldest(self, session: Session) -> None:
+        dropped = session.turns.pop(0)
+        session.tokens -= dropped.tokens
+        freed = _TURN_OVERHEAD + len(dropped.content)
+        self.truncated_turns += 1
+
+        # Extractive summary: keep what the user asked for, newest last, within a fixed size
+        if dropped.role == "user":
+            note = dropped.content[:120]
+            summary = f"{session.summary}; {note}" if session.summary else note
+            summary = summary[-self.summary_max_chars:]
+            freed -= len(summary) - len(session.summary)
+            session.summary = summary
+        session.size -= freed
+        self._memory -= freed
+
+    def get_history(self, session_id: Optional[str]) -> List[Dict[str, str]]:
+        """
+        Get the session history as chat messages, oldest first.
+
+        Args:
+            session_id (Optional[str]): Session identifier; None means no history
+
+        Returns:
+            List[Dict[str, str]]: A summary note for truncated turns, then the retained turns
+        """
+        if not session_id:
+            return []
+        session = self._touch(session_id, create=False)
+        if session is None:
+            return []
+        messages = []
+        if session.summary:
+            messages.append({"role": "system", "content": f"Earlier in this conversation the user asked for: {session.summary}"})
+        messages.extend({"role": turn.role, "content": turn.content} for turn in session.turns)
+        return messages
+
+    def snapshot(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Serializable copy of a session for persistent storage."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        return {"summary": session.summary, "turns": [[turn.role, turn.content] for turn in session.turns]}
+
+    def restore(self, session_id: str, record: Dict[str, Any]) -> None:
+        """Load a session from a snapshot, e.g. after eviction or a restart."""
+        self._remove(session_id)
+        session = self._touch(session_id, create=True)
+        session.summary = record.get("summary") or ""
+        for role, content in record.get("turns", []):
+            turn = Turn(role, content, estimate_tokens(content))
+            session.turns.append(turn)
+            session.tokens += turn.tokens
+            session.size += _TURN_OVERHEAD + len(content)
+            self._memory += _TURN_OVERHEAD + len(content)
+        session.size += len(session.summary)
+        self._memory += len(session.summary)
+        self._sweep()
+
+    def delete(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed."""
+        existed = session_id in self._sessions
+        self._remove(session_id)
+        return existed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session counts, memory use and eviction counters."""
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "memory_bytes": self._memory,
+            "max_memory_bytes": self.max_memory_bytes,
+            "history_token_budget": self.history_token_budget,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "truncated_turns": self.truncated_turns
+        }
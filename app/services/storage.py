@@ -0,0 +1,299 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+from app.core.metrics import metrics
+from loguru import logger
+
+
+SESSIONS = "sessions"
+SUGGESTIONS = "suggestions"
+TABLES = (SESSIONS, SUGGESTIONS)
+
+
+class StorageBackend(ABC):
+    """
+    Key/value storage for sessions and generated suggestions.
+
+    Writes are fire-and-forget and must never block the event loop; reads are async and
+    always see writes made earlier in the same process.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def put(self, table: str, key: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        """Store a record that expires after ttl_seconds."""
+
+    @abstractmethod
+    def delete(self, table: str, key: str) -> None:
+        """Remove a record if present."""
+
+    @abstractmethod
+    async def get(self, table: str, key: str) -> Optional[Dict[str, Any]]:
+        """Read an unexpired record, or None."""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class MemoryStorage(StorageBackend):
+    """Process-local storage; sessions survive LRU eviction but not a restart."""
+
+    def __init__(self):
+        self._tables: Dict[str, Dict[str, Tuple[float, Dict[str, Any]]]] = {table: {} for table in TABLES}
+
+    def put(self, table: str, key: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        self._tables[table][key] = (time.time() + ttl_seconds, record)
+
+    def delete(self, table: str, key: str) -> None:
+        self._tables[table].pop(key, None)
+
+    async def get(self, table: str, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._tables[table].get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **{table: len(rows) for table, rows in self._tables.items()}}
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite storage in WAL mode with write-behind batching.
+
+    put() and delete() only record the latest value per key in a pending map; a writer
+    thread swaps the map out and commits it in one transaction, so repeated writes to a
+    hot session collapse into a single row update. A batch that fails to commit is merged
+    back into the pending map, where newer writes to the same key win, and retried on the
+    next tick. A write is dropped after max_write_attempts failed commits. Expired rows are
+    compacted periodically.
+    """
+
+    def __init__(self, path: str, flush_interval_seconds: float = 0.5, batch_size: int = 500,
+                 compaction_interval_seconds: float = 300, max_write_attempts: int = 3):
+        self.path = path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self.compaction_interval_seconds = compaction_interval_seconds
+        self.max_write_attempts = max_write_attempts
+
+        # (table, key) -> (expires_at, record), or None for a delete
+        self._pending: Dict[Tuple[str, str], Optional[Tuple[float, Dict[str, Any]]]] = {}
+        # The batch being committed; reads fall back to it until it is visible in SQLite
+        self._inflight: Dict[Tuple[str, str], Optional[Tuple[float, Dict[str, Any]]]] = {}
+        # Failed commits so far for writes requeued after a failed batch; only the writer thread uses it
+        self._attempts: Dict[Tuple[str, str], int] = {}
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = threading.Lock()
+
+        self.writes = 0
+        self.rows_written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.write_retries = 0
+        self.rows_compacted = 0
+        self._flush_ms = metrics.histogram("storage_flush_duration_ms", "Write-behind batch commit time")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Durable across application crashes; only an OS crash can lose the last commits
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    async def start(self) -> None:
+        """Create the schema and start the writer thread."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        with connection:
+            for table in TABLES:
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                )
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at)")
+        self._reader = connection
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"SQLite storage started (path={self.path}, flush_interval={self.flush_interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Flush pending writes and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+        self._reader.close()
+        self._reader = None
+        logger.info("SQLite storage stopped")
+
+    def _enqueue(self, table: str, key: str, value: Optional[Tuple[float, Dict[str, Any]]]) -> None:
+        with self._pending_lock:
+            self._pending[(table, key)] = value
+            pending = len(self._pending)
+        self.writes += 1
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def put(self, table: str, key: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        self._enqueue(table, key, (time.time() + ttl_seconds, record))
+
+    def delete(self, table: str, key: str) -> None:
+        self._enqueue(table, key, None)
+
+    async def get(self, table: str, key: str) -> Optional[Dict[str, Any]]:
+        """Read a record, seeing writes that have not been committed yet."""
+        with self._pending_lock:
+            for writes in (self._pending, self._inflight):
+                if (table, key) in writes:
+                    value = writes[(table, key)]
+                    return value[1] if value is not None and value[0] > time.time() else None
+        if self._reader is None:
+            return None
+        return await asyncio.to_thread(self._read, table, key)
+
+    def _read(self, table: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._reader_lock:
+            row = self._reader.execute(
+                f"SELECT data FROM {table} WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _run(self) -> None:
+        connection = self._connect()
+        next_compaction = time.monotonic() + self.compaction_interval_seconds
+        try:
+            while True:
+                self._wake.wait(self.flush_interval_seconds)
+                self._wake.clear()
+                stopping = self._stopping
+                self._flush(connection)
+                if stopping:
+                    # No later tick will retry, so retry requeued writes until they land or are dropped
+                    for _ in range(self.max_write_attempts):
+                        if not self._attempts:
+                            break
+                        self._flush(connection)
+                if time.monotonic() >= next_compaction:
+                    self._compact(connection)
+                    next_compaction = time.monotonic() + self.compaction_interval_seconds
+                if stopping:
+                    return
+        finally:
+            connection.close()
+
+    def _flush(self, connection: sqlite3.Connection) -> None:
+        with self._pending_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+
+        now = time.time()
+        upserts: Dict[str, list] = {table: [] for table in TABLES}
+        deletes: Dict[str, list] = {table: [] for table in TABLES}
+        for (table, key), value in batch.items():
+            if value is None:
+                deletes[table].append((key,))
+            else:
+                upserts[table].append((key, json.dumps(value[1], default=str), now, value[0]))
+
+        start = time.perf_counter()
+        try:
+            with connection:
+                for table in TABLES:
+                    if upserts[table]:
+                        connection.executemany(
+                            f"INSERT INTO {table} (key, data, updated_at, expires_at) VALUES (?, ?, ?, ?) "
+                            f"ON CONFLICT(key) DO UPDATE SET data = excluded.data, "
+                            f"updated_at = excluded.updated_at, expires_at = excluded.expires_at",
+                            upserts[table]
+                        )
+                    if deletes[table]:
+                        connection.executemany(f"DELETE FROM {table} WHERE key = ?", deletes[table])
+        except sqlite3.Error as e:
+            self._requeue(batch, e)
+            return
+        finally:
+            with self._pending_lock:
+                self._inflight = {}
+        for key in batch:
+            self._attempts.pop(key, None)
+        self._flush_ms.observe((time.perf_counter() - start) * 1000)
+        self.batches += 1
+        self.rows_written += len(batch)
+
+    def _requeue(self, batch: Dict[Tuple[str, str], Optional[Tuple[float, Dict[str, Any]]]], error: Exception) -> None:
+        """Merge a failed batch back into the pending map, dropping writes that used up their attempts."""
+        requeued = dropped = 0
+        with self._pending_lock:
+            for key, value in batch.items():
+                attempts = self._attempts.pop(key, 0) + 1
+                if key in self._pending:
+                    # A newer write to the same key supersedes the failed one
+                    continue
+                if attempts >= self.max_write_attempts:
+                    dropped += 1
+                    continue
+                self._pending[key] = value
+                self._attempts[key] = attempts
+                requeued += 1
+        self.write_retries += requeued
+        self.write_errors += dropped
+        if dropped:
+            logger.error(f"Storage batch of {len(batch)} writes failed, dropping {dropped} after {self.max_write_attempts} attempts: {str(error)}")
+        else:
+            logger.warning(f"Storage batch of {len(batch)} writes failed, retrying: {str(error)}")
+
+    def _compact(self, connection: sqlite3.Connection) -> None:
+        """Delete expired rows and truncate the WAL file."""
+        try:
+            with connection:
+                removed = sum(
+                    connection.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (time.time(),)).rowcount
+                    for table in TABLES
+                )
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.warning(f"Storage compaction failed: {str(e)}")
+            return
+        self.rows_compacted += removed
+        if removed:
+            logger.info(f"Storage compaction removed {removed} expired rows")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get write-behind queue and batch statistics."""
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "pending_writes": pending,
+            "writes": self.writes,
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.rows_written / self.batches, 2) if self.batches else 0.0,
+            "write_errors": self.write_errors,
+            "write_retries": self.write_retries,
+            "rows_compacted": self.rows_compacted,
+            "flush_ms": self._flush_ms.summary()
+        }
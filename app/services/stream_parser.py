@@ -0,0 +1,145 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.chat import StructuredMealSuggestion
+
+
+# A parser event: ("field", name, None, value) or ("item", name, index, value)
+StreamEvent = Tuple[str, str, Optional[int], Any]
+
+
+class IncrementalMealParser:
+    """
+    Incrementally extracts completed StructuredMealSuggestion fields from a token stream.
+
+    Text before the first top-level "{" (prose, code fences) is skipped. Scalar fields
+    are emitted once their value is complete; items of top-level arrays are emitted
+    one by one as each item closes.
+    """
+
+    FIELDS = set(StructuredMealSuggestion.model_fields)
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []
+        self._scalar: List[str] = []
+        self._key: Optional[str] = None
+        self._after_colon = False
+        self._array_key: Optional[str] = None
+        self._array_index = 0
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """
+        Consume the next chunk of model output.
+
+        Args:
+            chunk (str): Newly received completion text
+
+        Returns:
+            List[StreamEvent]: Events for fields and array items completed by this chunk
+        """
+        events: List[StreamEvent] = []
+        for char in chunk:
+            if self.done:
+                break
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._string.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    self._string.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    self._finish_string(events)
+                else:
+                    self._string.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char == "{" or char == "[":
+                if char == "[" and self._depth == 1 and self._after_colon:
+                    self._array_key = self._key
+                    self._array_index = 0
+                self._depth += 1
+            elif char == "}" or char == "]":
+                self._flush_scalar(events)
+                if self._depth == 2:
+                    self._array_key = None
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+            elif char == ":":
+                if self._depth == 1:
+                    self._after_colon = True
+            elif char == ",":
+                self._flush_scalar(events)
+                if self._depth == 1:
+                    self._after_colon = False
+                    self._key = None
+            elif not char.isspace():
+                self._scalar.append(char)
+
+        return events
+
+    def _finish_string(self, events: List[StreamEvent]) -> None:
+        raw = "".join(self._string)
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+
+        if self._depth == 1:
+            if not self._after_colon:
+                self._key = value
+            else:
+                self._emit_field(events, value)
+        elif self._depth == 2 and self._array_key is not None:
+            self._emit_item(events, value)
+
+    def _flush_scalar(self, events: List[StreamEvent]) -> None:
+        if not self._scalar:
+            return
+        raw = "".join(self._scalar)
+        self._scalar = []
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+
+        if self._depth == 1 and self._after_colon:
+            self._emit_field(events, value)
+        elif self._depth == 2 and self._array_key is not None:
+            self._emit_item(events, value)
+
+    def _emit_field(self, events: List[StreamEvent], value: Any) -> None:
+        if self._key in self.FIELDS:
+            events.append(("field", self._key, None, value))
+
+    def _emit_item(self, events: List[StreamEvent], value: Any) -> None:
+        if self._array_key in self.FIELDS:
+            events.append(("item", self._array_key, self._array_index, value))
+        self._array_index += 1
+
+    @staticmethod
+    def events_from_suggestion(suggestion: StructuredMealSuggestion) -> List[StreamEvent]:
+        """Build the event sequence for an already complete suggestion (e.g. a cache hit)."""
+        events: List[StreamEvent] = []
+        for name, value in suggestion.model_dump().items():
+            if isinstance(value, list):
+                events.extend(("item", name, index, item) for index, item in enumerate(value))
+            else:
+                events.append(("field", name, None, value))
+        return events
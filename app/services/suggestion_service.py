@@ -0,0 +1,345 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.core.metrics import metrics
+from app.core.tracing import tracer
+from app.models.chat import CachedSuggestion, SuggestionResult
+from app.services.cache_service import SuggestionCache, TTLLRUCache
+from app.services.coalescer import RequestCoalescer
+from app.services.journal import Journal, prompt_hash
+from app.services.json_parser import JSONParser
+from app.services.openrouter_service import OpenRouterService
+from app.services.prompt_service import PromptService
+from app.services.session_store import SessionStore
+from app.services.storage import SESSIONS, SUGGESTIONS, StorageBackend
+from app.services.stream_parser import IncrementalMealParser
+from loguru import logger
+
+
+UPSTREAM_LATENCY = metrics.histogram("suggest_stage_duration_ms", "Per-stage /suggest latency", {"stage": "upstream"})
+PARSE_LATENCY = metrics.histogram("suggest_stage_duration_ms", "Per-stage /suggest latency", {"stage": "parse"})
+FALLBACKS = metrics.counter("suggest_fallback_total", "Suggestions served in fallback format after parsing failed")
+
+
+class SuggestionService:
+    """Service that resolves meal suggestions through the cache and OpenRouter."""
+
+    def __init__(
+        self,
+        openrouter_service: OpenRouterService,
+        cache: Optional[SuggestionCache] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        session_store: Optional[SessionStore] = None,
+        storage: Optional[StorageBackend] = None,
+        suggestion_retention_seconds: float = 7 * 24 * 3600,
+        suggestion_read_cache_entries: int = 1024,
+        journal: Optional[Journal] = None
+    ):
+        self.openrouter_service = openrouter_service
+        self.cache = cache
+        self.coalescer = coalescer
+        self.session_store = session_store
+        self.storage = storage
+        self.suggestion_retention_seconds = suggestion_retention_seconds
+        self.journal = journal
+        # Read-through cache in front of storage for re-fetching suggestions by ID
+        self.suggestion_reads = TTLLRUCache(suggestion_read_cache_entries, suggestion_retention_seconds)
+
+    def cache_key(self, user_message: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+        """Build the cache key for a user message under the current model, prompt and session history."""
+        version = PromptService.get_prompt_version(structured=self.openrouter_service.get_structured_mode() != "off")
+        if history:
+            # Follow-ups only share cache entries (and coalesce) with identical conversations
+            digest = hashlib.sha256(json.dumps(history, sort_keys=True).encode("utf-8")).hexdigest()
+            version = f"{version}:{digest[:16]}"
+        return SuggestionCache.make_key(user_message, self.openrouter_service.model, version)
+
+    async def get_history(self, session_id: Optional[str]) -> List[Dict[str, str]]:
+        """Get the prompt history for a session, loading it from storage if it is not in memory."""
+        if self.session_store is None or not session_id:
+            return []
+        history = self.session_store.get_history(session_id)
+        if not history and self.storage is not None:
+            record = await self.storage.get(SESSIONS, session_id)
+            if record is not None:
+                self.session_store.restore(session_id, record)
+                history = self.session_store.get_history(session_id)
+        return history
+
+    def forget_session(self, session_id: str) -> bool:
+        """Delete a session from memory and storage; returns whether it was in memory."""
+        if self.storage is not None:
+            self.storage.delete(SESSIONS, session_id)
+        return self.session_store is not None and self.session_store.delete(session_id)
+
+    def remember(self, session_id: Optional[str], user_message: str, result: SuggestionResult) -> None:
+        """Record the exchange in the session, keeping only a compact summary of the suggestion."""
+        if self.session_store is None or not session_id:
+            return
+        suggestion = result.suggestion
+        self.session_store.append(session_id, "user", user_message)
+        self.session_store.append(session_id, "assistant", f"Suggested {suggestion.meal_name}: {suggestion.description[:160]}")
+        if self.storage is not None:
+            self.storage.put(SESSIONS, session_id, self.session_store.snapshot(session_id), self.session_store.ttl_seconds)
+
+    def save_suggestion(self, result: SuggestionResult, user_message: str, session_id: Optional[str], model: str) -> None:
+        """Keep a generated suggestion so clients can re-fetch it by ID without another LLM call."""
+        record = {
+            **result.model_dump(mode="json", exclude={"cached", "coalesced"}),
+            "message": user_message,
+            "session_id": session_id,
+            "model": model
+        }
+        self.suggestion_reads.set(result.suggestion_id, record)
+        if self.storage is not None:
+            self.storage.put(SUGGESTIONS, result.suggestion_id, record, self.suggestion_retention_seconds)
+
+    async def get_stored_suggestion(self, suggestion_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a stored suggestion in the read cache, then in storage."""
+        record = self.suggestion_reads.get(suggestion_id)
+        if record is None and self.storage is not None:
+            record = await self.storage.get(SUGGESTIONS, suggestion_id)
+            if record is not None:
+                self.suggestion_reads.set(suggestion_id, record)
+        return record
+
+    def record_call(self, key: str, user_message: str, history: List[Dict[str, str]], suggestion_id: str,
+                    source: str, **fields: Any) -> None:
+        """
+        Append a resolved suggestion to the journal for offline replay.
+
+        Every request is recorded so replays see the real mix of repeats; only upstream calls
+        (source "upstream") carry the model, usage, upstream latency and raw completion.
+        """
+        if self.journal is None:
+            return
+        self.journal.record({
+            "timestamp": time.time(),
+            "source": source,
+            "suggestion_id": suggestion_id,
+            "prompt": SuggestionCache.normalize_message(user_message),
+            "prompt_hash": prompt_hash([*history, {"role": "user", "content": user_message}]),
+            "cache_key": key,
+            "history_turns": len(history),
+            **fields
+        })
+
+    async def get_suggestion(self, user_message: str, session_id: str = None,
+                             keep_history: bool = True) -> SuggestionResult:
+        """
+        Return a parsed meal suggestion in the context of the session's earlier turns.
+
+        keep_history=False is for session ids generated for a one-off request: the exchange
+        is neither loaded from nor recorded in the session store and storage.
+        """
+        history_session = session_id if keep_history else None
+        history = await self.get_history(history_session)
+        result = await self._resolve_suggestion(user_message, session_id, history)
+        self.remember(history_session, user_message, result)
+        return result
+
+    async def _resolve_suggestion(self, user_message: str, session_id: Optional[str],
+                                  history: List[Dict[str, str]]) -> SuggestionResult:
+        """Serve a suggestion from cache, a coalesced in-flight call or a fresh upstream call."""
+        key = self.cache_key(user_message, history)
+
+        if self.cache is not None:
+            with tracer.span("cache.lookup") as span:
+                entry = await self.cache.get(key)
+                span.set_attribute("cache.hit", entry is not None)
+            if entry is not None:
+                logger.info("Serving cached meal suggestion {} for session: {}", entry.suggestion_id, session_id, event="cache.hit")
+                self.record_call(key, user_message, history, entry.suggestion_id, "cache")
+                return SuggestionResult(
+                    suggestion=entry.suggestion,
+                    suggestion_id=entry.suggestion_id,
+                    timestamp=entry.timestamp,
+                    cached=True
+                )
+
+        if self.coalescer is None:
+            return await self._fetch_suggestion(key, user_message, session_id, history)
+
+        # Identical concurrent requests share one upstream call
+        result, coalesced = await self.coalescer.run(
+            key, lambda: self._fetch_suggestion(key, user_message, session_id, history)
+        )
+        if coalesced:
+            logger.info("Coalesced meal suggestion request onto {} for session: {}", result.suggestion_id, session_id, event="coalesce.hit")
+            self.record_call(key, user_message, history, result.suggestion_id, "coalesced")
+            return result.model_copy(update={"coalesced": True})
+        return result
+
+    async def _fetch_suggestion(self, key: str, user_message: str, session_id: str = None,
+                                history: Optional[List[Dict[str, str]]] = None) -> SuggestionResult:
+        """Call OpenRouter, parse the completion and cache structured results."""
+        # Parsing happens per candidate so a hedged call can be won by the first valid suggestion
+        with UPSTREAM_LATENCY.time() as timer:
+            completion, structured_suggestion = await self.openrouter_service.generate_parsed_suggestion(
+                user_message=user_message,
+                session_id=session_id,
+                parse=self._parse_completion,
+                history=history
+            )
+        self.record_call(
+            key, user_message, history or [], completion.suggestion_id, "upstream",
+            model=completion.model,
+            structured_output=completion.structured_output,
+            stream=False,
+            upstream_ms=round((time.perf_counter() - timer.start) * 1000, 2),
+            usage=completion.usage,
+            parsed=structured_suggestion is not None,
+            completion=completion.content
+        )
+
+        if structured_suggestion is None:
+            FALLBACKS.inc()
+            logger.warning(f"JSON parsing failed for suggestion {completion.suggestion_id}, using fallback")
+            result = SuggestionResult(
+                suggestion=JSONParser.create_fallback_response(user_message),
+                suggestion_id=completion.suggestion_id,
+                timestamp=completion.timestamp,
+                structured=False,
+                raw_content=completion.content
+            )
+            self.save_suggestion(result, user_message, session_id, completion.model)
+            return result
+
+        if self.cache is not None:
+            await self.cache.set(key, CachedSuggestion(
+                suggestion=structured_suggestion,
+                suggestion_id=completion.suggestion_id,
+                timestamp=completion.timestamp,
+                model=completion.model
+            ))
+
+        result = SuggestionResult(
+            suggestion=structured_suggestion,
+            suggestion_id=completion.suggestion_id,
+            timestamp=completion.timestamp
+        )
+        self.save_suggestion(result, user_message, session_id, completion.model)
+        return result
+
+    @staticmethod
+    def _parse_completion(completion):
+        with PARSE_LATENCY.time():
+            return JSONParser.parse_completion(completion)
+
+    async def stream_suggestion(self, user_message: str, session_id: str = None,
+                                keep_history: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a meal suggestion as field events followed by the validated result.
+
+        Yields ("field" | "item", payload) tuples while the completion streams in and
+        finishes with ("complete", SuggestionResult). Cache hits replay the stored fields.
+        keep_history works as in get_suggestion.
+        """
+        history_session = session_id if keep_history else None
+        history = await self.get_history(history_session)
+        key = self.cache_key(user_message, history)
+
+        if self.cache is not None:
+            entry = await self.cache.get(key)
+            if entry is not None:
+                logger.info("Streaming cached meal suggestion {} for session: {}", entry.suggestion_id, session_id, event="cache.hit")
+                self.record_call(key, user_message, history, entry.suggestion_id, "cache", stream=True)
+                for event in IncrementalMealParser.events_from_suggestion(entry.suggestion):
+                    yield self._event_payload(event)
+                result = SuggestionResult(
+                    suggestion=entry.suggestion,
+                    suggestion_id=entry.suggestion_id,
+                    timestamp=entry.timestamp,
+                    cached=True
+                )
+                self.remember(history_session, user_message, result)
+                yield "complete", result
+                return
+
+        parser = IncrementalMealParser()
+        content_parts = []
+        suggestion_id = None
+        created = None
+        usage = None
+        model = self.openrouter_service.model
+        start = time.perf_counter()
+
+        async for chunk in self.openrouter_service.stream_meal_suggestion(user_message, session_id, history):
+            suggestion_id = suggestion_id or chunk.get("id")
+            created = created or chunk.get("created")
+            model = chunk.get("model", model)
+            # OpenRouter reports usage on the final chunk
+            usage = chunk.get("usage") or usage
+
+            choices = chunk.get("choices") or [{}]
+            delta_message = choices[0].get("delta") or {}
+            delta = delta_message.get("content") or ""
+            if not delta and delta_message.get("tool_calls"):
+                # Tool mode streams the suggestion as function call arguments
+                delta = delta_message["tool_calls"][0].get("function", {}).get("arguments") or ""
+            if not delta:
+                continue
+            content_parts.append(delta)
+            for event in parser.feed(delta):
+                yield self._event_payload(event)
+
+        content = "".join(content_parts)
+        suggestion_id = suggestion_id or key[:32]
+        timestamp = datetime.fromtimestamp(created) if created else datetime.now()
+
+        upstream_ms = (time.perf_counter() - start) * 1000
+
+        with PARSE_LATENCY.time():
+            structured_suggestion = JSONParser.parse_meal_suggestion(content)
+        structured_mode = self.openrouter_service.get_structured_mode()
+        self.record_call(
+            key, user_message, history, suggestion_id, "upstream",
+            model=model,
+            structured_output=None if structured_mode == "off" else structured_mode,
+            stream=True,
+            upstream_ms=round(upstream_ms, 2),
+            usage=usage,
+            parsed=structured_suggestion is not None,
+            completion=content
+        )
+        if structured_suggestion is None:
+            FALLBACKS.inc()
+            logger.warning(f"JSON parsing failed for streamed suggestion {suggestion_id}, using fallback")
+            result = SuggestionResult(
+                suggestion=JSONParser.create_fallback_response(user_message),
+                suggestion_id=suggestion_id,
+                timestamp=timestamp,
+                structured=False,
+                raw_content=content
+            )
+            self.save_suggestion(result, user_message, session_id, model)
+            self.remember(history_session, user_message, result)
+            yield "complete", result
+            return
+
+        if self.cache is not None:
+            await self.cache.set(key, CachedSuggestion(
+                suggestion=structured_suggestion,
+                suggestion_id=suggestion_id,
+                timestamp=timestamp,
+                model=model
+            ))
+
+        result = SuggestionResult(
+            suggestion=structured_suggestion,
+            suggestion_id=suggestion_id,
+            timestamp=timestamp
+        )
+        self.save_suggestion(result, user_message, session_id, model)
+        self.remember(history_session, user_message, result)
+        yield "complete", result
+
+    @staticmethod
+    def _event_payload(event: Tuple[str, str, Optional[int], Any]) -> Tuple[str, Dict[str, Any]]:
+        kind, field, index, value = event
+        payload = {"field": field, "value": value}
+        if index is not None:
+            payload["index"] = index
+        return kind, payload
@@ -0,0 +1,226 @@
+import heapq
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.metrics import metrics
+from app.services.admission import AdmissionRejected
+from loguru import logger
+
+
+BUCKET_SECONDS = 60
+REPORTED_WINDOWS_MINUTES = (1, 5, 15, 60)
+
+
+class TokenBudgetExceeded(AdmissionRejected):
+    """Raised before an upstream call that would take a session or the service past its token budget."""
+
+    def __init__(self, reason: str, retry_after: float, used: int, budget: int):
+        Exception.__init__(self, f"Token budget exhausted ({reason}: {used}/{budget}), retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+        self.used = used
+        self.budget = budget
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+class TokenAccountant:
+    """
+    Aggregates upstream token usage per model, per session and per minute, with an estimated cost.
+
+    Usage comes from each completion's usage block. Cost is OpenRouter's own usage.cost when
+    present, otherwise priced from prices: model -> (USD per million prompt tokens, USD per
+    million completion tokens), with "*" as the default for unlisted models.
+
+    Budgets (0 disables) are checked before an upstream call against the tokens already used
+    in the last window_seconds: session_budget per session, counted from its first call in the
+    window, and global_budget across all calls over a rolling window of one-minute buckets.
+    Calls already in flight are not reserved, so concurrent calls can overshoot a budget by
+    their own usage.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None, session_budget: int = 0,
+                 global_budget: int = 0, window_seconds: int = 3600, max_sessions: int = 100000):
+        self.prices = prices or {}
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.window_seconds = window_seconds
+        self.max_sessions = max_sessions
+
+        self._models: Dict[str, Dict[str, float]] = {}
+        # session id -> totals plus the start of its budget window; least recently used first
+        self._sessions: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        # Ring of one-minute buckets: [minute, requests, prompt tokens, completion tokens, cost]
+        minutes = max(max(REPORTED_WINDOWS_MINUTES), math.ceil(window_seconds / BUCKET_SECONDS))
+        self._buckets: List[List[float]] = [[-1, 0, 0, 0, 0.0] for _ in range(minutes)]
+        # Estimated prompt tokens per part of the prompt (system text, history, user message, schema)
+        self._prompt_parts: Dict[str, int] = {}
+
+        self.estimated_requests = 0
+        self.rejected = {"session": 0, "global": 0}
+
+    def price(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimated USD cost of a call from the price table (0 for unpriced models)."""
+        prompt_price, completion_price = self.prices.get(model) or self.prices.get("*") or (0.0, 0.0)
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def check_budget(self, session_id: Optional[str], estimated_tokens: int = 0) -> None:
+        """
+        Raise TokenBudgetExceeded if a call of estimated_tokens would exceed a budget.
+
+        Args:
+            session_id (Optional[str]): The calling session; None skips the session budget
+            estimated_tokens (int): Expected prompt tokens of the call about to be made
+        """
+        now = time.time()
+        if self.session_budget and session_id is not None:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session["window_start"] < self.window_seconds:
+                used = int(session["prompt_tokens"] + session["completion_tokens"])
+                if used + estimated_tokens > self.session_budget:
+                    retry_after = session["window_start"] + self.window_seconds - now
+                    raise self._reject("session", retry_after, used, self.session_budget)
+
+        if self.global_budget:
+            used = 0
+            oldest = None
+            current = int(now // BUCKET_SECONDS)
+            first = current - math.ceil(self.window_seconds / BUCKET_SECONDS) + 1
+            for bucket in self._buckets:
+                if first <= bucket[0] <= current and (bucket[2] or bucket[3]):
+                    used += int(bucket[2] + bucket[3])
+                    oldest = bucket[0] if oldest is None else min(oldest, bucket[0])
+            if used + estimated_tokens > self.global_budget:
+                # Room frees up as the oldest minute with usage leaves the window
+                retry_after = (oldest - first + 1) * BUCKET_SECONDS - (now % BUCKET_SECONDS) if oldest is not None else BUCKET_SECONDS
+                raise self._reject("global", retry_after, used, self.global_budget)
+
+    def _reject(self, scope: str, retry_after: float, used: int, budget: int) -> TokenBudgetExceeded:
+        self.rejected[scope] += 1
+        metrics.counter("token_budget_rejected_total", "Upstream calls rejected by a token budget", {"scope": scope}).inc()
+        logger.warning(f"Rejecting upstream call: {scope} token budget exhausted ({used}/{budget})")
+        return TokenBudgetExceeded(f"{scope}_token_budget", max(1.0, math.ceil(retry_after)), used, budget)
+
+    def record(self, model: str, session_id: Optional[str], usage: Optional[Dict[str, Any]],
+               prompt_parts: Optional[Dict[str, int]] = None, estimated: bool = False) -> None:
+        """
+        Add one upstream call's usage to the model, session and minute aggregates.
+
+        Args:
+            model (str): The model that served the call
+            session_id (Optional[str]): The calling session, if any
+            usage (Optional[Dict[str, Any]]): The completion's usage block
+            prompt_parts (Optional[Dict[str, int]]): Estimated prompt tokens per part of the prompt
+            estimated (bool): Whether usage was estimated locally because upstream sent none
+        """
+        usage = usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        cost = usage.get("cost")
+        cost = float(cost) if isinstance(cost, (int, float)) else self.price(model, prompt_tokens, completion_tokens)
+
+        now = time.time()
+        entries = [self._models.setdefault(model, _empty_totals())]
+        if session_id is not None:
+            session = self._sessions.get(session_id)
+            if session is None or now - session["window_start"] >= self.window_seconds:
+                session = {**_empty_totals(), "window_start": now}
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            entries.append(session)
+        for entry in entries:
+            entry["requests"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost_usd"] += cost
+
+        minute = int(now // BUCKET_SECONDS)
+        bucket = self._buckets[minute % len(self._buckets)]
+        if bucket[0] != minute:
+            bucket[:] = [minute, 0, 0, 0, 0.0]
+        bucket[1] += 1
+        bucket[2] += prompt_tokens
+        bucket[3] += completion_tokens
+        bucket[4] += cost
+
+        for part, tokens in (prompt_parts or {}).items():
+            self._prompt_parts[part] = self._prompt_parts.get(part, 0) + tokens
+        if estimated:
+            self.estimated_requests += 1
+
+        metrics.counter("llm_prompt_tokens_total", "Prompt tokens used upstream", {"model": model}).inc(prompt_tokens)
+        metrics.counter("llm_completion_tokens_total", "Completion tokens used upstream", {"model": model}).inc(completion_tokens)
+        metrics.counter("llm_cost_usd_total", "Estimated upstream cost in USD", {"model": model}).inc(cost)
+
+    def get_session_usage(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session's usage in its current budget window, or None if it has none."""
+        session = self._sessions.get(session_id)
+        if session is None or time.time() - session["window_start"] >= self.window_seconds:
+            return None
+        usage = self._format(session)
+        if self.session_budget:
+            usage["budget_remaining"] = max(0, self.session_budget - usage["total_tokens"])
+        return usage
+
+    def _window(self, minutes: int) -> Dict[str, Any]:
+        current = int(time.time() // BUCKET_SECONDS)
+        totals = _empty_totals()
+        for minute, requests, prompt_tokens, completion_tokens, cost in self._buckets:
+            if current - minutes < minute <= current:
+                totals["requests"] += requests
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["cost_usd"] += cost
+        return self._format(totals)
+
+    @staticmethod
+    def _format(totals: Dict[str, float]) -> Dict[str, Any]:
+        prompt_tokens = int(totals["prompt_tokens"])
+        completion_tokens = int(totals["completion_tokens"])
+        return {
+            "requests": int(totals["requests"]),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost_usd": round(totals["cost_usd"], 6)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get token and cost aggregates, budget state and where prompt tokens go."""
+        models = {model: self._format(totals) for model, totals in self._models.items()}
+        totals = _empty_totals()
+        for entry in self._models.values():
+            for key in totals:
+                totals[key] += entry[key]
+
+        top_sessions = heapq.nlargest(
+            10, self._sessions.items(), key=lambda item: item[1]["prompt_tokens"] + item[1]["completion_tokens"]
+        )
+        part_total = sum(self._prompt_parts.values())
+        return {
+            "totals": self._format(totals),
+            "models": models,
+            "windows": {f"{minutes}m": self._window(minutes) for minutes in REPORTED_WINDOWS_MINUTES},
+            "sessions": {
+                "tracked": len(self._sessions),
+                "top": [{"session_id": session_id, **self._format(entry)} for session_id, entry in top_sessions]
+            },
+            "budgets": {
+                "window_seconds": self.window_seconds,
+                "session": self.session_budget or None,
+                "global": self.global_budget or None,
+                "global_used": self._window(math.ceil(self.window_seconds / BUCKET_SECONDS))["total_tokens"],
+                "rejected": dict(self.rejected)
+            },
+            "prompt_breakdown": {
+                part: {"estimated_tokens": tokens, "share": round(tokens / part_total, 4)}
+                for part, tokens in sorted(self._prompt_parts.items(), key=lambda item: -item[1])
+            } if part_total else {},
+            "estimated_requests": self.estimated_requests,
+            "priced_models": sorted(self.prices)
+        }
@@ -0,0 +1,165 @@
+import random
+import time
+from typing import Any, Dict, List, Optional
+from app.core.metrics import metrics
+from loguru import logger
+
+
+class Upstream:
+    """One OpenRouter API key / base URL pair and its recent behaviour."""
+
+    __slots__ = (
+        "name", "api_key", "base_url", "ewma_ms", "in_flight", "requests", "errors",
+        "throttled", "consecutive_failures", "cooldown_until"
+    )
+
+    def __init__(self, name: str, api_key: str, base_url: str):
+        self.name = name
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.ewma_ms: Optional[float] = None
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def cooling_down(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def score(self) -> float:
+        """Expected wait if routed here: latency scaled by the calls already queued on it."""
+        # Unmeasured upstreams score 0 so each one gets tried
+        return (self.ewma_ms or 0.0) * (self.in_flight + 1)
+
+    @property
+    def masked_key(self) -> str:
+        return f"...{self.api_key[-4:]}" if len(self.api_key) > 8 else "***"
+
+
+class UpstreamPool:
+    """Spread calls across several upstreams by EWMA latency, in-flight count and 429/error cooldowns."""
+
+    def __init__(self, upstreams: List[Upstream], ewma_alpha: float = 0.3,
+                 cooldown_seconds: float = 5.0, max_cooldown_seconds: float = 60.0):
+        if not upstreams:
+            raise ValueError("UpstreamPool needs at least one upstream")
+        self.upstreams = upstreams
+        self.ewma_alpha = ewma_alpha
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+
+    @classmethod
+    def from_settings(cls, entries: str, default_api_key: str, default_base_url: str, **kwargs) -> "UpstreamPool":
+        """
+        Build a pool from "key[@base_url]" entries separated by commas.
+
+        Args:
+            entries (str): e.g. "sk-or-a,sk-or-b@http://127.0.0.1:9911/api/v1"; empty uses the defaults
+            default_api_key (str): Key used when no entries are configured
+            default_base_url (str): Base URL for entries that do not name one
+
+        Returns:
+            UpstreamPool: The configured pool
+        """
+        upstreams = []
+        for index, entry in enumerate(item.strip() for item in entries.split(",") if item.strip()):
+            api_key, _, base_url = entry.partition("@")
+            upstreams.append(Upstream(f"upstream-{index}", api_key, base_url or default_base_url))
+        if not upstreams:
+            upstreams.append(Upstream("upstream-0", default_api_key, default_base_url))
+        return cls(upstreams, **kwargs)
+
+    @property
+    def distinct_keys(self) -> int:
+        return len({upstream.api_key for upstream in self.upstreams})
+
+    def has_available(self) -> bool:
+        """Whether more than one upstream exists and at least one is not cooling down."""
+        now = time.monotonic()
+        return len(self.upstreams) > 1 and any(not upstream.cooling_down(now) for upstream in self.upstreams)
+
+    def select(self) -> Upstream:
+        """
+        Pick an upstream by power of two choices, skipping those cooling down after a 429 or error.
+
+        Comparing two random candidates favours fast, idle upstreams while still spreading
+        calls (and quota use) across keys, unlike always taking the single best score.
+        """
+        if len(self.upstreams) == 1:
+            return self.upstreams[0]
+        now = time.monotonic()
+        available = [upstream for upstream in self.upstreams if not upstream.cooling_down(now)]
+        if not available:
+            # Everything is throttled: use whichever recovers first
+            return min(self.upstreams, key=lambda upstream: upstream.cooldown_until)
+        if len(available) == 1:
+            return available[0]
+        first, second = random.sample(available, 2)
+        return first if first.score() <= second.score() else second
+
+    def acquire(self, upstream: Upstream) -> None:
+        upstream.in_flight += 1
+        upstream.requests += 1
+        metrics.counter("upstream_pool_requests_total", "Upstream calls per pool member", {"upstream": upstream.name}).inc()
+
+    def release(self, upstream: Upstream, latency_ms: Optional[float], status_code: Optional[int],
+                retry_after: Optional[float] = None) -> None:
+        """
+        Record the outcome of a call routed to upstream.
+
+        Args:
+            upstream (Upstream): The upstream that served the call
+            latency_ms (Optional[float]): Latency of a completed response; None if it never arrived
+            status_code (Optional[int]): HTTP status, or None for transport errors
+            retry_after (Optional[float]): Seconds from a Retry-After header on a 429
+        """
+        upstream.in_flight = max(0, upstream.in_flight - 1)
+        if latency_ms is not None:
+            if upstream.ewma_ms is None:
+                upstream.ewma_ms = latency_ms
+            else:
+                upstream.ewma_ms += self.ewma_alpha * (latency_ms - upstream.ewma_ms)
+
+        throttled = status_code == 429
+        failed = status_code is None or status_code >= 500
+        if not (throttled or failed):
+            upstream.consecutive_failures = 0
+            return
+
+        # Throttled or failing upstreams are taken out of rotation with exponential backoff
+        upstream.consecutive_failures += 1
+        cooldown = min(self.max_cooldown_seconds, self.cooldown_seconds * 2 ** (upstream.consecutive_failures - 1))
+        if throttled:
+            upstream.throttled += 1
+            if retry_after is not None:
+                cooldown = retry_after
+            metrics.counter("upstream_pool_throttled_total", "429 responses per pool member", {"upstream": upstream.name}).inc()
+        else:
+            upstream.errors += 1
+            metrics.counter("upstream_pool_errors_total", "Errors per pool member", {"upstream": upstream.name}).inc()
+        upstream.cooldown_until = time.monotonic() + cooldown
+        logger.warning(
+            f"Upstream {upstream.name} ({upstream.masked_key}) {'throttled' if throttled else 'failed'}, "
+            f"cooling down for {cooldown:.1f}s"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-upstream load, latency and throttling statistics."""
+        now = time.monotonic()
+        total = sum(upstream.requests for upstream in self.upstreams)
+        return {
+            upstream.name: {
+                "base_url": upstream.base_url,
+                "api_key": upstream.masked_key,
+                "ewma_latency_ms": round(upstream.ewma_ms, 2) if upstream.ewma_ms is not None else None,
+                "in_flight": upstream.in_flight,
+                "requests": upstream.requests,
+                "share": round(upstream.requests / total, 4) if total else 0.0,
+                "errors": upstream.errors,
+                "throttled": upstream.throttled,
+                "cooldown_remaining_seconds": round(max(0.0, upstream.cooldown_until - now), 2)
+            }
+            for upstream in self.upstreams
+        }
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Callable, Dict
+from fastapi import WebSocket, WebSocketDisconnect
+from app.core.metrics import metrics
+from app.models.chat import SuggestionResult
+from app.services.admission import AdmissionRejected
+from app.services.prompt_service import PromptService
+from app.services.suggestion_service import SuggestionService
+from loguru import logger
+
+
+ACTIVE_CONNECTIONS = metrics.gauge("ws_connections_active", "Open WebSocket chat connections")
+IN_FLIGHT = metrics.gauge("ws_requests_in_flight", "Suggestion requests in flight over WebSockets")
+REQUESTS = metrics.counter("ws_requests_total", "Suggestion requests received over WebSockets")
+
+MAX_REQUEST_ID_LENGTH = 64
+
+
+class ChatConnection:
+    """
+    One WebSocket bound to one chat session.
+
+    Clients send {"type": "suggest", "request_id": ..., "message": ...} frames and get
+    start, field/item, complete or error frames tagged with the same request_id, so several
+    requests can stream at once. Backpressure is per connection: at most max_in_flight
+    requests run at a time, and all frames go through a bounded outbox drained by a single
+    sender, so a slow reader pauses its own streams instead of buffering without limit.
+    """
+
+    def __init__(self, websocket: WebSocket, suggestion_service: SuggestionService,
+                 build_data: Callable[[str, str, SuggestionResult], Dict[str, Any]], session_id: str,
+                 max_in_flight: int = 4, send_queue_size: int = 64, idle_timeout_seconds: float = 300.0):
+        self.websocket = websocket
+        self.suggestion_service = suggestion_service
+        self.build_data = build_data
+        self.session_id = session_id
+        self.max_in_flight = max_in_flight
+        self.idle_timeout_seconds = idle_timeout_seconds
+
+        self._outbox: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=send_queue_size)
+        self._requests: Dict[str, asyncio.Task] = {}
+
+    async def _send(self, frame: Dict[str, Any]) -> None:
+        """Queue a frame, waiting while the outbox is full."""
+        await self._outbox.put(frame)
+
+    async def _send_loop(self) -> None:
+        while True:
+            frame = await self._outbox.get()
+            await self.websocket.send_text(json.dumps(frame, default=str))
+
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects or goes idle."""
+        ACTIVE_CONNECTIONS.inc()
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            await self._send({"type": "session", "session_id": self.session_id})
+            while not sender.done():
+                try:
+                    raw = await asyncio.wait_for(self.websocket.receive_text(), timeout=self.idle_timeout_seconds)
+                except asyncio.TimeoutError:
+                    if self._requests:
+                        continue
+                    logger.info(f"Closing idle WebSocket for session: {self.session_id}")
+                    await self.websocket.close(code=1000, reason="idle timeout")
+                    return
+                except WebSocketDisconnect:
+                    return
+                await self._dispatch(raw)
+        finally:
+            for task in list(self._requests.values()):
+                task.cancel()
+            sender.cancel()
+            await asyncio.gather(sender, *self._requests.values(), return_exceptions=True)
+            ACTIVE_CONNECTIONS.dec()
+
+    async def _error(self, request_id: Any, error_type: str, details: str, **extra: Any) -> None:
+        await self._send({"type": "error", "request_id": request_id, "error": {"type": error_type, "details": details, **extra}})
+
+    async def _dispatch(self, raw: str) -> None:
+        try:
+            frame = json.loads(raw)
+            if not isinstance(frame, dict):
+                raise ValueError("frame must be a JSON object")
+        except ValueError as e:
+            await self._error(None, "invalid_frame", str(e))
+            return
+
+        frame_type = frame.get("type")
+        request_id = frame.get("request_id")
+        if request_id is None or request_id == "":
+            request_id = str(uuid.uuid4())
+        elif (isinstance(request_id, bool) or not isinstance(request_id, (str, int))
+              or len(str(request_id)) > MAX_REQUEST_ID_LENGTH):
+            # Ids key the in-flight map and are echoed back, so only short scalars are accepted
+            await self._error(
+                None, "invalid_frame", f"request_id must be a string or integer of at most {MAX_REQUEST_ID_LENGTH} characters"
+            )
+            return
+        if frame_type == "ping":
+            await self._send({"type": "pong"})
+        elif frame_type == "cancel":
+            task = self._requests.get(request_id)
+            if task is not None:
+                task.cancel()
+                await self._send({"type": "cancelled", "request_id": request_id})
+        elif frame_type == "suggest":
+            await self._start_request(request_id, frame.get("message"))
+        else:
+            await self._error(request_id, "invalid_frame", f"Unknown frame type: {frame_type}")
+
+    async def _start_request(self, request_id: str, message: Any) -> None:
+        REQUESTS.inc()
+        is_valid, error_message = PromptService.validate_user_message(message if isinstance(message, str) else "")
+        if not is_valid:
+            await self._error(request_id, "validation_error", error_message)
+            return
+        if request_id in self._requests:
+            await self._error(request_id, "validation_error", "request_id is already in flight")
+            return
+        if len(self._requests) >= self.max_in_flight:
+            metrics.counter("ws_requests_rejected_total", "WebSocket requests rejected by per-connection backpressure").inc()
+            await self._error(request_id, "too_many_in_flight", f"At most {self.max_in_flight} requests may be in flight per connection")
+            return
+
+        task = asyncio.create_task(self._handle(request_id, message))
+        self._requests[request_id] = task
+        task.add_done_callback(lambda _: self._requests.pop(request_id, None))
+
+    async def _handle(self, request_id: str, message: str) -> None:
+        IN_FLIGHT.inc()
+        try:
+            await self._send({"type": "start", "request_id": request_id})
+            async for event, payload in self.suggestion_service.stream_suggestion(message, self.session_id):
+                if event == "complete":
+                    await self._send({
+                        "type": "complete",
+                        "request_id": request_id,
+                        "data": self.build_data(message, self.session_id, payload)
+                    })
+                else:
+                    await self._send({"type": event, "request_id": request_id, **payload})
+        except AdmissionRejected as e:
+            await self._error(request_id, "overloaded", str(e), retry_after=e.retry_after)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming WebSocket suggestion: {str(e)}")
+            await self._error(request_id, "generation_error", str(e))
+        finally:
+            IN_FLIGHT.dec()
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Get connection and request counts across all WebSocket chats."""
+        return {
+            "connections": ACTIVE_CONNECTIONS.value,
+            "in_flight": IN_FLIGHT.value,
+            "requests": REQUESTS.value,
+            "rejected": metrics.counter("ws_requests_rejected_total").value
+        }
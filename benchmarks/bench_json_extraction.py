@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON extraction from LLM completions: legacy regex cascade vs single-pass scanner.
+
+Usage:
+    python benchmarks/bench_json_extraction.py [--corpus PATH] [--repeat N]
+
+The corpus is a JSONL file with one {"label": ..., "content": ...} object per line.
+Adversarial cases are generated on top of it.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from app.models.chat import StructuredMealSuggestion
+from app.services.json_parser import JSONParser
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "completions.jsonl")
+
+
+def legacy_extract_json_from_text(text):
+    """The regex cascade previously used by JSONParser.extract_json_from_text."""
+    try:
+        return json.loads(text.strip())
+    except json.JSONDecodeError:
+        pass
+
+    json_patterns = [
+        r'\{.*\}',
+        r'```json\s*(\{.*?\})\s*```',
+        r'```\s*(\{.*?\})\s*```',
+    ]
+
+    for pattern in json_patterns:
+        matches = re.findall(pattern, text, re.DOTALL)
+        for match in matches:
+            try:
+                return json.loads(match.strip())
+            except json.JSONDecodeError:
+                continue
+
+    start_idx = text.find('{')
+    if start_idx != -1:
+        brace_count = 0
+        end_idx = start_idx
+
+        for i, char in enumerate(text[start_idx:], start_idx):
+            if char == '{':
+                brace_count += 1
+            elif char == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    end_idx = i
+                    break
+
+        if brace_count == 0:
+            try:
+                return json.loads(text[start_idx:end_idx + 1])
+            except json.JSONDecodeError:
+                pass
+
+    return None
+
+
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def adversarial_cases(sample):
+    """Build inputs that stress the legacy cascade."""
+    small_objects = " ".join('{"step": %d} then' % i for i in range(300))
+    braces_in_strings = sample.replace('"difficulty": "', '"difficulty": "{not} so } ', 1)
+    return [
+        {"label": "adversarial-many-small-objects", "content": small_objects + "\n" + sample},
+        {"label": "adversarial-braces-in-strings", "content": "Result:\n" + braces_in_strings + "\nDone }"},
+        {"label": "adversarial-open-fences", "content": "```json {\n" * 400 + sample},
+        {"label": "adversarial-long-prose", "content": ("Eat more greens. " * 3000) + sample + (" Stay hydrated." * 3000)},
+        {"label": "adversarial-unclosed-braces", "content": "{" * 5000 + " no json here"},
+        {"label": "adversarial-truncated", "content": sample[: int(len(sample) * 0.7)]},
+    ]
+
+
+def is_meal(result):
+    if not isinstance(result, dict):
+        return False
+    try:
+        StructuredMealSuggestion(**result)
+        return True
+    except Exception:
+        return False
+
+
+def time_call(func, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL corpus of completions")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per case")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    logger.disable("app")
+    cases = load_corpus(args.corpus)
+    cases += adversarial_cases(cases[0]["content"] if cases else "{}")
+
+    rows = []
+    for case in cases:
+        legacy_us, legacy_result = time_call(legacy_extract_json_from_text, case["content"], args.repeat)
+        new_us, new_result = time_call(JSONParser.extract_json_from_text, case["content"], args.repeat)
+        rows.append({
+            "label": case["label"],
+            "chars": len(case["content"]),
+            "legacy_us": round(legacy_us, 1),
+            "new_us": round(new_us, 1),
+            "speedup": round(legacy_us / new_us, 2) if new_us else None,
+            "legacy_meal": is_meal(legacy_result),
+            "new_meal": is_meal(new_result),
+        })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'case':<42} {'chars':>7} {'legacy us':>10} {'new us':>9} {'speedup':>8}  meal(legacy/new)")
+    for row in rows:
+        print(
+            f"{row['label']:<42} {row['chars']:>7} {row['legacy_us']:>10.1f} {row['new_us']:>9.1f} "
+            f"{row['speedup']:>7.2f}x  {row['legacy_meal']!s:>5}/{row['new_meal']!s}"
+        )
+
+    legacy_total = sum(row["legacy_us"] for row in rows)
+    new_total = sum(row["new_us"] for row in rows)
+    print(f"\nTotal: legacy {legacy_total:.0f} us, new {new_total:.0f} us ({legacy_total / new_total:.2f}x)")
+    print(f"Meals recovered: legacy {sum(r['legacy_meal'] for r in rows)}, new {sum(r['new_meal'] for r in rows)} of {len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request logging overhead: the previous synchronous loguru sinks vs the
+background pipeline in app.core.logging.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 20000] [--error-body-kb 50] [--json]
+
+Each simulated request emits the INFO lines of one /suggest call. The error scenario adds
+one upstream error carrying a large raw response body. Console output goes to /dev/null
+and files to a temporary directory. The cost reported is what the calling thread (the
+event loop) pays per request; "drain" is how long the background writer then takes to
+catch up.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from app.core.config import settings
+from app.core.logging import setup_logging
+
+MESSAGE = "I want a high-protein vegetarian dinner that takes less than thirty minutes to cook"
+
+
+def request_before(index: int, error_body: str) -> None:
+    """The log lines of one /suggest call as they were written before: eager f-strings."""
+    request_id, session_id, suggestion_id = str(uuid.uuid4()), "session-1", f"gen-{index}"
+    logger.info(f"Processing meal suggestion request {request_id} for session: {session_id}")
+    logger.info(f"Generating meal suggestion for user message: {MESSAGE[:100]}...")
+    if error_body:
+        logger.error(f"HTTP error from OpenRouter API: 502 - {error_body}")
+    logger.info(f"Successfully generated meal suggestion: {suggestion_id}")
+    logger.info(f"Successfully parsed structured meal suggestion: Chickpea Curry")
+    logger.info(f"Successfully processed structured meal suggestion {suggestion_id} for session: {session_id}")
+
+
+def request_after(index: int, error_body: str) -> None:
+    """The same lines as they are written now: lazy formatting, event tags and a request id."""
+    request_id, session_id, suggestion_id = str(uuid.uuid4()), "session-1", f"gen-{index}"
+    with logger.contextualize(request_id=request_id):
+        logger.info("Processing meal suggestion request {} for session: {}", request_id, session_id, event="suggest.request")
+        logger.info("Generating meal suggestion for user message: {}...", MESSAGE[:100], event="upstream.request")
+        if error_body:
+            logger.error("HTTP error from OpenRouter API: {} - {}", 502, error_body)
+        logger.info("Successfully generated meal suggestion: {}", suggestion_id, event="upstream.response")
+        logger.info("Successfully parsed structured meal suggestion: {}", "Chickpea Curry", event="parse.success")
+        logger.info("Successfully processed structured meal suggestion {} for session: {}", suggestion_id, session_id,
+                    event="suggest.response")
+
+
+def configure_before(directory: str, level: str, devnull) -> None:
+    """The sinks main.py used to install: colorized console and a synchronous rotating file."""
+    logger.remove()
+    logger.add(
+        devnull,
+        level=level,
+        colorize=True,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+    )
+    logger.add(
+        os.path.join(directory, "app.log"),
+        level=level,
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+        rotation="1 day",
+        retention="30 days"
+    )
+
+
+def configure_after(directory: str, level: str, devnull, unlimited: bool):
+    overrides = {"log_level": level, "log_file_level": level, "log_file": os.path.join(directory, "app.log"), "log_max_queue": 1_000_000}
+    if unlimited:
+        # Isolate the pipeline's own cost from what sampling and rate limits discard
+        overrides.update({"log_sample_rates": "", "log_rate_limit_per_second": 0, "log_max_message_chars": 0})
+    return setup_logging(settings.model_copy(update=overrides), stream=devnull)
+
+
+def run(variant: str, level: str, requests: int, error_body: str, unlimited: bool = False) -> dict:
+    directory = tempfile.mkdtemp(prefix="cogfree-logbench-")
+    with open(os.devnull, "w") as devnull:
+        pipeline = None
+        if variant == "before":
+            configure_before(directory, level, devnull)
+            emit = request_before
+        else:
+            pipeline = configure_after(directory, level, devnull, unlimited)
+            emit = request_after
+
+        start = time.perf_counter()
+        for index in range(requests):
+            emit(index, error_body)
+        elapsed = time.perf_counter() - start
+
+        drain_start = time.perf_counter()
+        if pipeline is not None:
+            pipeline.stop(timeout=None)
+        else:
+            logger.remove()
+        drain = time.perf_counter() - drain_start
+
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    stats = pipeline.get_stats() if pipeline is not None else {}
+    return {
+        "variant": variant + (" (no sampling/limits)" if unlimited else ""),
+        "level": level,
+        "us_per_request": round(elapsed / requests * 1_000_000, 2),
+        "drain_ms": round(drain * 1000, 1),
+        "file_bytes_per_request": round(size / requests, 1),
+        "sampled_out": stats.get("sampled_out", 0),
+        "rate_limited": stats.get("rate_limited", 0)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--error-body-kb", type=int, default=50, help="Size of the upstream error body in the error scenario")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    error_body = json.dumps({"error": {"message": "Provider returned error", "raw": "x" * (args.error_body_kb * 1024)}})
+    rows = []
+    for scenario, body in (("normal", ""), ("upstream error", error_body)):
+        for level in ("INFO", "WARNING"):
+            for variant, unlimited in (("before", False), ("after", True), ("after", False)):
+                rows.append({"scenario": scenario, **run(variant, level, args.requests, body, unlimited)})
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'scenario':<15} {'level':<8} {'variant':<28} {'us/request':>11} {'drain ms':>9} {'file B/request':>15}")
+    for row in rows:
+        print(
+            f"{row['scenario']:<15} {row['level']:<8} {row['variant']:<28} {row['us_per_request']:>11.2f} "
+            f"{row['drain_ms']:>9.1f} {row['file_bytes_per_request']:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
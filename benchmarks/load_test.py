@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: run main:app against the mock OpenRouter server and measure it.
+
+Usage:
+    python benchmarks/load_test.py [--name NAME] (--rps N | --concurrency N) [--duration 20]
+        [--endpoint suggest|stream] [--repeat-ratio 0.0] [--journal data/journal] [--mock-arg=--latency-ms=800 ...]
+        [--output result.json] [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.2]
+
+Fixed RPS is open loop: requests are sent on schedule whether or not earlier ones have
+finished, and latency is measured from the scheduled send time, so a stalled server
+cannot hide its queueing delay. Fixed concurrency is closed loop. Both report throughput,
+p50/p95/p99 latency, error rate and the app's peak RSS.
+
+With --baseline, the run exits non-zero if it is worse than the named scenario in the
+baseline file by more than --tolerance; --save-baseline records it instead.
+
+With --journal, prompts are taken in recorded order from a request journal and the mock
+answers them with the recorded completions and latencies.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from app.services.journal import iter_journal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+DISHES = ["breakfast", "lunch", "dinner", "snack", "dessert", "salad", "soup", "smoothie"]
+DIETS = ["vegetarian", "vegan", "high-protein", "low-carb", "gluten-free", "mediterranean", "keto", "dairy-free"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Resident set size of pid from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 2)
+
+
+class Prompts:
+    """Unique prompts, with a fraction repeated to exercise the cache and coalescing, or a recorded corpus."""
+
+    def __init__(self, repeat_ratio: float, corpus: Optional[List[str]] = None):
+        self.repeat_ratio = repeat_ratio
+        self.corpus = corpus
+        self.sent: List[str] = []
+
+    def next(self) -> str:
+        if self.corpus:
+            # Recorded traffic already has its own repeats
+            prompt = self.corpus[len(self.sent) % len(self.corpus)]
+            self.sent.append(prompt)
+            return prompt
+        if self.sent and random.random() < self.repeat_ratio:
+            return random.choice(self.sent[-50:])
+        prompt = f"A {random.choice(DIETS)} {random.choice(DISHES)} idea, variation {len(self.sent)}"
+        self.sent.append(prompt)
+        return prompt
+
+
+async def wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, prompt: str) -> bool:
+    """Send one request; returns whether it produced a suggestion."""
+    if endpoint == "stream":
+        async with client.stream("POST", "/api/chat/suggest/stream", json={"message": prompt}) as response:
+            body = "".join([chunk async for chunk in response.aiter_text()])
+        return response.status_code == 200 and "event: complete" in body
+    response = await client.post("/api/chat/suggest", json={"message": prompt})
+    return response.status_code == 200 and response.json().get("success") is True
+
+
+async def drive(args: argparse.Namespace, base_url: str, app_pid: int) -> Dict[str, Any]:
+    corpus = [entry["prompt"] for entry in iter_journal(args.journal)] if args.journal else None
+    prompts = Prompts(args.repeat_ratio, corpus)
+    latencies: List[float] = []
+    errors = 0
+    peak_rss = rss_kb(app_pid)
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        async def one(scheduled: float) -> None:
+            nonlocal errors
+            try:
+                ok = await send(client, args.endpoint, prompts.next())
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+            errors += not ok
+
+        async def sample_rss() -> None:
+            nonlocal peak_rss
+            while True:
+                current = rss_kb(app_pid)
+                if current is not None:
+                    peak_rss = max(peak_rss or 0, current)
+                await asyncio.sleep(0.25)
+
+        sampler = asyncio.create_task(sample_rss())
+        start = time.perf_counter()
+        end = start + args.duration
+        if args.rps:
+            tasks = []
+            interval = 1.0 / args.rps
+            for index in range(int(args.rps * args.duration)):
+                scheduled = start + index * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(one(scheduled)))
+            await asyncio.gather(*tasks)
+        else:
+            async def worker() -> None:
+                while time.perf_counter() < end:
+                    await one(time.perf_counter())
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+        app_stats = (await client.get("/api/chat/stats")).json().get("data") or {}
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered), 2) if ordered else None,
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "max": round(ordered[-1], 2) if ordered else None
+        },
+        "peak_rss_mb": round(peak_rss / 1024, 1) if peak_rss else None,
+        "fallback_rate": app_stats.get("fallback_rate")
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List the metrics that regressed beyond tolerance."""
+    regressions = []
+    for key in ("p50", "p95", "p99"):
+        current, reference = result["latency_ms"][key], baseline["latency_ms"][key]
+        if current is not None and reference and current > reference * (1 + tolerance):
+            regressions.append(f"latency {key} {current} ms > {reference} ms")
+    if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {result['throughput_rps']} rps < {baseline['throughput_rps']} rps")
+    if result["error_rate"] > baseline["error_rate"] + 0.01:
+        regressions.append(f"error rate {result['error_rate']} > {baseline['error_rate']}")
+    if result["peak_rss_mb"] and baseline.get("peak_rss_mb") and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS {result['peak_rss_mb']} MB > {baseline['peak_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument("--rps", type=float, help="Open-loop fixed request rate")
+    load.add_argument("--concurrency", type=int, help="Closed-loop fixed number of concurrent clients")
+    parser.add_argument("--name", help="Scenario name in the baseline file (default: derived from the load shape)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--endpoint", choices=("suggest", "stream"), default="suggest")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="Fraction of prompts repeated from recent ones")
+    parser.add_argument("--journal", help="Request journal to take prompts and mock completions from")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mock-arg", action="append", default=[], help="Extra argument for mock_openrouter.py")
+    parser.add_argument("--app-env", action="append", default=[], help="Extra KEY=VALUE environment for the app")
+    parser.add_argument("--output", help="Write the result JSON here")
+    parser.add_argument("--baseline", help="Baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the scenario's baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    name = args.name or f"{args.endpoint}-{'rps' + format(args.rps, 'g') if args.rps else 'c' + str(args.concurrency)}"
+    mock_port, app_port = free_port(), free_port()
+    data_dir = tempfile.mkdtemp(prefix="cogfree-bench-")
+    env = {
+        **os.environ,
+        "OPENROUTER_API_KEY": "sk-or-benchmark-key",
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{mock_port}/api/v1",
+        "LOG_LEVEL": "WARNING",
+        # Measure the app, not the default rate limits sized for the real free tier
+        "UPSTREAM_RPM_LIMIT": "0",
+        "UPSTREAM_MAX_CONCURRENCY": "256",
+        "STORAGE_SQLITE_PATH": os.path.join(data_dir, "bench.db"),
+        "CACHE_DISK_PATH": "",
+        "TRACING_EXPORT_PATH": "",
+        "JOURNAL_DIR": os.path.join(data_dir, "journal"),
+        **dict(item.split("=", 1) for item in args.app_env)
+    }
+
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "mock_openrouter.py"), "--port", str(mock_port), "--seed", str(args.seed),
+         *(["--journal", os.path.abspath(args.journal)] if args.journal else []), *args.mock_arg],
+        cwd=ROOT
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+        cwd=data_dir, env={**env, "PYTHONPATH": ROOT}
+    )
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{mock_port}/api/v1/models"))
+        asyncio.run(wait_ready(f"http://127.0.0.1:{app_port}/"))
+        result = asyncio.run(drive(args, f"http://127.0.0.1:{app_port}", app.pid))
+    finally:
+        for process in (app, mock):
+            process.terminate()
+            process.wait(timeout=10)
+
+    result = {
+        "name": name,
+        "config": {
+            "rps": args.rps, "concurrency": args.concurrency, "duration": args.duration,
+            "endpoint": args.endpoint, "repeat_ratio": args.repeat_ratio, "journal": args.journal, "mock_args": args.mock_arg, "app_env": args.app_env
+        },
+        **result
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    baselines = {"scenarios": {}}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines["scenarios"][name] = result
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline '{name}' to {baseline_path}")
+        return
+
+    if args.baseline:
+        if name not in baselines["scenarios"]:
+            print(f"No baseline named '{name}' in {baseline_path}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(result, baselines["scenarios"][name], args.tolerance)
+        if regressions:
+            print("Performance regressed:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print(f"Within {args.tolerance:.0%} of baseline '{name}'")
+
+
+if __name__ == "__main__":
+    main()
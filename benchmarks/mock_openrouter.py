@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenRouter chat completions API, for load tests without real quota.
+
+Usage:
+    python benchmarks/mock_openrouter.py [--port 9911] [--latency-dist lognormal] [--latency-ms 800]
+        [--latency-sigma 0.5] [--tail-ratio 0.01] [--tail-ms 5000] [--error-rate 0.01]
+        [--throttle-rate 0.0] [--malformed-rate 0.05] [--journal data/journal] [--seed N]
+
+Point the app at it with OPENROUTER_BASE_URL=http://127.0.0.1:9911/api/v1. Non-streaming
+requests wait the sampled latency before answering; streaming requests wait it before the
+first chunk. GET /mock/stats reports what the mock has served.
+
+With --journal, prompts recorded in a request journal are answered with the recorded
+completion after the recorded upstream latency; other prompts get a synthetic meal.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.cache_service import SuggestionCache
+from app.services.journal import iter_journal, prompt_hash
+
+MEALS = [
+    ("Chickpea Curry", "Indian", 450, "18g", "50g", "12g"),
+    ("Grilled Salmon Bowl", "Japanese", 620, "42g", "55g", "22g"),
+    ("Lentil Soup", "Mediterranean", 380, "21g", "48g", "8g"),
+    ("Tofu Stir Fry", "Chinese", 510, "28g", "45g", "20g"),
+    ("Greek Yogurt Parfait", "Greek", 300, "20g", "35g", "7g"),
+]
+
+config = argparse.Namespace(
+    latency_dist="lognormal", latency_ms=800.0, latency_sigma=0.5, tail_ratio=0.0, tail_ms=5000.0,
+    error_rate=0.0, throttle_rate=0.0, malformed_rate=0.0, chunk_chars=24, chunk_delay_ms=5.0
+)
+stats = Counter()
+# prompt hash or normalized prompt -> recorded journal entry
+recorded: Dict[str, Dict[str, Any]] = {}
+app = FastAPI(title="Mock OpenRouter")
+
+
+def sample_latency() -> float:
+    """Seconds to wait before answering, drawn from the configured distribution."""
+    if config.tail_ratio and random.random() < config.tail_ratio:
+        return config.tail_ms / 1000
+    if config.latency_dist == "constant":
+        latency = config.latency_ms
+    elif config.latency_dist == "uniform":
+        latency = random.uniform(config.latency_ms * (1 - config.latency_sigma), config.latency_ms * (1 + config.latency_sigma))
+    else:
+        # latency_ms is the median; sigma sets the spread of the tail
+        latency = random.lognormvariate(0, config.latency_sigma) * config.latency_ms
+    return max(0.0, latency) / 1000
+
+
+def meal_json(message: str) -> str:
+    name, cuisine, calories, protein, carbs, fat = MEALS[hash(message) % len(MEALS)]
+    return json.dumps({
+        "meal_name": name,
+        "description": f"A {cuisine.lower()} dish for: {message[:60]}",
+        "ingredients": ["ingredient one", "ingredient two", "ingredient three", "ingredient four"],
+        "instructions": ["Prepare the ingredients", "Cook gently", "Season and serve"],
+        "prep_time": "10 minutes",
+        "cook_time": "20 minutes",
+        "servings": "2 servings",
+        "difficulty": "Easy",
+        "cuisine_type": cuisine,
+        "dietary_tags": ["vegetarian"],
+        "nutritional_benefits": ["High fiber", "Good protein"],
+        "calories_per_serving": calories,
+        "protein_per_serving": protein,
+        "carbs_per_serving": carbs,
+        "fat_per_serving": fat
+    })
+
+
+def load_journal(path: str) -> None:
+    for entry in iter_journal(path):
+        if entry.get("completion"):
+            recorded[entry["prompt_hash"]] = entry
+            recorded[entry["prompt"]] = entry
+
+
+def recorded_entry(messages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Find the journal entry for a request, by exact conversation, then by normalized prompt."""
+    if not recorded:
+        return None
+    entry = recorded.get(prompt_hash(messages[1:]))
+    if entry is None:
+        entry = recorded.get(SuggestionCache.normalize_message(messages[-1].get("content") or ""))
+    return entry
+
+
+def malform(content: str) -> str:
+    """Damage the JSON the way real models do."""
+    kind = random.choice(("truncated", "trailing_comma", "prose", "single_quotes"))
+    stats[f"malformed_{kind}"] += 1
+    if kind == "truncated":
+        return content[:random.randint(len(content) // 3, len(content) - 2)]
+    if kind == "trailing_comma":
+        return content[:-1] + ",}"
+    if kind == "prose":
+        return f"Sure! Here is a meal idea:\n```json\n{content}\n```\nEnjoy your meal!"
+    return content.replace('"', "'")
+
+
+@app.post("/api/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    latency = sample_latency()
+
+    if config.throttle_rate and random.random() < config.throttle_rate:
+        stats["throttled"] += 1
+        await asyncio.sleep(min(latency, 0.05))
+        return JSONResponse(status_code=429, headers={"Retry-After": "1"}, content={"error": {"message": "Rate limit exceeded"}})
+    if config.error_rate and random.random() < config.error_rate:
+        stats["errors"] += 1
+        await asyncio.sleep(latency)
+        return JSONResponse(status_code=502, content={"error": {"message": "Provider returned error"}})
+
+    messages = body.get("messages") or [{}]
+    entry = recorded_entry(messages)
+    if entry is not None:
+        stats["journal_replays"] += 1
+        content = entry["completion"]
+        latency = (entry.get("upstream_ms") or 0) / 1000
+    else:
+        content = meal_json(messages[-1].get("content") or "")
+        if config.malformed_rate and random.random() < config.malformed_rate:
+            content = malform(content)
+        structured = "response_format" in body or "tools" in body
+        if not structured and random.random() < 0.5:
+            content = f"Here is a suggestion:\n```json\n{content}\n```"
+    prompt_tokens = sum(len(message.get("content") or "") for message in messages) // 4
+    completion_tokens = len(content) // 4
+    completion_id = f"gen-{uuid.uuid4().hex}"
+
+    if body.get("stream"):
+        stats["streams"] += 1
+
+        async def chunks():
+            await asyncio.sleep(latency)
+            for start in range(0, len(content), config.chunk_chars):
+                piece = content[start:start + config.chunk_chars]
+                delta = (
+                    {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]} if "tools" in body
+                    else {"content": piece}
+                )
+                chunk = {"id": completion_id, "created": int(time.time()), "model": body.get("model"), "choices": [{"delta": delta}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(config.chunk_delay_ms / 1000)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    await asyncio.sleep(latency)
+    message = (
+        {"role": "assistant", "content": None, "tool_calls": [{"type": "function", "function": {"name": "meal_suggestion", "arguments": content}}]}
+        if "tools" in body else {"role": "assistant", "content": content}
+    )
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        "choices": [{"index": 0, "message": message, "finish_reason": "stop"}]
+    }
+
+
+@app.get("/api/v1/models")
+async def models():
+    return {"data": [{"id": "mock/model"}]}
+
+
+@app.get("/mock/stats")
+async def mock_stats():
+    return dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9911)
+    parser.add_argument("--latency-dist", choices=("constant", "uniform", "lognormal"), default=config.latency_dist)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms, help="Constant/mean/median latency")
+    parser.add_argument("--latency-sigma", type=float, default=config.latency_sigma, help="Lognormal sigma or uniform +/- fraction")
+    parser.add_argument("--tail-ratio", type=float, default=config.tail_ratio, help="Fraction of calls that take --tail-ms")
+    parser.add_argument("--tail-ms", type=float, default=config.tail_ms)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="Fraction of 502 responses")
+    parser.add_argument("--throttle-rate", type=float, default=config.throttle_rate, help="Fraction of 429 responses")
+    parser.add_argument("--malformed-rate", type=float, default=config.malformed_rate, help="Fraction of damaged JSON payloads")
+    parser.add_argument("--chunk-chars", type=int, default=config.chunk_chars)
+    parser.add_argument("--chunk-delay-ms", type=float, default=config.chunk_delay_ms)
+    parser.add_argument("--journal", help="Request journal whose recorded completions to replay")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    for key, value in vars(args).items():
+        if hasattr(config, key):
+            setattr(config, key, value)
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.journal:
+        load_journal(args.journal)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
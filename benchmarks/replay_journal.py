@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Replay a request journal (JOURNAL_DIR, default data/journal) offline.
+
+Usage:
+    python benchmarks/replay_journal.py parse [--journal data/journal]
+    python benchmarks/replay_journal.py cache [--cache-entries 1024] [--warm-disk-path DIR] [--ttl 3600]
+    python benchmarks/replay_journal.py upstream [--base-url http://127.0.0.1:9911/api/v1] [--concurrency 8]
+
+The journal has one entry per request; cache and coalesced hits only carry the prompt and
+cache key, upstream calls also the model, usage, latency and raw completion.
+
+parse   re-parses every recorded completion with the current JSONParser and reports parse
+        time and any entries whose outcome changed since they were recorded.
+cache   replays the recorded cache keys through an LRU of --cache-entries to estimate the hit
+        ratio, and with --warm-disk-path writes the parsed suggestions into a disk cache the
+        app can start from (CACHE_DISK_PATH). Keys carry the model and prompt version, so
+        entries recorded under an older prompt simply never hit.
+upstream sends the recorded prompts to an OpenAI-compatible endpoint, by default the mock
+        server (start it with --journal to answer with the recorded completions), and compares
+        latency with what was recorded. Session history is not journaled, so follow-up turns
+        are replayed without it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from loguru import logger
+from app.models.chat import CachedSuggestion, OpenRouterCompletionResponse
+from app.services.cache_service import SuggestionCache
+from app.services.journal import iter_journal
+from app.services.json_parser import JSONParser
+from app.services.prompt_service import PromptService
+
+DEFAULT_JOURNAL = os.path.join("data", "journal")
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": None, "p95": None, "p99": None}
+    return {f"p{q}": round(ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))], 2) for q in (50, 95, 99)}
+
+
+def upstream_calls(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [entry for entry in entries if entry.get("completion") is not None]
+
+
+def to_completion(entry: Dict[str, Any]) -> OpenRouterCompletionResponse:
+    """Rebuild the completion the app parsed from a journal entry."""
+    return OpenRouterCompletionResponse(
+        id=entry["suggestion_id"],
+        object="chat.completion",
+        created=int(entry["timestamp"]),
+        model=entry["model"],
+        usage=entry.get("usage") or {},
+        choices=[{"index": 0, "message": {"role": "assistant", "content": entry["completion"]}}],
+        structured_output=entry.get("structured_output")
+    )
+
+
+def replay_parse(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    timings = []
+    parsed = 0
+    changed = []
+    for entry in entries:
+        start = time.perf_counter()
+        suggestion = JSONParser.parse_completion(to_completion(entry))
+        timings.append((time.perf_counter() - start) * 1_000_000)
+        parsed += suggestion is not None
+        if (suggestion is not None) != entry.get("parsed"):
+            changed.append({"suggestion_id": entry["suggestion_id"], "recorded": entry.get("parsed"), "now": suggestion is not None})
+    return {
+        "completions": len(entries),
+        "parsed": parsed,
+        "parsed_when_recorded": sum(bool(entry.get("parsed")) for entry in entries),
+        "parse_us": {"mean": round(statistics.fmean(timings), 2) if timings else None, **percentiles(timings)},
+        "changed": changed
+    }
+
+
+async def replay_cache(entries: List[Dict[str, Any]], capacity: int, warm_disk_path: Optional[str], ttl: float) -> Dict[str, Any]:
+    lru: "OrderedDict[str, None]" = OrderedDict()
+    hits = 0
+    for entry in entries:
+        key = entry["cache_key"]
+        if key in lru:
+            hits += 1
+            lru.move_to_end(key)
+            continue
+        lru[key] = None
+        if len(lru) > capacity:
+            lru.popitem(last=False)
+
+    result = {
+        "entries": len(entries),
+        "unique_keys": len({entry["cache_key"] for entry in entries}),
+        "cache_entries": capacity,
+        "hit_ratio": round(hits / len(entries), 4) if entries else 0.0
+    }
+    if warm_disk_path:
+        cache = SuggestionCache(max_entries=capacity, ttl_seconds=ttl, disk_path=warm_disk_path)
+        warmed = 0
+        for entry in upstream_calls(entries):
+            # Only structured completions are cached by the app; later entries overwrite earlier ones
+            if entry.get("history_turns") or not entry.get("parsed"):
+                continue
+            suggestion = JSONParser.parse_completion(to_completion(entry))
+            if suggestion is None:
+                continue
+            await cache.set(entry["cache_key"], CachedSuggestion(
+                suggestion=suggestion,
+                suggestion_id=entry["suggestion_id"],
+                timestamp=datetime.fromtimestamp(entry["timestamp"]),
+                model=entry["model"]
+            ))
+            warmed += 1
+        result["warmed"] = warmed
+        result["warm_disk_path"] = warm_disk_path
+    return result
+
+
+async def replay_upstream(entries: List[Dict[str, Any]], base_url: str, api_key: str, concurrency: int, timeout: float) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, headers={"Authorization": f"Bearer {api_key}"}) as client:
+        async def one(entry: Dict[str, Any]) -> None:
+            nonlocal errors
+            payload = {
+                "model": entry["model"],
+                "messages": PromptService.format_openrouter_messages(entry["prompt"], structured=bool(entry.get("structured_output")))
+            }
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/chat/completions", json=payload)
+                    errors += response.status_code != 200
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(entry) for entry in entries))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "entries": len(entries),
+        "errors": errors,
+        "throughput_rps": round(len(entries) / elapsed, 2) if elapsed else None,
+        "latency_ms": percentiles(latencies),
+        "recorded_latency_ms": percentiles([entry["upstream_ms"] for entry in entries])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=("parse", "cache", "upstream"))
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL, help="Journal directory or a single .jsonl/.jsonl.gz file")
+    parser.add_argument("--limit", type=int, help="Replay only the first N entries")
+    parser.add_argument("--cache-entries", type=int, default=1024)
+    parser.add_argument("--warm-disk-path", help="Write parsed suggestions into a disk cache at this path")
+    parser.add_argument("--ttl", type=float, default=3600.0, help="TTL of warmed disk cache entries")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9911/api/v1")
+    parser.add_argument("--api-key", default=os.getenv("OPENROUTER_API_KEY", "sk-or-replay-key"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    logger.disable("app")
+    entries = []
+    for entry in iter_journal(args.journal):
+        entries.append(entry)
+        if args.limit and len(entries) >= args.limit:
+            break
+    if not entries:
+        print(f"No journal entries found at {args.journal}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.mode == "parse":
+        result = replay_parse(upstream_calls(entries))
+    elif args.mode == "cache":
+        result = asyncio.run(replay_cache(entries, args.cache_entries, args.warm_disk_path, args.ttl))
+    else:
+        result = asyncio.run(replay_upstream(upstream_calls(entries), args.base_url, args.api_key, args.concurrency, args.timeout))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
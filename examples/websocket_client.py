@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+WebSocket chat client example for the Meal Suggestor Backend API
+"""
+import asyncio
+import json
+import websockets
+
+
+async def chat(url="ws://localhost:8000/api/chat/ws"):
+    """Interactive chat over a single WebSocket connection."""
+    async with websockets.connect(url) as websocket:
+        session = json.loads(await websocket.recv())
+        print(f"Connected (session {session['session_id']})")
+        print("Type your meal preferences or requirements.")
+        print("Type 'quit' to exit.\n")
+
+        turn = 0
+        while True:
+            user_input = (await asyncio.to_thread(input, "You: ")).strip()
+
+            if user_input.lower() in ['quit', 'exit', 'bye']:
+                print("Goodbye!")
+                break
+
+            if not user_input:
+                continue
+
+            turn += 1
+            await websocket.send(json.dumps({"type": "suggest", "request_id": str(turn), "message": user_input}))
+
+            # Fields arrive as soon as the model has produced them
+            while True:
+                frame = json.loads(await websocket.recv())
+                if frame["type"] == "field" and frame["field"] == "meal_name":
+                    print(f"\nDietician: {frame['value']}")
+                elif frame["type"] == "item" and frame["field"] == "ingredients":
+                    print(f"  - {frame['value']}")
+                elif frame["type"] == "complete":
+                    print(f"\n{frame['data']['suggestion']['description']}\n")
+                    break
+                elif frame["type"] == "error":
+                    print(f"Error: {frame['error']}\n")
+                    break
+
+
+if __name__ == "__main__":
+    asyncio.run(chat())
@@ -1,26 +1,46 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.models.chat import APIResponse
+from app.services.admission import AdmissionRejected
+from app.services.prompt_service import PromptService
+from app.services.token_accounting import TokenBudgetExceeded
 from app.core.config import settings
-from app.api.chat import router as chat_router
+from app.core.logging import RequestIdMiddleware, setup_logging
+from app.core.metrics import metrics
+from app.core.tracing import TracingMiddleware, tracer
+from app.api.chat import router as chat_router, openrouter_service, health_monitor, job_queue, storage, journal
 from loguru import logger
-import sys
 import time
 
-# Configure logging
-logger.remove()
-logger.add(
-    sys.stdout,
-    level=settings.log_level,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
-)
-logger.add(
-    "logs/app.log",
-    level="INFO",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-    rotation="1 day",
-    retention="30 days"
-)
+# Configure logging: background writer, JSON file sink, sampling and rate limits
+setup_logging(settings)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create and release shared resources for the application lifetime."""
+    # Fixed system prefixes and their version hashes are built once, before any request
+    PromptService.compile_templates()
+    await openrouter_service.start()
+    if storage:
+        await storage.start()
+    if journal:
+        await journal.start()
+    if health_monitor:
+        await health_monitor.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    if health_monitor:
+        await health_monitor.stop()
+    if journal:
+        await journal.stop()
+    if storage:
+        # Flushes pending write-behind batches
+        await storage.stop()
+    await openrouter_service.close()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -28,7 +48,8 @@ app = FastAPI(
     version=settings.app_version,
     description="A modular meal suggestion backend API with OpenRouter integration and structured JSON responses",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -40,6 +61,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request spans and Server-Timing header
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
+# Added last so it is outermost and every log record of the request carries its id
+app.add_middleware(RequestIdMiddleware)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load with 503 and Retry-After instead of letting the request time out."""
+    body = APIResponse(
+        success=False,
+        message="Service overloaded, please retry",
+        error={"type": "overloaded", "reason": exc.reason, "retry_after": exc.retry_after}
+    )
+    return JSONResponse(
+        status_code=503,
+        content=body.model_dump(mode="json"),
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
+@app.exception_handler(TokenBudgetExceeded)
+async def token_budget_exceeded_handler(request: Request, exc: TokenBudgetExceeded):
+    """A used-up token budget is a quota, not overload: 429 with Retry-After until the window frees up."""
+    body = APIResponse(
+        success=False,
+        message="Token budget exhausted, please retry later",
+        error={"type": "token_budget_exceeded", "reason": exc.reason, "retry_after": exc.retry_after}
+    )
+    return JSONResponse(
+        status_code=429,
+        content=body.model_dump(mode="json"),
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
 # Include routers
 app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
 
@@ -63,13 +118,14 @@ async def health():
         "version": settings.app_version
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     
-    # Create logs directory if it doesn't exist
-    import os
-    os.makedirs("logs", exist_ok=True)
-    
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     logger.info(f"Debug mode: {settings.debug}")
     logger.info(f"OpenRouter model: {settings.openrouter_model}")
@@ -10,18 +10,18 @@ def test_single_prompt():
     
     user_message = "I want a healthy vegetarian meal for dinner"
     
-    # Test the formatted prompt
-    formatted_prompt = PromptService.get_dietician_prompt(user_message)
-    print("✅ Formatted prompt:")
-    print(formatted_prompt[:200] + "...")
+    # Test the static system prompt
+    system_prompt = PromptService.get_dietician_prompt()
+    print("✅ System prompt:")
+    print(system_prompt[:200] + "...")
     print()
     
     # Test OpenRouter message format
     messages = PromptService.format_openrouter_messages(user_message)
     print("✅ OpenRouter messages format:")
     print(f"Number of messages: {len(messages)}")
-    print(f"Message role: {messages[0]['role']}")
-    print(f"Message content preview: {messages[0]['content'][:100]}...")
+    print(f"Message roles: {[message['role'] for message in messages]}")
+    print(f"User message: {messages[-1]['content']}")
     print()
     
     # Test validation
@@ -0,0 +1,14 @@
+import os
+import shutil
+import tempfile
+
+# Settings are read when app modules are first imported, so point everything the app writes
+# at a scratch directory before any test imports main
+_scratch = tempfile.mkdtemp(prefix="cogfree-tests-")
+os.environ.setdefault("STORAGE_SQLITE_PATH", os.path.join(_scratch, "cogfree.db"))
+os.environ.setdefault("JOURNAL_DIR", os.path.join(_scratch, "journal"))
+os.environ.setdefault("LOG_FILE", os.path.join(_scratch, "app.log"))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.prompt_service import PromptService
+from main import app
+
+
+def test_concurrency_cap_and_bounded_queue():
+    """Test that excess callers queue up to the limit and the rest are shed."""
+    controller = AdmissionController(max_concurrency=2, rpm_limit=0, tpm_limit=0, max_queue=1, max_wait_seconds=1.0)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with controller.admit():
+            peak = max(peak, controller.get_stats()["in_flight"])
+            await asyncio.sleep(0.01)
+
+    async def burst():
+        return await asyncio.gather(*[call() for _ in range(5)], return_exceptions=True)
+
+    results = asyncio.run(burst())
+    rejected = [result for result in results if isinstance(result, AdmissionRejected)]
+    assert peak == 2
+    assert len(rejected) == 2
+    assert all(result.reason == "queue_full" and result.retry_after >= 1 for result in rejected)
+    assert controller.get_stats()["queue_depth"] == 0
+
+
+def test_rate_limit_rejects_when_deadline_would_be_missed():
+    """Test that a caller is shed early when the token bucket cannot refill in time."""
+    controller = AdmissionController(max_concurrency=0, rpm_limit=2, tpm_limit=0, max_queue=10, max_wait_seconds=0.5)
+
+    async def three_calls():
+        for _ in range(2):
+            async with controller.admit():
+                pass
+        async with controller.admit():
+            pass
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        asyncio.run(three_calls())
+    assert exc_info.value.reason == "rate_limited"
+    assert exc_info.value.retry_after >= 29
+
+
+def test_token_estimate_is_settled_against_actual_usage():
+    """Test that unused estimated tokens are returned to the TPM bucket."""
+    controller = AdmissionController(max_concurrency=0, rpm_limit=0, tpm_limit=10000, max_queue=10, max_wait_seconds=1.0)
+    messages = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "soup"}]
+    estimate = PromptService.estimate_tokens(messages) + 1000
+    assert estimate == 1109
+
+    async def call():
+        async with controller.admit(estimate) as ticket:
+            ticket.settle(300)
+
+    asyncio.run(call())
+    assert 9699 <= controller.tpm_bucket.tokens <= 9701
+
+
+def test_metrics_scrape_has_no_duplicate_admission_series():
+    """Test that the admission collector only adds series the registered metrics do not export."""
+    with TestClient(app) as client:
+        lines = client.get("/metrics").text.splitlines()
+    samples = [line.rsplit(" ", 1)[0] for line in lines if line.startswith("meal_suggestor_upstream_admission")]
+    assert len(samples) == len(set(samples))
+    assert "meal_suggestor_upstream_admission_max_concurrency" in samples
+    assert "meal_suggestor_upstream_admission_admitted" not in samples
+    assert sum(line.startswith("# TYPE meal_suggestor_upstream_admission_queue_depth ") for line in lines) == 1
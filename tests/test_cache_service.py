@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from app.models.chat import CachedSuggestion
+from app.services.cache_service import SuggestionCache, TTLLRUCache
+from app.services.json_parser import JSONParser
+
+
+def make_entry(suggestion_id="gen-1"):
+    return CachedSuggestion(
+        suggestion=JSONParser.create_fallback_response("healthy dinner"),
+        suggestion_id=suggestion_id,
+        timestamp=datetime.now(),
+        model="test-model"
+    )
+
+
+def test_lru_eviction_and_counters():
+    """Test LRU order, eviction and hit/miss counters."""
+    cache = TTLLRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Test that expired entries are treated as misses."""
+    cache = TTLLRUCache(max_entries=10, ttl_seconds=60)
+    cache.set("a", 1, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_key_normalization():
+    """Test that trivially different prompts share a cache key."""
+    key = SuggestionCache.make_key("Healthy  vegetarian dinner!", "model", "v1")
+    assert key == SuggestionCache.make_key("healthy vegetarian dinner", "model", "v1")
+    assert key != SuggestionCache.make_key("healthy vegetarian dinner", "other-model", "v1")
+    assert key != SuggestionCache.make_key("healthy vegetarian dinner", "model", "v2")
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that the disk tier serves entries to a fresh cache instance."""
+    async def scenario():
+        cache = SuggestionCache(max_entries=10, ttl_seconds=60, disk_path=str(tmp_path))
+        await cache.set("key", make_entry())
+
+        restarted = SuggestionCache(max_entries=10, ttl_seconds=60, disk_path=str(tmp_path))
+        entry = await restarted.get("key")
+        assert entry is not None
+        assert entry.suggestion_id == "gen-1"
+        stats = restarted.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 0
+        assert stats["hit_ratio"] == 1.0
+
+    asyncio.run(scenario())
+
+
+def test_disk_tier_is_bounded_and_sweeps_expired_files(tmp_path):
+    """Test that the disk tier evicts its oldest files past the cap and removes expired ones."""
+    async def scenario():
+        cache = SuggestionCache(max_entries=10, ttl_seconds=60, disk_path=str(tmp_path), disk_max_entries=3)
+        for index in range(5):
+            await cache.set(f"key{index}", make_entry(f"gen-{index}"))
+            # Distinct mtimes so eviction order is deterministic
+            os.utime(tmp_path / f"key{index}.json", (1000 + index, time.time() - 10 + index))
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["key2.json", "key3.json", "key4.json"]
+        stats = cache.get_stats()
+        assert stats["disk_entries"] == 3
+        assert stats["disk_evictions"] == 2
+
+        # A file written longer ago than the TTL is swept when a new cache starts up
+        os.utime(tmp_path / "key2.json", (1000, time.time() - 120))
+        restarted = SuggestionCache(max_entries=10, ttl_seconds=60, disk_path=str(tmp_path), disk_max_entries=3)
+        assert not (tmp_path / "key2.json").exists()
+        assert restarted.get_stats()["disk_entries"] == 2
+        assert restarted.get_stats()["disk_expirations"] == 1
+
+    asyncio.run(scenario())
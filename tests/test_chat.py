@@ -44,3 +44,43 @@ def test_suggest_endpoint_without_api_key():
     assert response.status_code == 500
     data = response.json()
     assert data["success"] is False
+
+
+def test_suggest_batch_runs_concurrently_in_order(monkeypatch):
+    """Test that batch items are validated, deduplicated and resolved concurrently in order."""
+    import asyncio
+    import time
+    from datetime import datetime
+    from app.api import chat
+    from app.models.chat import SuggestionResult
+    from app.services.json_parser import JSONParser
+
+    calls = []
+
+    async def fake_get_suggestion(user_message, session_id=None, keep_history=True):
+        # Items without a session id get a generated one that is not kept
+        assert session_id and not keep_history
+        calls.append(user_message)
+        await asyncio.sleep(0.1)
+        if user_message == "fail":
+            raise Exception("upstream down")
+        return SuggestionResult(
+            suggestion=JSONParser.create_fallback_response(user_message),
+            suggestion_id=f"gen-{user_message}",
+            timestamp=datetime.now()
+        )
+
+    monkeypatch.setattr(chat.suggestion_service, "get_suggestion", fake_get_suggestion)
+    items = ["breakfast", "lunch", "   ", "Breakfast", "fail", "dinner"]
+    start = time.perf_counter()
+    response = client.post("/api/chat/suggest/batch", json={"items": [{"message": message} for message in items]})
+    elapsed = time.perf_counter() - start
+
+    results = response.json()["data"]["results"]
+    assert [result["index"] for result in results] == list(range(len(items)))
+    assert [result["success"] for result in results] == [True, True, False, True, False, True]
+    assert results[2]["error"]["type"] == "validation_error"
+    assert results[4]["error"]["type"] == "generation_error"
+    assert results[3]["data"]["suggestion_id"] == "gen-breakfast"
+    assert sorted(calls) == ["breakfast", "dinner", "fail", "lunch"]
+    assert elapsed < 0.3
@@ -0,0 +1,42 @@
+import asyncio
+from app.services.coalescer import RequestCoalescer
+
+
+def test_concurrent_identical_requests_share_one_call():
+    """Test that concurrent callers with the same key await one shared call."""
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        return await asyncio.gather(*[coalescer.run("key", upstream) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["result"] * 5
+    assert sum(coalesced for _, coalesced in results) == 4
+    assert coalescer.get_stats()["coalesced_requests"] == 4
+    assert coalescer.get_stats()["in_flight"] == 0
+
+
+def test_failures_propagate_to_all_waiters():
+    """Test that an upstream failure is raised to every coalesced caller."""
+    coalescer = RequestCoalescer()
+
+    async def upstream():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *[coalescer.run("key", upstream) for _ in range(3)],
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert coalescer.get_stats()["failed_flights"] == 1
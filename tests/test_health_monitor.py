@@ -0,0 +1,45 @@
+import asyncio
+import httpx
+from app.services.health_monitor import HealthMonitor
+
+
+class StubService:
+    """Stands in for OpenRouterService, exposing only the shared client."""
+
+    def __init__(self, handler):
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_probes_feed_rolling_window():
+    """Test that probe outcomes update the cached snapshot without further I/O."""
+    responses = iter([200, 200, 503, 200])
+    service = StubService(lambda request: httpx.Response(next(responses)))
+    monitor = HealthMonitor(service, interval_seconds=60, timeout_seconds=1, window=3, probe_url="http://upstream/models")
+
+    assert monitor.get_snapshot()["status"] == "unknown"
+
+    async def probe_four_times():
+        for _ in range(4):
+            await monitor.probe()
+
+    asyncio.run(probe_four_times())
+    snapshot = monitor.get_snapshot()
+    assert snapshot["status"] == "connected"
+    assert snapshot["total_probes"] == 4
+    assert snapshot["window"] == 3
+    assert snapshot["success_rate"] == round(2 / 3, 4)
+    assert snapshot["consecutive_failures"] == 0
+    assert HealthMonitor.uptime_seconds() > 0
+
+
+def test_failed_probe_is_recorded():
+    """Test that connection errors mark the upstream unreachable."""
+    def refuse(request):
+        raise httpx.ConnectError("refused")
+
+    monitor = HealthMonitor(StubService(refuse), interval_seconds=60, timeout_seconds=1, window=5, probe_url="http://upstream/models")
+    assert asyncio.run(monitor.probe()) is False
+    snapshot = monitor.get_snapshot()
+    assert snapshot["status"] == "unreachable"
+    assert snapshot["consecutive_failures"] == 1
+    assert "refused" in snapshot["last_error"]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import time
+import httpx
+from app.services.hedging import HedgePolicy
+from app.services.json_parser import JSONParser
+from app.services.openrouter_service import OpenRouterService
+from app.services.resilience import RetryBudget, RetryPolicy
+
+
+MEAL = JSONParser.create_fallback_response("healthy dinner").model_dump()
+
+
+def make_service(handler, fallback_models, budget_ratio=1.0):
+    service = OpenRouterService()
+    service.structured_output = "off"
+    service.model = "primary-model"
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.retry_policy = RetryPolicy(0, 0.001, 0.01, [], RetryBudget(1.0, 10))
+    service.hedge_policy = HedgePolicy(
+        enabled=True, percentile=95, min_delay_ms=10, min_samples=5,
+        budget_ratio=budget_ratio, fallback_models=fallback_models
+    )
+    return service
+
+
+def completion(model):
+    return {
+        "id": f"gen-{model}",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "usage": {},
+        "choices": [{"message": {"role": "assistant", "content": json.dumps(MEAL)}}]
+    }
+
+
+def test_slow_primary_is_hedged_to_fallback_model():
+    """Test that a hedge to the fallback model wins when the primary is slow."""
+    async def handler(request):
+        model = json.loads(request.content)["model"]
+        if model == "primary-model":
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, json=completion(model))
+
+    service = make_service(handler, ["fast-model"])
+    for _ in range(5):
+        service.hedge_policy.record_latency(20)
+
+    start = time.perf_counter()
+    result, parsed = asyncio.run(service.generate_parsed_suggestion("dinner", parse=JSONParser.parse_completion))
+    assert time.perf_counter() - start < 0.4
+    assert result.model == "fast-model"
+    assert parsed.meal_name == MEAL["meal_name"]
+
+    stats = service.get_hedging_stats()
+    assert stats["hedges_sent"] >= 1
+    assert stats["extra_upstream_call_ratio"] > 0
+
+
+def test_failed_primary_falls_back_to_next_model():
+    """Test that an upstream error moves on to the fallback models in order."""
+    def handler(request):
+        model = json.loads(request.content)["model"]
+        if model != "backup-model":
+            return httpx.Response(503, json={"error": {}})
+        return httpx.Response(200, json=completion(model))
+
+    service = make_service(handler, ["broken-model", "backup-model"])
+    result, parsed = asyncio.run(service.generate_parsed_suggestion("dinner", parse=JSONParser.parse_completion))
+    assert result.model == "backup-model"
+    assert parsed is not None
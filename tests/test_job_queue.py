@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pytest
+from app.services.admission import AdmissionRejected
+from app.services.job_queue import Job, JobQueue
+
+
+async def echo_handler(job):
+    await asyncio.sleep(0.01)
+    if job.message == "fail":
+        raise Exception("upstream down")
+    return {"message": job.message}
+
+
+def test_workers_complete_jobs_and_results_expire():
+    """Test that jobs run in the pool, report their outcome and are dropped after the TTL."""
+    async def scenario():
+        queue = JobQueue(echo_handler, workers=2, result_ttl_seconds=0.05)
+        await queue.start()
+        jobs = [queue.submit(message) for message in ("a", "b", "fail")]
+        assert all(job.status == Job.QUEUED for job in jobs)
+        await asyncio.sleep(0.04)
+        statuses = [queue.get(job.job_id).status for job in jobs]
+        results = [queue.get(job.job_id).result for job in jobs]
+        await asyncio.sleep(0.05)
+        expired = [queue.get(job.job_id) for job in jobs]
+        stats = queue.get_stats()
+        await queue.stop()
+        return statuses, results, expired, stats
+
+    statuses, results, expired, stats = asyncio.run(scenario())
+    assert statuses == [Job.SUCCEEDED, Job.SUCCEEDED, Job.FAILED]
+    assert results == [{"message": "a"}, {"message": "b"}, None]
+    assert expired == [None, None, None]
+    assert stats["jobs_held"] == 0
+
+
+def test_results_expire_while_the_queue_is_idle():
+    """Test that finished jobs are dropped after the TTL without any further submit or lookup."""
+    async def scenario():
+        queue = JobQueue(echo_handler, workers=1, result_ttl_seconds=0.05)
+        await queue.start()
+        queue.submit("a")
+        await asyncio.sleep(0.03)
+        held = queue.get_stats()["jobs_held"]
+        await asyncio.sleep(0.15)
+        stats = queue.get_stats()
+        await queue.stop()
+        return held, stats
+
+    held, stats = asyncio.run(scenario())
+    assert held == 1
+    assert stats["jobs_held"] == 0
+
+
+def test_full_queue_rejects_with_retry_after():
+    """Test that submissions beyond the queue bound are shed instead of buffered."""
+    async def scenario():
+        queue = JobQueue(echo_handler, workers=1, max_queue=2)
+        await queue.start()
+        queue.submit("a")
+        queue.submit("b")
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                queue.submit("c")
+            return rejected.value
+        finally:
+            await queue.stop()
+
+    rejected = asyncio.run(scenario())
+    assert rejected.reason == "job_queue_full"
+    assert rejected.retry_after >= 1
+
+
+def test_callback_is_posted_to_receiver():
+    """Test that a finished job is POSTed to a local stand-in callback receiver."""
+    received = []
+
+    async def receiver(reader, writer):
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = int(next(
+            line.split(b":")[1] for line in headers.split(b"\r\n") if line.lower().startswith(b"content-length")
+        ))
+        received.append(json.loads(await reader.readexactly(length)))
+        writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(receiver, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        queue = JobQueue(echo_handler, workers=1, callback_allowed_hosts=["127.0.0.1"])
+        await queue.start()
+        url = f"http://127.0.0.1:{port}/hook"
+        assert queue.callback_allowed(url)
+        assert not queue.callback_allowed("http://169.254.169.254/latest")
+        # Without an allowlist no host may receive callbacks
+        assert not JobQueue(echo_handler).callback_allowed(url)
+        job = queue.submit("a", callback_url=url)
+        for _ in range(100):
+            if job.callback_status:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        server.close()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.callback_status == "delivered"
+    assert received[0]["job_id"] == job.job_id
+    assert received[0]["result"] == {"message": "a"}
@@ -0,0 +1,83 @@
+import asyncio
+import glob
+import json
+import os
+import tempfile
+from app.models.chat import OpenRouterCompletionResponse
+from app.services.cache_service import SuggestionCache
+from app.services.journal import Journal, iter_journal, prompt_hash
+from app.services.json_parser import JSONParser
+from app.services.suggestion_service import SuggestionService
+
+
+class FakeOpenRouterService:
+    model = "test/model"
+
+    def get_structured_mode(self, model=None):
+        return "off"
+
+    async def generate_parsed_suggestion(self, user_message, session_id=None, parse=None, history=None):
+        completion = OpenRouterCompletionResponse(
+            id=f"gen-{len(user_message)}",
+            object="chat.completion",
+            created=1700000000,
+            model=self.model,
+            usage={"prompt_tokens": 120, "completion_tokens": 80, "total_tokens": 200},
+            choices=[{"message": {"role": "assistant", "content": JSONParser.create_fallback_response(user_message).model_dump_json()}}]
+        )
+        return completion, parse(completion)
+
+
+def test_rotation_compresses_segments_and_replays_in_order():
+    """Test that full files are gzipped, old segments pruned and entries read back in write order."""
+    directory = tempfile.mkdtemp()
+
+    async def scenario():
+        journal = Journal(directory, max_file_bytes=2000, max_files=3, batch_size=10, flush_interval_seconds=0.01)
+        await journal.start()
+        for index in range(200):
+            journal.record({"index": index, "completion": "x" * 50})
+            if index % 10 == 9:
+                await asyncio.sleep(0.005)
+        await journal.stop()
+        return journal.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["written"] == 200
+    assert stats["rotations"] > 3
+    assert len(glob.glob(os.path.join(directory, "journal-*.jsonl.gz"))) == 3
+
+    indexes = [entry["index"] for entry in iter_journal(directory)]
+    # Pruned segments drop the oldest entries; what is left is contiguous and ends at the last write
+    assert indexes == list(range(indexes[0], 200))
+    assert indexes[0] > 0
+
+
+def test_suggestion_calls_are_journaled_off_the_request_path():
+    """Test that upstream calls record usage, latency and raw completion, and cache hits are recorded too."""
+    directory = tempfile.mkdtemp()
+
+    async def scenario():
+        journal = Journal(directory, flush_interval_seconds=0.01)
+        service = SuggestionService(FakeOpenRouterService(), SuggestionCache(), journal=journal)
+        await service.get_suggestion("  Something WARM for dinner!  ")
+        await service.get_suggestion("something warm for dinner")
+        # Recorded before the writer runs; nothing has touched the disk yet
+        assert journal.get_stats()["queue_depth"] == 2
+        await journal.start()
+        await journal.stop()
+
+    asyncio.run(scenario())
+    entry, repeat = iter_journal(directory)
+    assert entry["source"] == "upstream"
+    assert entry["prompt"] == "something warm for dinner"
+    assert entry["prompt_hash"] == prompt_hash([{"role": "user", "content": "  Something WARM for dinner!  "}])
+    assert entry["model"] == "test/model"
+    assert entry["usage"]["total_tokens"] == 200
+    assert entry["upstream_ms"] >= 0
+    assert entry["parsed"] is True
+    assert json.loads(entry["completion"])["meal_name"]
+    assert repeat["source"] == "cache"
+    assert repeat["cache_key"] == entry["cache_key"]
+    assert repeat["suggestion_id"] == entry["suggestion_id"]
+    assert "completion" not in repeat
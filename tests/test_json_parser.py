@@ -0,0 +1,71 @@
+import json
+from app.models.chat import OpenRouterCompletionResponse
+from app.services.json_parser import JSONParser
+
+
+MEAL = JSONParser.create_fallback_response("healthy dinner").model_dump()
+
+
+def test_extract_from_fenced_chatty_completion():
+    """Test extraction of a fenced object surrounded by prose."""
+    text = "Here is your meal:\n```json\n" + json.dumps(MEAL, indent=2) + "\n```\nEnjoy {really}!"
+    assert JSONParser.extract_json_from_text(text) == MEAL
+
+
+def test_braces_inside_strings_do_not_break_extraction():
+    """Test that braces and escaped quotes in string values are handled."""
+    meal = dict(MEAL, description='Use a "10} inch" pan {or skillet')
+    text = "Result: " + json.dumps(meal) + " }"
+    assert JSONParser.extract_json_from_text(text) == meal
+
+
+def test_largest_object_wins_over_earlier_small_objects():
+    """Test that the full suggestion is preferred over small example objects."""
+    text = 'First {"step": 1}, then {"step": 2}. Final answer: ' + json.dumps(MEAL)
+    assert JSONParser.extract_json_from_text(text) == MEAL
+
+
+def test_scan_reports_truncated_tail():
+    """Test that an unterminated object is reported as a trailing candidate."""
+    text = 'Sure! {"meal_name": "Soup", "ingredients": ["leek", "pot'
+    objects, tail = JSONParser.scan_json_objects(text)
+    assert objects == []
+    assert tail == text.index("{")
+    assert JSONParser.extract_json_from_text(text) is None
+
+
+def test_malformed_output_is_repaired():
+    """Test that trailing commas, single quotes and comments are repaired."""
+    text = json.dumps(MEAL).replace('"meal_name"', "'meal_name'").replace("]", ", ]") + " // done"
+    suggestion = JSONParser.parse_meal_suggestion("Here you go: " + text)
+    assert suggestion is not None
+    assert suggestion.meal_name == MEAL["meal_name"]
+
+
+def test_truncated_output_is_closed_and_coerced():
+    """Test that a completion cut off mid-field still yields a suggestion."""
+    meal = dict(MEAL, calories_per_serving="450 kcal", servings=2)
+    text = json.dumps(meal)
+    text = text[:text.index('"fat_per_serving"') + 25]  # cut inside the last field
+    suggestion = JSONParser.parse_meal_suggestion(text)
+    assert suggestion is not None
+    assert suggestion.calories_per_serving == 450
+    assert suggestion.servings == "2"
+    assert suggestion.ingredients == MEAL["ingredients"]
+
+
+def test_structured_completion_is_validated_directly():
+    """Test that tool call arguments are validated without heuristic extraction."""
+    completion = OpenRouterCompletionResponse(
+        id="gen-1",
+        object="chat.completion",
+        created=0,
+        model="test-model",
+        usage={},
+        choices=[{"message": {"content": None, "tool_calls": [{"function": {"arguments": json.dumps(MEAL)}}]}}],
+        structured_output="tool"
+    )
+    suggestion = JSONParser.parse_completion(completion)
+    assert suggestion is not None
+    assert suggestion.model_dump() == MEAL
+    assert JSONParser.get_parse_stats()["parses"]["structured"] >= 1
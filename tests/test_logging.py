@@ -0,0 +1,67 @@
+import io
+import json
+import os
+import tempfile
+from fastapi.testclient import TestClient
+from loguru import logger
+from app.core.config import settings
+from app.core.logging import LogFilter, setup_logging
+from main import app
+
+
+def make_record(message="hello", line=10, **extra):
+    return {"message": message, "name": "app.test", "line": line, "extra": extra}
+
+
+def test_filter_samples_per_request_rate_limits_and_truncates():
+    """Test that sampling is consistent per request id, floods are suppressed and long messages cut."""
+    log_filter = LogFilter(sample_rates={"upstream.request": 0.5, "parse.success": 0.5}, rate_limit_per_second=0, max_message_chars=20)
+    for index in range(200):
+        request_id = f"req-{index}"
+        first = log_filter(make_record(event="upstream.request", request_id=request_id))
+        # Events at the same rate are kept or dropped together for a request
+        assert log_filter(make_record(event="parse.success", request_id=request_id)) == first
+    assert 100 < log_filter.sampled_out < 300
+
+    record = make_record("x" * 100)
+    assert log_filter(record)
+    assert record["message"].startswith("x" * 20 + "... [80 chars truncated]")
+
+    limited = LogFilter(rate_limit_per_second=5)
+    allowed = sum(limited(make_record(line=42)) for _ in range(50))
+    assert allowed == 5
+    assert limited.rate_limited == 45
+    # Another call site has its own budget
+    assert limited(make_record(line=43))
+
+
+def test_pipeline_writes_json_lines_with_request_ids():
+    """Test that records reach the file as JSON from the background writer, tagged with request ids."""
+    path = os.path.join(tempfile.mkdtemp(), "app.log")
+    console = io.StringIO()
+    pipeline = setup_logging(settings.model_copy(update={"log_file": path, "log_sample_rates": ""}), stream=console)
+    try:
+        with TestClient(app) as client:
+            response = client.get("/health", headers={"X-Request-ID": "req-abc"})
+            assert response.headers["x-request-id"] == "req-abc"
+            generated = client.get("/health", headers={"X-Request-ID": "not a valid id!"}).headers["x-request-id"]
+            assert generated != "not a valid id!"
+        with logger.contextualize(request_id="req-abc"):
+            logger.info("Generating meal suggestion for user message: {}...", "lentil {soup}", event="upstream.request")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Upstream call failed")
+        pipeline.stop()
+
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        entry = next(record for record in records if record.get("event") == "upstream.request")
+        assert entry["request_id"] == "req-abc"
+        assert entry["message"] == "Generating meal suggestion for user message: lentil {soup}..."
+        assert entry["level"] == "INFO"
+        failure = next(record for record in records if record["message"] == "Upstream call failed")
+        assert "ValueError: boom" in failure["exception"]
+        assert "| INFO     | req-abc | test_logging:test_pipeline_writes_json_lines_with_request_ids:" in console.getvalue()
+    finally:
+        setup_logging(settings)
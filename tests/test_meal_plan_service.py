@@ -0,0 +1,71 @@
+import asyncio
+import re
+from datetime import datetime
+from app.models.chat import MealPlanRequest, SuggestionResult
+from app.services.json_parser import JSONParser
+from app.services.meal_plan_service import MealPlanService
+
+
+class FakeSuggestionService:
+    """Returns 900 kcal meals unless the prompt asks for a specific amount."""
+
+    def __init__(self, unparsed_prompts=()):
+        self.prompts = []
+        self.unparsed_prompts = unparsed_prompts
+
+    async def get_suggestion(self, user_message, session_id=None):
+        self.prompts.append(user_message)
+        aim = re.search(r"about (\d+) kcal", user_message)
+        suggestion = JSONParser.create_fallback_response(user_message).model_copy(update={
+            "calories_per_serving": int(aim.group(1)) if aim else 900,
+            "protein_per_serving": "30g"
+        })
+        return SuggestionResult(
+            suggestion=suggestion,
+            suggestion_id=f"gen-{len(self.prompts)}",
+            timestamp=datetime.now(),
+            structured=not any(prompt in user_message for prompt in self.unparsed_prompts)
+        )
+
+
+def test_plan_regenerates_single_meals_to_hit_targets():
+    """Test that only the heaviest meal of each off-target day is regenerated."""
+    suggestions = FakeSuggestionService()
+    service = MealPlanService(suggestions, max_concurrency=4, max_regenerations=10)
+    request = MealPlanRequest(preferences="Vegetarian", days=2, targets={"calories": 2000}, tolerance=0.1)
+
+    plan = asyncio.run(service.generate(request))
+
+    assert len(suggestions.prompts) == 6 + 2
+    assert plan["regenerations"] == {"attempted": 2, "accepted": 2}
+    for day in plan["days"]:
+        assert day["on_target"] is True
+        assert day["totals"]["calories"] == 2133.0
+        assert day["totals"]["protein_g"] == 90.0
+        assert sum(meal["regenerated"] for meal in day["meals"]) == 1
+    assert plan["totals"]["calories"] == 4266.0
+    assert plan["daily_average"]["calories"] == 2133.0
+
+
+def test_plan_without_targets_does_not_regenerate():
+    """Test that plans without targets make exactly one call per meal."""
+    suggestions = FakeSuggestionService()
+    plan = asyncio.run(MealPlanService(suggestions).generate(MealPlanRequest(preferences="Vegan", days=3)))
+
+    assert len(suggestions.prompts) == 9
+    assert plan["regenerations"] == {"attempted": 0, "accepted": 0}
+    assert plan["days"][2]["on_target"] is None
+    assert plan["totals"]["calories"] == 8100.0
+
+
+def test_unparsed_meals_are_left_out_of_totals():
+    """Test that a fallback suggestion's placeholder macros do not count towards the plan."""
+    suggestions = FakeSuggestionService(unparsed_prompts=("Lunch for day 1",))
+    plan = asyncio.run(MealPlanService(suggestions).generate(MealPlanRequest(preferences="Vegan", days=2)))
+
+    lunch = plan["days"][0]["meals"][1]
+    assert lunch["success"] is True
+    assert lunch["macros"] is None
+    assert plan["days"][0]["totals"]["calories"] == 1800.0
+    assert plan["days"][1]["totals"]["calories"] == 2700.0
+    assert plan["totals"]["calories"] == 4500.0
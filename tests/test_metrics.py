@@ -0,0 +1,49 @@
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_percentiles_are_bucket_accurate():
+    """Test that percentiles land within one bucket of the exact value."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_ms")
+    for value in range(1, 1001):
+        histogram.observe(value / 10)
+
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["avg"] == 50.05
+    for q, exact in ((50, 50.0), (95, 95.0), (99, 99.0)):
+        # Buckets grow by 1.5x, so estimates stay within that ratio
+        assert exact / 1.5 <= summary[f"p{q}"] <= exact * 1.5
+
+
+def test_prometheus_rendering_includes_labels_and_collectors():
+    """Test the text exposition format for labelled metrics and collectors."""
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("requests_total", "Requests").inc(3)
+    registry.histogram("stage_ms", labels={"stage": "parse"}).observe(2.0)
+    registry.register_collector("cache", lambda: {"hits": 4, "hit_rate": 0.5, "backend": "memory"})
+
+    text = registry.render_prometheus()
+    assert "# TYPE test_requests_total counter\ntest_requests_total 3\n" in text
+    assert 'test_stage_ms_bucket{stage="parse",le="+Inf"} 1' in text
+    assert 'test_stage_ms_count{stage="parse"} 1' in text
+    assert "test_cache_hits 4" in text
+    assert "backend" not in text
+    assert registry.histogram("stage_ms", labels={"stage": "parse"}).count == 1
+
+
+def test_prometheus_families_are_contiguous_and_unique():
+    """Test that each family is described once with its samples together, and collectors do not repeat series."""
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("calls_total", labels={"model": "a"}).inc()
+    registry.histogram("wait_ms").observe(1.0)
+    registry.counter("calls_total", labels={"model": "b"}).inc()
+    registry.register_collector("calls", lambda: {"total": 2})
+    registry.register_collector("wait", lambda: {"ms": {"count": 1, "p95": 1.0}})
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines.count("# TYPE test_calls_total counter") == 1
+    start = lines.index("# TYPE test_calls_total counter")
+    assert lines[start + 1:start + 3] == ['test_calls_total{model="a"} 1', 'test_calls_total{model="b"} 1']
+    assert [line for line in lines if line.startswith("test_wait_ms_count")] == ["test_wait_ms_count 1"]
+    assert "test_wait_ms_p95 1.0" in lines
@@ -0,0 +1,22 @@
+from app.services.nutrition import NutritionTable, parse_grams
+
+
+def test_parse_grams_handles_free_form_amounts():
+    """Test parsing of the macro strings models return."""
+    assert parse_grams("25g") == (25.0, True)
+    assert parse_grams("12.5 grams") == (12.5, True)
+    assert parse_grams("20-30g") == (25.0, True)
+    assert parse_grams("about 8g") == (8.0, True)
+    assert parse_grams("n/a") == (0.0, False)
+
+
+def test_daily_and_plan_totals():
+    """Test that per-day and whole-plan totals sum the right rows and columns."""
+    table = NutritionTable(days=2, meals=3)
+    for day in range(2):
+        for meal in range(3):
+            table.set_meal(day, meal, [100.0 * (day + 1), 10.0, 20.0 + meal, 5.0])
+
+    assert table.daily_totals() == [[300.0, 30.0, 63.0, 15.0], [600.0, 30.0, 63.0, 15.0]]
+    assert table.totals() == [900.0, 60.0, 126.0, 30.0]
+    assert table.get_meal(1, 2) == [200.0, 10.0, 22.0, 5.0]
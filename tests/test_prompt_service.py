@@ -0,0 +1,36 @@
+from app.services.prompt_service import PromptService, PromptTemplate, approximate_tokens
+
+
+def test_system_prefix_is_static_and_user_content_only_in_user_turn():
+    """Test that every request shares one system prompt and the user message is sent once."""
+    history = [{"role": "user", "content": "something light"}, {"role": "assistant", "content": "Greek salad"}]
+    for structured in (False, True):
+        first = PromptService.format_openrouter_messages("a {spicy} curry", structured=structured)
+        second = PromptService.format_openrouter_messages("pancakes please", structured=structured, history=history)
+        assert first[0]["content"].encode("utf-8") == second[0]["content"].encode("utf-8")
+        assert "curry" not in first[0]["content"]
+        assert first[-1] == {"role": "user", "content": "a {spicy} curry"}
+        assert second[1:-1] == history
+
+    # Literal JSON braces survive now that the template is not run through str.format
+    assert '{\n  "meal_name": "string"' in PromptService.get_dietician_prompt()
+    assert PromptService.get_prompt_version(False) != PromptService.get_prompt_version(True)
+
+
+def test_version_tracks_template_text_and_token_report_covers_templates():
+    """Test that the version changes with the text and the report counts static and per-request tokens."""
+    template = PromptTemplate("test", PromptService.DIETICIAN_SYSTEM_PROMPT)
+    assert template.version == PromptService.get_prompt_version(False)
+    assert PromptTemplate("test", PromptService.DIETICIAN_SYSTEM_PROMPT + " ").version != template.version
+
+    report = PromptService.get_token_report()
+    assert set(report) == {"dietician", "dietician_structured"}
+    assert report["dietician_structured"]["system_tokens"] < report["dietician"]["system_tokens"]
+    for entry in report.values():
+        assert entry["system_tokens"] < entry["sample_request_tokens"]
+        assert 0 < entry["static_prefix_share"] < 1
+
+    assert approximate_tokens("") == 0
+    assert approximate_tokens("I want a salad") == 4
+    # Punctuation-heavy JSON costs more tokens per character than prose
+    assert approximate_tokens('{"a": [1, 2]}') > len('{"a": [1, 2]}') // 4
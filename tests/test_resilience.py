@@ -0,0 +1,110 @@
+import asyncio
+import httpx
+import pytest
+from app.services.openrouter_service import OpenRouterService
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy
+
+
+COMPLETION = {
+    "id": "gen-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "test-model",
+    "usage": {},
+    "choices": [{"message": {"role": "assistant", "content": "{}"}}]
+}
+
+
+def make_service(statuses, failure_threshold=5, recovery_seconds=30.0):
+    """OpenRouterService whose upstream replies with the given status codes in order."""
+    calls = []
+
+    def handler(request):
+        status = statuses[min(len(calls), len(statuses) - 1)]
+        calls.append(status)
+        headers = {"Retry-After": "0"} if status == 429 else {}
+        return httpx.Response(status, json=COMPLETION if status == 200 else {"error": {}}, headers=headers)
+
+    service = OpenRouterService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.retry_policy = RetryPolicy(
+        max_retries=2, base_delay=0.001, max_delay=0.01,
+        retryable_statuses=[429, 502, 503], budget=RetryBudget(ratio=1.0, min_retries_per_second=10)
+    )
+    service.circuit_breaker = CircuitBreaker(failure_threshold, recovery_seconds, name="test")
+    return service, calls
+
+
+def test_retryable_statuses_are_retried():
+    """Test that 429 and 5xx responses are retried until one succeeds."""
+    service, calls = make_service([429, 503, 200])
+    retries_before = service.retry_policy.get_stats()["retries"]
+    data = asyncio.run(service._post_completion({"model": "test-model"}))
+    assert data["id"] == "gen-1"
+    assert calls == [429, 503, 200]
+    assert service.retry_policy.get_stats()["retries"] - retries_before == 2
+
+
+def test_non_retryable_status_fails_immediately():
+    """Test that client errors are raised without retrying."""
+    service, calls = make_service([400])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service._post_completion({"model": "test-model"}))
+    assert calls == [400]
+    assert service.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_opens_and_recovers_through_half_open_probe():
+    """Test that repeated upstream failures open the circuit, which a successful probe closes."""
+    service, calls = make_service([502, 502, 502, 200], failure_threshold=3, recovery_seconds=0.05)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service._post_completion({"model": "test-model"}))
+    assert service.circuit_breaker.state == CircuitBreaker.OPEN
+
+    # Fails fast without reaching upstream
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(service._post_completion({"model": "test-model"}))
+    assert len(calls) == 3
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert service.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    asyncio.run(service._post_completion({"model": "test-model"}))
+    assert service.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_after_beyond_max_delay_is_not_waited_for():
+    """Test that a Retry-After longer than the configured cap fails fast."""
+    policy = RetryPolicy(1, 0.1, 5.0, [429], RetryBudget(1.0, 10))
+    response = httpx.Response(429, headers={"Retry-After": "120"}, request=httpx.Request("POST", "http://upstream"))
+    error = httpx.HTTPStatusError("rate limited", request=response.request, response=response)
+    assert policy.retry_delay(error, 0) is None
+
+
+def test_half_open_probe_is_released_when_the_call_does_not_complete():
+    """Test that a cancelled or unreadable probe gives back its half-open slot."""
+    service, calls = make_service([502, 502, 502], failure_threshold=3, recovery_seconds=0.0)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service._post_completion({"model": "test-model"}))
+    assert service.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+
+    async def cancelled_probe():
+        async def hang(payload):
+            await asyncio.sleep(10)
+        service._send_completion = hang
+        probe = asyncio.ensure_future(service._post_completion({"model": "test-model"}))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancelled_probe())
+
+    async def not_json(payload):
+        raise ValueError("Expecting value")
+    service._send_completion = not_json
+    with pytest.raises(ValueError):
+        asyncio.run(service._post_completion({"model": "test-model"}))
+
+    # Neither probe left its slot taken, so the next one is admitted
+    service.circuit_breaker.before_call()
+    assert service.circuit_breaker.state == CircuitBreaker.HALF_OPEN
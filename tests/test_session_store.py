@@ -0,0 +1,95 @@
+import asyncio
+import time
+from app.models.chat import OpenRouterCompletionResponse
+from app.services.json_parser import JSONParser
+from app.services.prompt_service import PromptService
+from app.services.session_store import SessionStore
+from app.services.storage import SESSIONS, MemoryStorage
+from app.services.suggestion_service import SuggestionService
+
+
+def test_history_is_truncated_to_token_budget_with_summary():
+    """Test that old turns beyond the token budget are dropped and summarized."""
+    store = SessionStore(history_token_budget=60)
+    for index in range(6):
+        store.append("s1", "user", f"request number {index} " + "x" * 40)
+        store.append("s1", "assistant", f"Suggested meal {index}")
+
+    history = store.get_history("s1")
+    assert history[0]["role"] == "system"
+    assert "request number 0" in history[0]["content"]
+    assert history[-1] == {"role": "assistant", "content": "Suggested meal 5"}
+    assert PromptService.estimate_tokens(history[1:]) <= 60
+    assert store.get_stats()["truncated_turns"] > 0
+
+    messages = PromptService.format_openrouter_messages("and for dessert?", structured=True, history=history)
+    assert messages[0]["role"] == "system"
+    assert messages[1:-1] == history
+    assert messages[-1] == {"role": "user", "content": "and for dessert?"}
+
+
+def test_lru_sessions_are_evicted_at_memory_cap():
+    """Test that the least recently used sessions go first when memory runs out."""
+    store = SessionStore(max_memory_bytes=4000)
+    for index in range(20):
+        store.append(f"s{index}", "user", "y" * 100)
+        # Keep the first session hot
+        store.get_history("s0")
+
+    stats = store.get_stats()
+    assert stats["memory_bytes"] <= 4000
+    assert stats["evictions"] > 0
+    assert store.get_history("s0")
+    assert not store.get_history("s1")
+    assert store.get_history("s19")
+
+
+def test_idle_sessions_expire():
+    """Test that sessions idle for longer than the TTL are dropped."""
+    store = SessionStore(ttl_seconds=0.01)
+    store.append("old", "user", "hello")
+    time.sleep(0.02)
+    store.append("new", "user", "hello")
+
+    assert len(store) == 1
+    assert store.get_history("old") == []
+    assert store.get_stats()["expirations"] == 1
+    assert store.get_stats()["memory_bytes"] > 0
+    assert store.delete("new")
+    assert store.get_stats()["memory_bytes"] == 0
+
+
+class FakeOpenRouterService:
+    model = "test/model"
+
+    def get_structured_mode(self, model=None):
+        return "off"
+
+    async def generate_parsed_suggestion(self, user_message, session_id=None, parse=None, history=None):
+        completion = OpenRouterCompletionResponse(
+            id=f"gen-{session_id}",
+            object="chat.completion",
+            created=1700000000,
+            model=self.model,
+            usage={"prompt_tokens": 120, "completion_tokens": 80, "total_tokens": 200},
+            choices=[{"message": {"role": "assistant", "content": JSONParser.create_fallback_response(user_message).model_dump_json()}}]
+        )
+        return completion, parse(completion)
+
+
+def test_generated_session_ids_are_not_kept():
+    """Test that a session id generated for a one-off request is neither remembered nor persisted."""
+    store = SessionStore()
+    storage = MemoryStorage()
+    service = SuggestionService(FakeOpenRouterService(), session_store=store, storage=storage)
+
+    async def scenario():
+        await service.get_suggestion("a warm lentil soup", session_id="generated", keep_history=False)
+        await service.get_suggestion("a warm lentil soup", session_id="client")
+        return await storage.get(SESSIONS, "generated"), await storage.get(SESSIONS, "client")
+
+    generated, client = asyncio.run(scenario())
+    assert generated is None
+    assert store.get_history("generated") == []
+    assert client is not None
+    assert len(store.get_history("client")) == 2
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+from app.services.session_store import SessionStore
+from app.services.storage import SESSIONS, SUGGESTIONS, SQLiteStorage
+
+
+def test_write_behind_batches_and_survives_restart():
+    """Test that repeated writes coalesce into one batch and are readable after a restart."""
+    path = os.path.join(tempfile.mkdtemp(), "store.db")
+
+    async def write():
+        storage = SQLiteStorage(path, flush_interval_seconds=10)
+        await storage.start()
+        for turn in range(50):
+            storage.put(SESSIONS, "s1", {"summary": "", "turns": [["user", f"turn {turn}"]]}, 60)
+        storage.put(SUGGESTIONS, "gen-1", {"meal_name": "Lentil Soup"}, 60)
+        # Pending writes are visible before they are committed
+        assert (await storage.get(SESSIONS, "s1"))["turns"] == [["user", "turn 49"]]
+        await storage.stop()
+        return storage.get_stats()
+
+    async def read():
+        storage = SQLiteStorage(path)
+        await storage.start()
+        try:
+            return await storage.get(SESSIONS, "s1"), await storage.get(SUGGESTIONS, "gen-1")
+        finally:
+            await storage.stop()
+
+    stats = asyncio.run(write())
+    assert stats["writes"] == 51
+    assert stats["batches"] == 1
+    assert stats["rows_written"] == 2
+
+    session, suggestion = asyncio.run(read())
+    assert session["turns"] == [["user", "turn 49"]]
+    assert suggestion == {"meal_name": "Lentil Soup"}
+
+    store = SessionStore()
+    store.restore("s1", session)
+    assert store.get_history("s1") == [{"role": "user", "content": "turn 49"}]
+
+
+def test_batch_being_committed_stays_readable():
+    """Test that a read during the commit sees the batch the writer took from the pending map."""
+    storage = SQLiteStorage(os.path.join(tempfile.mkdtemp(), "store.db"))
+    storage.put(SESSIONS, "s1", {"summary": "", "turns": [["user", "hello"]]}, 60)
+    seen = []
+
+    class ReadingConnection:
+        """Reads the session back while the batch is being written."""
+
+        def __init__(self, connection):
+            self.connection = connection
+
+        def __enter__(self):
+            return self.connection.__enter__()
+
+        def __exit__(self, *exc_info):
+            return self.connection.__exit__(*exc_info)
+
+        def executemany(self, sql, rows):
+            seen.append(asyncio.run(storage.get(SESSIONS, "s1")))
+            return self.connection.executemany(sql, rows)
+
+    connection = storage._connect()
+    storage._flush(ReadingConnection(connection))
+    connection.close()
+    assert seen == [{"summary": "", "turns": [["user", "hello"]]}]
+    assert storage._inflight == {}
+
+
+def test_failed_commit_is_retried_without_overwriting_newer_writes():
+    """Test that a batch that fails to commit is requeued behind newer writes and lands on the next flush."""
+    path = os.path.join(tempfile.mkdtemp(), "store.db")
+    storage = SQLiteStorage(path)
+    asyncio.run(storage.start())
+    asyncio.run(storage.stop())
+    storage.put(SESSIONS, "s1", {"turn": 1}, 60)
+    storage.put(SESSIONS, "s2", {"turn": 1}, 60)
+
+    class FailingConnection:
+        """Fails the first commit after a newer write to s2 arrives."""
+
+        def __init__(self, connection):
+            self.connection = connection
+            self.failed = False
+
+        def __enter__(self):
+            return self.connection.__enter__()
+
+        def __exit__(self, *exc_info):
+            return self.connection.__exit__(*exc_info)
+
+        def executemany(self, sql, rows):
+            if not self.failed:
+                self.failed = True
+                storage.put(SESSIONS, "s2", {"turn": 2}, 60)
+                raise sqlite3.OperationalError("database is locked")
+            return self.connection.executemany(sql, rows)
+
+    connection = storage._connect()
+    failing = FailingConnection(connection)
+    storage._flush(failing)
+    assert storage.get_stats()["pending_writes"] == 2
+    storage._flush(failing)
+    rows = dict(connection.execute("SELECT key, data FROM sessions").fetchall())
+    connection.close()
+
+    assert rows == {"s1": '{"turn": 1}', "s2": '{"turn": 2}'}
+    stats = storage.get_stats()
+    assert stats["write_retries"] == 1
+    assert stats["write_errors"] == 0
+    assert stats["batches"] == 1
+    assert storage._attempts == {}
+
+
+def test_compaction_removes_expired_rows():
+    """Test that expired rows are hidden from reads and deleted by compaction."""
+    path = os.path.join(tempfile.mkdtemp(), "store.db")
+
+    async def scenario():
+        storage = SQLiteStorage(path, flush_interval_seconds=0.01, compaction_interval_seconds=0.05)
+        await storage.start()
+        storage.put(SUGGESTIONS, "old", {"meal_name": "Stale"}, 0.01)
+        storage.put(SUGGESTIONS, "new", {"meal_name": "Fresh"}, 60)
+        await asyncio.sleep(0.2)
+        old, new = await storage.get(SUGGESTIONS, "old"), await storage.get(SUGGESTIONS, "new")
+        await storage.stop()
+        return old, new, storage.get_stats()
+
+    old, new, stats = asyncio.run(scenario())
+    assert old is None
+    assert new == {"meal_name": "Fresh"}
+    assert stats["rows_compacted"] == 1
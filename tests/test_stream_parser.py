@@ -0,0 +1,35 @@
+import json
+from app.services.json_parser import JSONParser
+from app.services.stream_parser import IncrementalMealParser
+
+
+def feed_in_chunks(parser, text, size=3):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+def test_fields_and_items_are_emitted_incrementally():
+    """Test that scalar fields and array items are emitted as they complete."""
+    suggestion = JSONParser.create_fallback_response('a "quoted" {dinner}')
+    text = "Sure! Here it is:\n```json\n" + json.dumps(suggestion.model_dump(), indent=2) + "\n```"
+
+    parser = IncrementalMealParser()
+    events = feed_in_chunks(parser, text)
+
+    assert parser.done
+    assert events[0] == ("field", "meal_name", None, suggestion.meal_name)
+    assert ("field", "description", None, suggestion.description) in events
+    assert ("field", "calories_per_serving", None, 300) in events
+    assert ("item", "ingredients", 0, suggestion.ingredients[0]) in events
+    assert events == IncrementalMealParser.events_from_suggestion(suggestion)
+
+
+def test_partial_field_is_not_emitted():
+    """Test that a field is held back until its value is complete."""
+    parser = IncrementalMealParser()
+    assert parser.feed('{"meal_name": "Lentil So') == []
+    assert parser.feed('up", "cal') == [("field", "meal_name", None, "Lentil Soup")]
+    assert parser.feed('ories_per_serving": 42') == []
+    assert parser.feed("}") == [("field", "calories_per_serving", None, 42)]
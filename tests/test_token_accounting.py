@@ -0,0 +1,70 @@
+import asyncio
+import httpx
+import pytest
+from app.services.openrouter_service import OpenRouterService
+from app.services.token_accounting import TokenAccountant, TokenBudgetExceeded
+
+
+def make_completion(content="{}"):
+    return {
+        "id": "gen-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "usage": {"prompt_tokens": 300, "completion_tokens": 100, "total_tokens": 400},
+        "choices": [{"message": {"role": "assistant", "content": content}}]
+    }
+
+
+def test_usage_is_aggregated_priced_and_budgeted():
+    """Test per-model, per-session and windowed totals, pricing and both budgets."""
+    accountant = TokenAccountant(prices={"paid/model": (1.0, 4.0), "*": (0.0, 0.0)}, session_budget=1000, global_budget=2500)
+    accountant.record("paid/model", "s1", {"prompt_tokens": 600, "completion_tokens": 200})
+    accountant.record("free/model", "s2", {"prompt_tokens": 500, "completion_tokens": 150})
+    # OpenRouter's own cost wins over the price table
+    accountant.record("paid/model", "s2", {"prompt_tokens": 100, "completion_tokens": 100, "cost": 0.5})
+
+    stats = accountant.get_stats()
+    assert stats["models"]["paid/model"] == {
+        "requests": 2, "prompt_tokens": 700, "completion_tokens": 300, "total_tokens": 1000, "cost_usd": 0.5014
+    }
+    assert stats["models"]["free/model"]["cost_usd"] == 0.0
+    assert stats["windows"]["5m"]["total_tokens"] == stats["totals"]["total_tokens"] == 1650
+    assert stats["sessions"]["top"][0]["session_id"] == "s2"
+    assert accountant.get_session_usage("s1")["budget_remaining"] == 200
+
+    accountant.check_budget("s1", estimated_tokens=200)
+    with pytest.raises(TokenBudgetExceeded) as rejected:
+        accountant.check_budget("s1", estimated_tokens=201)
+    assert rejected.value.reason == "session_token_budget"
+    assert 3500 < rejected.value.retry_after <= 3600
+    # A new session is still limited by what the service used overall
+    with pytest.raises(TokenBudgetExceeded) as rejected:
+        accountant.check_budget("s3", estimated_tokens=1000)
+    assert rejected.value.reason == "global_token_budget"
+    assert stats["budgets"]["global_used"] == 1650
+
+
+def test_service_records_usage_and_rejects_before_calling_upstream():
+    """Test that completions are accounted per session and an exhausted budget never reaches upstream."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=make_completion())
+
+    service = OpenRouterService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.token_accountant = TokenAccountant(session_budget=500)
+
+    async def scenario():
+        await service.generate_meal_suggestion("a warm lentil soup", session_id="s1")
+        with pytest.raises(TokenBudgetExceeded):
+            await service.generate_meal_suggestion("a warm lentil soup", session_id="s1")
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+    stats = service.get_token_stats()
+    assert stats["models"]["test-model"]["total_tokens"] == 400
+    assert stats["budgets"]["rejected"]["session"] == 1
+    assert "output_format" in stats["prompt_breakdown"] or "schema_parameters" in stats["prompt_breakdown"]
@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.tracing import Tracer, TracingMiddleware
+
+
+def make_app(tracer):
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.get("/work")
+    async def work():
+        with tracer.span("outer"):
+            with tracer.span("inner", step=1):
+                pass
+        return {"ok": True}
+
+    return app
+
+
+def test_sampled_request_gets_server_timing_and_nested_spans():
+    """Test that finished child spans are reported in Server-Timing before the total."""
+    tracer = Tracer(enabled=True, sample_rate=1.0, export_sample_rate=0.0)
+    response = TestClient(make_app(tracer)).get("/work")
+
+    timing = response.headers["server-timing"]
+    names = [entry.split(";")[0] for entry in timing.split(", ")]
+    assert names == ["inner", "outer", "total"]
+    assert response.headers["x-trace-id"]
+    assert tracer.get_stats()["sampled_requests"] == 1
+
+
+def test_unsampled_request_has_no_spans():
+    """Test that spans are no-ops when the request is not sampled."""
+    tracer = Tracer(enabled=True, sample_rate=0.0, export_sample_rate=0.0)
+    response = TestClient(make_app(tracer)).get("/work")
+
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    assert tracer.get_stats()["unsampled_requests"] == 1
+    with tracer.span("outside-request") as span:
+        span.set_attribute("ignored", True)
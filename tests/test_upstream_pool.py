@@ -0,0 +1,79 @@
+import asyncio
+import httpx
+from app.services.openrouter_service import OpenRouterService
+from app.services.resilience import RetryBudget, RetryPolicy
+from app.services.upstream_pool import UpstreamPool
+
+
+COMPLETION = {
+    "id": "gen-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "test-model",
+    "usage": {},
+    "choices": [{"message": {"role": "assistant", "content": "{}"}}]
+}
+
+
+def test_pool_parses_key_and_endpoint_entries():
+    """Test "key[@base_url]" entries, with the default base URL filled in."""
+    pool = UpstreamPool.from_settings(
+        "sk-a, sk-b@http://127.0.0.1:9911/api/v1/", default_api_key="sk-default", default_base_url="https://openrouter.ai/api/v1"
+    )
+    assert [(u.api_key, u.base_url) for u in pool.upstreams] == [
+        ("sk-a", "https://openrouter.ai/api/v1"),
+        ("sk-b", "http://127.0.0.1:9911/api/v1")
+    ]
+    assert UpstreamPool.from_settings("", "sk-default", "https://x/api/v1").upstreams[0].api_key == "sk-default"
+
+
+def test_throttled_key_cools_down_and_faster_upstream_is_preferred():
+    """Test that a 429 moves traffic off a key and EWMA latency steers the rest."""
+    async def handler(request):
+        key = request.headers["Authorization"].split()[-1]
+        if key == "sk-throttled":
+            return httpx.Response(429, headers={"Retry-After": "30"}, json={"error": {}})
+        if key == "sk-slow":
+            await asyncio.sleep(0.03)
+        return httpx.Response(200, json=COMPLETION)
+
+    service = OpenRouterService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.retry_policy = RetryPolicy(3, 0.001, 0.01, [429], RetryBudget(1.0, 100))
+    service.upstream_pool = UpstreamPool.from_settings("sk-throttled,sk-slow,sk-fast", "", "http://upstream/api/v1")
+
+    async def run_calls():
+        for _ in range(12):
+            await service._post_completion({"model": "test-model"})
+
+    asyncio.run(run_calls())
+    stats = service.get_upstream_stats()
+    assert stats["upstream-0"]["throttled"] == 1
+    assert stats["upstream-0"]["cooldown_remaining_seconds"] > 25
+    assert stats["upstream-2"]["requests"] > stats["upstream-1"]["requests"]
+    assert stats["upstream-2"]["ewma_latency_ms"] < stats["upstream-1"]["ewma_latency_ms"]
+
+
+def test_lazy_client_is_closed_when_rebound_to_a_new_loop():
+    """Test that a lazily created client is closed, not leaked, when a new event loop takes over."""
+    service = OpenRouterService()
+
+    async def get_client():
+        return service.client
+
+    first = asyncio.run(get_client())
+
+    async def rebind():
+        second = service.client
+        # Let the close task scheduled on this loop run
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return second
+
+    second = asyncio.run(rebind())
+    assert second is not first
+    assert first.is_closed
+    stats = service.get_pool_stats()
+    assert stats["clients_rebound"] == 1
+    assert stats["client_close_errors"] == 0
+    asyncio.run(service.close())
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.api import chat
+from app.models.chat import SuggestionResult
+from app.services.json_parser import JSONParser
+from main import app
+
+
+def test_websocket_streams_concurrent_requests_with_backpressure(monkeypatch):
+    """Test that one connection streams several requests at once and rejects beyond the limit."""
+    async def fake_stream_suggestion(user_message, session_id=None):
+        await asyncio.sleep(0.05)
+        yield "field", {"field": "meal_name", "value": user_message.title()}
+        yield "complete", SuggestionResult(
+            suggestion=JSONParser.create_fallback_response(user_message),
+            suggestion_id=f"gen-{user_message}",
+            timestamp=datetime.now()
+        )
+
+    monkeypatch.setattr(chat.suggestion_service, "stream_suggestion", fake_stream_suggestion)
+    monkeypatch.setattr(chat.settings, "ws_max_in_flight", 2)
+
+    with TestClient(app).websocket_connect("/api/chat/ws?session_id=ws-1") as websocket:
+        assert websocket.receive_json() == {"type": "session", "session_id": "ws-1"}
+        for request_id, message in (("a", "lentil soup"), ("b", "tofu bowl"), ("c", "pasta")):
+            websocket.send_json({"type": "suggest", "request_id": request_id, "message": message})
+        websocket.send_json({"type": "suggest", "request_id": "d", "message": "   "})
+        # Unhashable or oversized ids are rejected without closing the connection
+        websocket.send_json({"type": "suggest", "request_id": ["x"], "message": "curry"})
+        websocket.send_json({"type": "cancel", "request_id": {"id": 1}})
+        websocket.send_json({"type": "suggest", "request_id": "x" * 65, "message": "curry"})
+
+        frames = []
+        while sum(frame["type"] in ("complete", "error") for frame in frames) < 7:
+            frames.append(websocket.receive_json())
+
+    by_request = {}
+    for frame in frames:
+        by_request.setdefault(frame["request_id"], []).append(frame)
+    assert [frame["type"] for frame in by_request["a"]] == ["start", "field", "complete"]
+    assert by_request["b"][1] == {"type": "field", "request_id": "b", "field": "meal_name", "value": "Tofu Bowl"}
+    assert by_request["b"][2]["data"]["session_id"] == "ws-1"
+    assert by_request["c"][0]["error"]["type"] == "too_many_in_flight"
+    assert by_request["d"][0]["error"]["type"] == "validation_error"
+    assert [frame["error"]["type"] for frame in by_request[None]] == ["invalid_frame"] * 3